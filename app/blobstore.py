@@ -0,0 +1,87 @@
+"""Content-addressed storage for attachment bytes.
+
+Each distinct file is stored once under ``<root>/<aa>/<bb>/<sha256>``.
+Reference counts are not kept here: the datastore knows how many attachments
+point at a digest (its ``attachments.sha256`` index) and releases a blob when
+the last one goes away. ``sweep`` reclaims anything that slipped through, such
+as blobs left behind by a crash between the write and the datastore record.
+"""
+from __future__ import annotations
+
+import logging
+import os
+import time
+from pathlib import Path
+from typing import Container, Dict
+
+logger = logging.getLogger(__name__)
+
+
+class BlobStore:
+    def __init__(self, root: Path) -> None:
+        self.root = root
+        # digest -> when a duplicate upload last reused an existing blob. The
+        # blob's own mtime is served as Last-Modified for every attachment
+        # sharing it, so the sweep grace period is restarted here instead.
+        self._reused: Dict[str, float] = {}
+
+    def path_for(self, sha256: str) -> Path:
+        return self.root / sha256[:2] / sha256[2:4] / sha256
+
+    def contains(self, sha256: str) -> bool:
+        return self.path_for(sha256).is_file()
+
+    def ingest(self, source: Path, sha256: str) -> Path:
+        """Move ``source`` into the store, or drop it if the content is already there."""
+        target = self.path_for(sha256)
+        if target.is_file():
+            source.unlink(missing_ok=True)
+            self._reused[sha256] = time.time()
+            return target
+        target.parent.mkdir(parents=True, exist_ok=True)
+        os.replace(source, target)
+        return target
+
+    def release(self, sha256: str) -> None:
+        self._reused.pop(sha256, None)
+        try:
+            self.path_for(sha256).unlink(missing_ok=True)
+        except OSError as exc:
+            logger.warning("Failed to remove blob %s: %s", sha256, exc)
+
+    def sweep(self, referenced: Container[str], *, grace_seconds: float = 3600.0) -> Dict[str, int]:
+        """Delete unreferenced blobs older than ``grace_seconds``.
+
+        The grace period leaves alone blobs whose attachment record is being
+        written right now.
+        """
+        removed = 0
+        reclaimed = 0
+        kept = 0
+        cutoff = time.time() - grace_seconds
+        self._reused = {digest: at for digest, at in self._reused.items() if at > cutoff}
+        if not self.root.exists():
+            return {"removed": 0, "reclaimed_bytes": 0, "kept": 0}
+        for path in self.root.glob("*/*/*"):
+            if not path.is_file():
+                continue
+            if path.name in referenced:
+                kept += 1
+                continue
+            try:
+                stat = path.stat()
+                if stat.st_mtime > cutoff or path.name in self._reused:
+                    kept += 1
+                    continue
+                path.unlink()
+            except OSError as exc:
+                logger.warning("Failed to sweep blob %s: %s", path, exc)
+                continue
+            removed += 1
+            reclaimed += stat.st_size
+        for shard in sorted(self.root.glob("*/*"), reverse=True) + sorted(self.root.glob("*")):
+            try:
+                shard.rmdir()
+            except OSError:
+                pass  # not empty
+        return {"removed": removed, "reclaimed_bytes": reclaimed, "kept": kept}
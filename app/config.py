@@ -36,15 +36,88 @@ class Settings(BaseModel):
         default_factory=lambda: int(os.getenv("REFRESH_TOKEN_EXPIRES_IN_MINUTES", "10080")),
         description="Refresh token expiration window.",
     )
+    auth_token_mode: str = Field(
+        default_factory=lambda: os.getenv("AUTH_TOKEN_MODE", "opaque").strip().lower() or "opaque",
+        description="'opaque' keeps tokens in process memory; 'jwt' signs access tokens for multi-worker use.",
+    )
+    auth_max_tokens: int = Field(
+        default_factory=lambda: int(os.getenv("AUTH_MAX_TOKENS", "50000")),
+        description="Issued tokens kept in memory before those closest to expiry are evicted.",
+    )
+    password_hash_workers: int = Field(
+        default_factory=lambda: int(os.getenv("PASSWORD_HASH_WORKERS", str(min(4, os.cpu_count() or 1)))),
+        description="Threads dedicated to bcrypt hashing and verification.",
+    )
+    password_hash_max_pending: int = Field(
+        default_factory=lambda: int(os.getenv("PASSWORD_HASH_MAX_PENDING", "32")),
+        description="Password checks allowed to wait before sign-ins are refused with 503.",
+    )
+    auth_principal_cache_seconds: float = Field(
+        default_factory=lambda: float(os.getenv("AUTH_PRINCIPAL_CACHE_SECONDS", "30")),
+        description="How long a resolved user is reused across authenticated requests.",
+    )
 
     # AI / Email
     groq_api_key: Optional[str] = os.getenv("GROQ_API_KEY")
     groq_model: str = os.getenv("GROQ_MODEL", "llama-3.3-70b-versatile")
+    groq_max_concurrency: int = Field(
+        default_factory=lambda: int(os.getenv("GROQ_MAX_CONCURRENCY", "4")),
+        description="Maximum number of Groq requests in flight at once.",
+    )
+    groq_timeout_seconds: float = Field(
+        default_factory=lambda: float(os.getenv("GROQ_TIMEOUT_SECONDS", "30")),
+        description="Per-request timeout for Groq chat completions.",
+    )
+    llm_cache_enabled: bool = Field(
+        default_factory=lambda: os.getenv("LLM_CACHE_ENABLED", "true").strip().lower()
+        in {"1", "true", "yes", "on"},
+        description="Reuse cached Groq completions for identical prompts.",
+    )
+    llm_cache_max_entries: int = Field(
+        default_factory=lambda: int(os.getenv("LLM_CACHE_MAX_ENTRIES", "5000")),
+        description="Cached completions kept before least-recently-used eviction.",
+    )
+    llm_cache_ttl_seconds: int = Field(
+        default_factory=lambda: int(os.getenv("LLM_CACHE_TTL_SECONDS", str(7 * 24 * 3600))),
+        description="Age after which a cached completion is discarded.",
+    )
+    analysis_job_concurrency: int = Field(
+        default_factory=lambda: int(os.getenv("ANALYSIS_JOB_CONCURRENCY", "2")),
+        description="Complaints analysed in parallel by the analyze-all background job.",
+    )
+    analysis_job_batch_size: int = Field(
+        default_factory=lambda: int(os.getenv("ANALYSIS_JOB_BATCH_SIZE", "20")),
+        description="Analysed complaints committed to the datastore per batch.",
+    )
+    analysis_job_max_attempts: int = Field(
+        default_factory=lambda: int(os.getenv("ANALYSIS_JOB_MAX_ATTEMPTS", "3")),
+        description="Attempts per complaint before the analyze-all job records a failure.",
+    )
+    similarity_dimensions: int = Field(
+        default_factory=lambda: int(os.getenv("SIMILARITY_DIMENSIONS", "1024")),
+        description="Hashed feature columns in the local complaint similarity index.",
+    )
+    similarity_rerank_candidates: int = Field(
+        default_factory=lambda: int(os.getenv("SIMILARITY_RERANK_CANDIDATES", "8")),
+        description="Nearest neighbours passed to the LLM for reranking (0 disables reranking).",
+    )
+    notification_keepalive_seconds: float = Field(
+        default_factory=lambda: float(os.getenv("NOTIFICATION_KEEPALIVE_SECONDS", "15")),
+        description="Idle interval after which the notification SSE stream sends a keepalive ping.",
+    )
     email_from: str = os.getenv("EMAIL_FROM", "noreply@company.com")
     smtp_host: str = os.getenv("SMTP_HOST", "smtp.sendgrid.net")
     smtp_port: int = int(os.getenv("SMTP_PORT", "587"))
     smtp_user: Optional[str] = os.getenv("SMTP_USER")
     smtp_pass: Optional[str] = os.getenv("SMTP_PASS")
+    smtp_pool_size: int = Field(
+        default_factory=lambda: int(os.getenv("SMTP_POOL_SIZE", "2")),
+        description="SMTP sessions kept open by the background email delivery workers.",
+    )
+    email_retry_interval_seconds: float = Field(
+        default_factory=lambda: float(os.getenv("EMAIL_RETRY_INTERVAL_SECONDS", "60")),
+        description="How often the scheduler retries failed emails that have come due.",
+    )
 
     # Files
     upload_dir: Path = Field(
@@ -56,9 +129,26 @@ class Settings(BaseModel):
         ).split(",")
     )
     max_file_size: int = int(os.getenv("MAX_FILE_SIZE", str(10 * 1024 * 1024)))
+    attachment_gc_interval_hours: float = Field(
+        default_factory=lambda: float(os.getenv("ATTACHMENT_GC_INTERVAL_HOURS", "24")),
+        description="How often unreferenced attachment blobs are swept from the upload directory.",
+    )
     data_store_path: Path = Field(
         default_factory=lambda: Path(os.getenv("DATA_STORE_PATH", "./data/db.json")).resolve()
     )
+    data_store_journal: bool = Field(
+        default_factory=lambda: os.getenv("DATA_STORE_JOURNAL", "true").strip().lower()
+        in {"1", "true", "yes", "on"},
+        description="Append mutations to a journal instead of rewriting the snapshot.",
+    )
+    data_store_compact_threshold: int = Field(
+        default_factory=lambda: int(os.getenv("DATA_STORE_COMPACT_THRESHOLD", "1000")),
+        description="Journal records written before a background compaction is triggered.",
+    )
+    data_store_snapshot_format: str = Field(
+        default_factory=lambda: os.getenv("DATA_STORE_SNAPSHOT_FORMAT", "json").strip().lower() or "json",
+        description="'json' checkpoints to db.json; 'binary' to a faster-loading versioned pickle beside it.",
+    )
     supported_plants: List[str] = Field(
         default_factory=lambda: [
             plant.strip() for plant in os.getenv("PLANTS", "P1,P2,BK").split(",") if plant.strip()
@@ -119,6 +209,46 @@ class Settings(BaseModel):
             settings.sla_hours_normal = 72
         if settings.sla_hours_urgent <= 0:
             settings.sla_hours_urgent = 24
+        if settings.data_store_compact_threshold <= 0:
+            settings.data_store_compact_threshold = 1000
+        if settings.data_store_snapshot_format not in {"json", "binary"}:
+            settings.data_store_snapshot_format = "json"
+        if settings.groq_max_concurrency <= 0:
+            settings.groq_max_concurrency = 4
+        if settings.groq_timeout_seconds <= 0:
+            settings.groq_timeout_seconds = 30.0
+        if settings.llm_cache_max_entries <= 0:
+            settings.llm_cache_max_entries = 5000
+        if settings.llm_cache_ttl_seconds <= 0:
+            settings.llm_cache_ttl_seconds = 7 * 24 * 3600
+        if settings.analysis_job_concurrency <= 0:
+            settings.analysis_job_concurrency = 2
+        if settings.analysis_job_batch_size <= 0:
+            settings.analysis_job_batch_size = 20
+        if settings.analysis_job_max_attempts <= 0:
+            settings.analysis_job_max_attempts = 3
+        if settings.similarity_dimensions <= 0:
+            settings.similarity_dimensions = 1024
+        if settings.similarity_rerank_candidates < 0:
+            settings.similarity_rerank_candidates = 0
+        if settings.notification_keepalive_seconds <= 0:
+            settings.notification_keepalive_seconds = 15.0
+        if settings.attachment_gc_interval_hours <= 0:
+            settings.attachment_gc_interval_hours = 24.0
+        if settings.smtp_pool_size <= 0:
+            settings.smtp_pool_size = 2
+        if settings.email_retry_interval_seconds <= 0:
+            settings.email_retry_interval_seconds = 60.0
+        if settings.auth_token_mode not in {"opaque", "jwt"}:
+            settings.auth_token_mode = "opaque"
+        if settings.auth_max_tokens <= 0:
+            settings.auth_max_tokens = 50000
+        if settings.password_hash_workers <= 0:
+            settings.password_hash_workers = min(4, os.cpu_count() or 1)
+        if settings.password_hash_max_pending <= 0:
+            settings.password_hash_max_pending = 32
+        if settings.auth_principal_cache_seconds < 0:
+            settings.auth_principal_cache_seconds = 30.0
         if ":" not in settings.report_time:
             settings.report_time = "08:00"
         overrides: Dict[str, List[str]] = {}
@@ -1,13 +1,22 @@
 from __future__ import annotations
 
+import gc
 import json
+import logging
+import os
+import time
+from collections import defaultdict
+from contextlib import contextmanager
 from datetime import datetime, timedelta
-from threading import Lock
-from typing import Dict, List, Optional
+from pathlib import Path
+from threading import Event, Lock, RLock, Thread
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Set, TextIO, Tuple, Union, cast
 
-from pydantic import EmailStr
+from pydantic import BaseModel, EmailStr
 
+from .blobstore import BlobStore
 from .config import settings
+from .indexes import FieldIndex, GroupIndex, SortedIndex
 from .models import (
     Attachment,
     AuditLog,
@@ -16,31 +25,125 @@ from .models import (
     ComplaintKind,
     ComplaintStatus,
     Notification,
+    PRIORITY_WEIGHT,
     Priority,
     Report,
     ReportPeriod,
     Reply,
     Role,
+    STATUS_WEIGHT,
 )
-from .security import hash_password
+from .services.passwords import hash_fingerprint, password_hasher
+from .snapshots import construct_model, read_snapshot, write_snapshot
 
+logger = logging.getLogger(__name__)
+
+# Sort options served by a maintained ``SortedIndex`` over complaints.
+_COMPLAINT_SORT_VIEWS = {
+    "created_at": "created_at",
+    "priority": "priority_order",
+    "status": "status_order",
+}
+
+ChangeListener = Callable[[Optional[Any], Optional[Any]], None]
+
+# Pydantic model used to rebuild records of each persisted bucket. Users are
+# stored as plain dicts and handled separately.
+_BUCKET_MODELS: Dict[str, type[BaseModel]] = {
+    "complaints": Complaint,
+    "attachments": Attachment,
+    "replies": Reply,
+    "categories": Category,
+    "audit_logs": AuditLog,
+    "reports": Report,
+    "notifications": Notification,
+}
 
-class InMemoryDB:
-    """Thread-safe in-memory persistence for demo and testing."""
 
-    def __init__(self) -> None:
-        self._lock = Lock()
+class InMemoryDB:
+    """Thread-safe in-memory persistence for demo and testing.
+
+    State is persisted as a JSON snapshot (``db.json``) plus, when journaling is
+    enabled, a series of append-only journal segments next to it. Every mutation
+    appends one compact record to the active segment, so write cost does not
+    grow with the dataset. Once enough records accumulate the segments are
+    folded back into the snapshot by a background compaction.
+
+    With ``DATA_STORE_SNAPSHOT_FORMAT=binary`` the snapshot is written to a
+    versioned pickle next to ``db.json`` instead (see ``app.snapshots``).
+    Every snapshot carries a generation number, and writing one retires the
+    file of the other format to ``<name>.bak``. Should both files still be
+    present at load (a restored backup, or a crash between the two steps) the
+    higher generation wins, so the journal is always replayed onto the
+    snapshot it was written against; ``export_json`` still produces the JSON
+    form.
+
+    With ``load=False`` the store starts empty and reads nothing from disk
+    until ``load()`` is called, so the application can bind its port and answer
+    health checks while the snapshot is parsed in the background.
+    """
+
+    def __init__(self, *, load: bool = True) -> None:
+        self._lock = RLock()
         self._storage_path = settings.data_store_path
         self._storage_path.parent.mkdir(parents=True, exist_ok=True)
+        self._binary_snapshot = settings.data_store_snapshot_format == "binary"
+        self._binary_path = self._storage_path.with_name(f"{self._storage_path.stem}.snapshot.pickle")
+        self._generation = 0
+        self.blobs = BlobStore(settings.upload_dir / "blobs")
         self._suppress_persist = False
+        self._journal_enabled = settings.data_store_journal
+        self._journal_handle: Optional[TextIO] = None
+        self._journal_seq = 0
+        self._journal_records = 0
+        self._compacting = False
+        self._compaction_lock = Lock()
+        self._batch_depth = 0
+        self._batch_dirty = False
+        self._loaded = Event()
+        self._listeners: Dict[str, List[ChangeListener]] = defaultdict(list)
+        self._replay_listeners: Dict[str, List[ChangeListener]] = defaultdict(list)
         self._initialize_empty()
-        if self._storage_path.exists() and self._storage_path.stat().st_size > 0:
-            self._load_state()
-        else:
-            self._suppress_persist = True
-            self._seed_defaults()
-            self._suppress_persist = False
-            self._persist()
+        if load:
+            self.load()
+
+    @property
+    def loaded(self) -> bool:
+        return self._loaded.is_set()
+
+    def wait_loaded(self, timeout: Optional[float] = None) -> bool:
+        return self._loaded.wait(timeout)
+
+    def load(self) -> None:
+        """Read the snapshot and journal (or seed defaults); later calls are no-ops.
+
+        Listeners registered before loading do not see the records read from
+        disk as individual creations, matching registration after load; those
+        registered with ``replay`` are handed every loaded record instead.
+        """
+        with self._lock:
+            if self._loaded.is_set():
+                return
+            listeners, self._listeners = self._listeners, defaultdict(list)
+            try:
+                sources = self._snapshot_files()
+                if sources:
+                    self._load_state(sources)
+                    self._open_journal()
+                else:
+                    self._suppress_persist = True
+                    self._seed_defaults()
+                    self._suppress_persist = False
+                    self._persist()
+            finally:
+                self._listeners = listeners
+            for bucket, callbacks in self._replay_listeners.items():
+                records = list(self._bucket(bucket).values())
+                for callback in callbacks:
+                    for record in records:
+                        callback(None, record)
+            self._replay_listeners.clear()
+            self._loaded.set()
 
     def _initialize_empty(self) -> None:
         self._counters: Dict[str, int] = {
@@ -61,65 +164,427 @@ class InMemoryDB:
         self.audit_logs: Dict[int, AuditLog] = {}
         self.reports: Dict[int, Report] = {}
         self.notifications: Dict[int, 'Notification'] = {}
+        # Secondary indexes, kept in step with the collections by ``_record``.
+        self._indexes: Dict[str, Dict[str, Union[FieldIndex, SortedIndex, GroupIndex]]] = {
+            "users": {
+                "username": FieldIndex(lambda u: u["username"]),
+                "email": FieldIndex(lambda u: str(u["email"]).lower()),
+                "department": FieldIndex(lambda u: u.get("department")),
+            },
+            "complaints": {
+                "category": FieldIndex(lambda c: c.category),
+                "plant": FieldIndex(lambda c: c.plant),
+                "status": FieldIndex(lambda c: c.status),
+                "priority": FieldIndex(lambda c: c.priority),
+                "kind": FieldIndex(lambda c: c.kind),
+                "assigned_to": FieldIndex(lambda c: c.assigned_to),
+                "created_at": SortedIndex(lambda c: c.created_at),
+                "priority_order": SortedIndex(
+                    lambda c: (PRIORITY_WEIGHT.get(c.priority.value, 0), c.created_at)
+                ),
+                "status_order": SortedIndex(
+                    lambda c: (STATUS_WEIGHT.get(c.status.value, 0), c.created_at)
+                ),
+            },
+            "replies": {
+                "complaint_id": FieldIndex(lambda r: r.complaint_id),
+            },
+            "attachments": {
+                "complaint_id": FieldIndex(lambda a: a.complaint_id),
+                "reply_id": FieldIndex(lambda a: a.reply_id),
+                # Reference counts for the content-addressed blob store.
+                "sha256": FieldIndex(lambda a: a.sha256),
+            },
+            "notifications": {
+                # Ids are allocated in creation order, so id order is time order.
+                "user_id": GroupIndex(lambda n: n.user_id, lambda n: not n.is_read),
+            },
+        }
+
+    def _bucket(self, name: str) -> Dict[int, object]:
+        return getattr(self, name)
+
+    def _serialize_record(self, bucket: str, record: object) -> dict:
+        if bucket == "users":
+            return self._serialize_user(record)  # type: ignore[arg-type]
+        return record.model_dump(mode="json")  # type: ignore[union-attr]
+
+    def _deserialize_record(self, bucket: str, data: dict) -> object:
+        if bucket == "users":
+            return self._deserialize_user(data)
+        return _BUCKET_MODELS[bucket](**data)
+
+    def _dump_record(self, bucket: str, record: object) -> dict:
+        """Field dict for the binary snapshot; unlike JSON it keeps native types."""
+        if bucket == "users":
+            return dict(record)  # type: ignore[call-overload]
+        return record.model_dump()  # type: ignore[union-attr]
+
+    def _construct_record(self, bucket: str, data: dict) -> object:
+        if bucket == "users":
+            return data
+        return construct_model(_BUCKET_MODELS[bucket], data)
+
+    @property
+    def _active_snapshot_path(self) -> Path:
+        return self._binary_path if self._binary_snapshot else self._storage_path
+
+    def _snapshot_files(self) -> List[Path]:
+        return [
+            path
+            for path in (self._storage_path, self._binary_path)
+            if path.exists() and path.stat().st_size > 0
+        ]
 
-    def _load_state(self) -> None:
-        with self._storage_path.open("r", encoding="utf-8") as handle:
+    def _retire_snapshot(self, path: Path) -> None:
+        """Move a snapshot that is no longer current out of the way of future loads."""
+        if path.exists():
+            backup = path.with_name(path.name + ".bak")
+            os.replace(path, backup)
+            logger.info("Retired superseded snapshot %s to %s", path.name, backup.name)
+
+    def _load_state(self, sources: List[Path]) -> None:
+        # Loading allocates a container per field value. Left on, the cyclic
+        # collector would rescan the growing heap again and again and find
+        # nothing to free; once loaded, the records are moved out of its
+        # view for good since they live as long as the process.
+        gc_enabled = gc.isenabled()
+        gc.disable()
+        try:
+            self._read_snapshot(sources)
+            if self._journal_enabled:
+                self._replay_journal()
+            self._rebuild_indexes()
+            gc.freeze()
+        finally:
+            if gc_enabled:
+                gc.enable()
+
+    def _read_payload(self, source: Path) -> Tuple[int, Dict[str, int], Dict[str, Any]]:
+        if source == self._binary_path:
+            return read_snapshot(source)
+        with source.open("r", encoding="utf-8") as handle:
             payload = json.load(handle)
+        return payload.get("generation", 0), payload.get("counters", {}), payload
+
+    def _read_snapshot(self, sources: List[Path]) -> None:
+        started = time.perf_counter()
+        snapshots = {source: self._read_payload(source) for source in sources}
+        # Highest generation wins; on a tie, the file of the configured format.
+        source = max(snapshots, key=lambda path: (snapshots[path][0], path == self._active_snapshot_path))
+        for other in snapshots:
+            if other != source:
+                logger.warning(
+                    "Found both %s (generation %s) and %s (generation %s); loading %s",
+                    source.name,
+                    snapshots[source][0],
+                    other.name,
+                    snapshots[other][0],
+                    source.name,
+                )
+                self._retire_snapshot(other)
+        self._generation, counters, payload = snapshots.pop(source)
+        snapshots.clear()  # free the superseded payload before records are built
+        build = self._construct_record if source == self._binary_path else self._deserialize_record
 
-        counters = payload.get("counters", {})
         for key in self._counters.keys():
             if key in counters:
                 self._counters[key] = counters[key]
 
-        for user_data in payload.get("users", []):
-            user = self._deserialize_user(user_data)
-            self.users[user["id"]] = user
-
-        for complaint_data in payload.get("complaints", []):
-            complaint = Complaint(**complaint_data)
-            self.complaints[complaint.id] = complaint
-
-        for attachment_data in payload.get("attachments", []):
-            attachment = Attachment(**attachment_data)
-            self.attachments[attachment.id] = attachment
-
-        for reply_data in payload.get("replies", []):
-            reply = Reply(**reply_data)
-            self.replies[reply.id] = reply
-
-        for category_data in payload.get("categories", []):
-            category = Category(**category_data)
-            self.categories[category.id] = category
+        for bucket in self._counters.keys():
+            records = self._bucket(bucket)
+            for data in payload.get(bucket, []):
+                record = build(bucket, data)
+                records[data["id"]] = record
+        logger.info(
+            "Loaded %s snapshot %s in %.1f ms",
+            "binary" if source == self._binary_path else "JSON",
+            source.name,
+            (time.perf_counter() - started) * 1000,
+        )
 
-        for log_data in payload.get("audit_logs", []):
-            log = AuditLog(**log_data)
-            self.audit_logs[log.id] = log
+    # Indexes ---------------------------------------------------------------
+    def _reindex(self, bucket: str, record_id: int) -> None:
+        indexes = self._indexes.get(bucket)
+        if not indexes:
+            return
+        record = self._bucket(bucket).get(record_id)
+        for index in indexes.values():
+            index.update(record_id, record)
+
+    def _rebuild_indexes(self) -> None:
+        for bucket, indexes in self._indexes.items():
+            records = self._bucket(bucket)
+            for index in indexes.values():
+                index.rebuild(records.items())
+
+    def _field_index(self, bucket: str, field: str) -> Optional[FieldIndex]:
+        index = self._indexes.get(bucket, {}).get(field)
+        return index if isinstance(index, FieldIndex) else None
+
+    def _lookup(self, bucket: str, field: str, value: Any) -> Set[int]:
+        index = self._field_index(bucket, field)
+        if index is None:
+            raise KeyError(f"No field index for {bucket}.{field}")
+        return set(index.lookup(value))
+
+    # Journal ---------------------------------------------------------------
+    def _journal_segments(self) -> List[Path]:
+        stem = self._storage_path.stem
+        segments = []
+        for path in self._storage_path.parent.glob(f"{stem}.*.journal"):
+            seq = path.name[len(stem) + 1 : -len(".journal")]
+            if seq.isdigit():
+                segments.append((int(seq), path))
+        return [path for _, path in sorted(segments)]
+
+    def _segment_path(self, seq: int) -> Path:
+        return self._storage_path.with_name(f"{self._storage_path.stem}.{seq:06d}.journal")
+
+    def _replay_journal(self) -> None:
+        replayed = 0
+        for path in self._journal_segments():
+            seq = int(path.name[len(self._storage_path.stem) + 1 : -len(".journal")])
+            self._journal_seq = max(self._journal_seq, seq)
+            with path.open("r", encoding="utf-8") as handle:
+                for line in handle:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        # A torn trailing write from a crash; everything before it is intact.
+                        logger.warning("Skipping corrupt journal record in %s", path.name)
+                        continue
+                    self._apply_journal_entry(entry)
+                    replayed += 1
+        self._journal_records = replayed
+        if replayed:
+            logger.info("Replayed %s journal record(s) on top of snapshot", replayed)
+
+    def _apply_journal_entry(self, entry: dict) -> None:
+        bucket = entry.get("b")
+        record_id = entry.get("id")
+        if bucket not in self._counters or record_id is None:
+            return
+        records = self._bucket(bucket)
+        if entry.get("op") == "del":
+            records.pop(record_id, None)
+            return
+        records[record_id] = self._deserialize_record(bucket, entry["data"])
+        if record_id > self._counters[bucket]:
+            self._counters[bucket] = record_id
 
-        for report_data in payload.get("reports", []):
-            report = Report(**report_data)
-            self.reports[report.id] = report
+    def _open_journal(self) -> None:
+        if not self._journal_enabled:
+            return
+        with self._lock:
+            if self._journal_handle is not None:
+                self._journal_handle.close()
+            self._journal_seq += 1
+            self._journal_handle = self._segment_path(self._journal_seq).open("a", encoding="utf-8")
+
+    # Mutation plumbing -----------------------------------------------------
+    def add_listener(self, bucket: str, callback: ChangeListener, *, replay: bool = False) -> None:
+        """Register ``callback(previous, current)`` for changes to ``bucket``.
+
+        Listeners run synchronously under the datastore lock, so they must be
+        cheap and must not block; ``previous``/``current`` are ``None`` for
+        creations and removals respectively. With ``replay`` every existing
+        record is first delivered as a creation, atomically with registration
+        (or with ``load()``, if the store has not been loaded yet).
+        """
+        with self._lock:
+            if replay and not self._loaded.is_set():
+                self._replay_listeners[bucket].append(callback)
+            elif replay:
+                for record in list(self._bucket(bucket).values()):
+                    callback(None, record)
+            self._listeners[bucket].append(callback)
+
+    def _emit(self, bucket: str, previous: Optional[object], current: Optional[object]) -> None:
+        for callback in self._listeners.get(bucket, ()):
+            try:
+                callback(previous, current)
+            except Exception:  # pragma: no cover - listeners must not break writes
+                logger.exception("Datastore listener failed for %s", bucket)
+
+    def _store(self, bucket: str, record_id: int, record: object) -> None:
+        """Insert or replace one record, then re-index, persist and notify."""
+        with self._lock:
+            records = self._bucket(bucket)
+            previous = records.get(record_id)
+            records[record_id] = record
+            self._record(bucket, record_id)
+            self._emit(bucket, previous, record)
+
+    def _remove(self, bucket: str, record_id: int) -> Optional[Any]:
+        """Remove one record if present and return it."""
+        with self._lock:
+            previous = self._bucket(bucket).pop(record_id, None)
+            if previous is None:
+                return None
+            self._record(bucket, record_id)
+            self._emit(bucket, previous, None)
+            return previous
+
+    def _record(self, bucket: str, record_id: int) -> None:
+        """Re-index and persist the current state of one record (or its removal)."""
+        with self._lock:
+            self._reindex(bucket, record_id)
+        if self._suppress_persist:
+            return
+        if not self._journal_enabled:
+            if self._batch_depth:
+                self._batch_dirty = True
+            else:
+                self._persist()
+            return
+        with self._lock:
+            record = self._bucket(bucket).get(record_id)
+            if record is None:
+                entry = {"op": "del", "b": bucket, "id": record_id}
+            else:
+                entry = {
+                    "op": "put",
+                    "b": bucket,
+                    "id": record_id,
+                    "data": self._serialize_record(bucket, record),
+                }
+            if self._journal_handle is None:
+                self._open_journal()
+            assert self._journal_handle is not None
+            self._journal_handle.write(json.dumps(entry, separators=(",", ":"), default=str) + "\n")
+            if self._batch_depth:
+                self._batch_dirty = True
+            else:
+                self._journal_handle.flush()
+            self._journal_records += 1
+            due = (
+                self._journal_records >= settings.data_store_compact_threshold
+                and not self._compacting
+            )
+            if due:
+                self._compacting = True
+        if due:
+            Thread(target=self._compact_in_background, name="db-compaction", daemon=True).start()
 
-        for notif_data in payload.get("notifications", []):
-            notif = Notification(**notif_data)
-            self.notifications[notif.id] = notif
+    def _compact_in_background(self) -> None:
+        try:
+            self.compact()
+        except Exception:  # pragma: no cover - best effort background task
+            logger.exception("Datastore compaction failed")
+        finally:
+            self._compacting = False
+
+    def compact(self) -> None:
+        """Fold sealed journal segments into a fresh snapshot.
+
+        The active segment is sealed and a new one opened while holding the
+        lock; serialization and the snapshot write happen outside it so
+        writers are only blocked for the shallow copy.
+        """
+        if not self._journal_enabled:
+            return
+        with self._compaction_lock:
+            with self._lock:
+                sealed = self._journal_segments()
+                self._open_journal()
+                self._journal_records = 0
+                counters = dict(self._counters)
+                buckets = {bucket: list(self._bucket(bucket).values()) for bucket in counters}
+                self._generation += 1
+                generation = self._generation
+            self._write_snapshot(generation, counters, buckets)
+            for path in sealed:
+                path.unlink(missing_ok=True)
+
+    def _write_snapshot(self, generation: int, counters: Dict[str, int], buckets: Dict[str, List[object]]) -> None:
+        if self._binary_snapshot:
+            dumped = {
+                bucket: [self._dump_record(bucket, record) for record in records]
+                for bucket, records in buckets.items()
+            }
+            write_snapshot(self._binary_path, generation, counters, dumped)
+            self._retire_snapshot(self._storage_path)
+        else:
+            self._write_json(self._storage_path, generation, counters, buckets)
+            self._retire_snapshot(self._binary_path)
+
+    def _write_json(
+        self, path: Path, generation: int, counters: Dict[str, int], buckets: Dict[str, List[object]]
+    ) -> None:
+        state: Dict[str, object] = {"generation": generation, "counters": counters}
+        for bucket, records in buckets.items():
+            state[bucket] = [self._serialize_record(bucket, record) for record in records]
+        tmp_path = path.with_name(path.name + ".tmp")
+        with tmp_path.open("w", encoding="utf-8") as handle:
+            json.dump(state, handle, indent=2)
+        os.replace(tmp_path, path)
+
+    def export_json(self, path: Path) -> Path:
+        """Write the current state to ``path`` in the ``db.json`` format, whatever the snapshot format."""
+        with self._lock:
+            counters = dict(self._counters)
+            buckets = {bucket: list(self._bucket(bucket).values()) for bucket in counters}
+            generation = self._generation
+        self._write_json(path, generation, counters, buckets)
+        return path
 
     def _persist(self) -> None:
+        """Write a full snapshot of every collection and reset the journal."""
         if self._suppress_persist:
             return
         with self._lock:
-            state = {
-                "counters": self._counters,
-                "users": [self._serialize_user(user) for user in self.users.values()],
-                "complaints": [complaint.model_dump(mode="json") for complaint in self.complaints.values()],
-                "attachments": [attachment.model_dump(mode="json") for attachment in self.attachments.values()],
-                "replies": [reply.model_dump(mode="json") for reply in self.replies.values()],
-                "categories": [category.model_dump(mode="json") for category in self.categories.values()],
-                "audit_logs": [log.model_dump(mode="json") for log in self.audit_logs.values()],
-                "reports": [report.model_dump(mode="json") for report in self.reports.values()],
-                "notifications": [notif.model_dump(mode="json") for notif in self.notifications.values()],
-            }
-            with self._storage_path.open("w", encoding="utf-8") as handle:
-                json.dump(state, handle, indent=2)
+            counters = dict(self._counters)
+            buckets = {bucket: list(self._bucket(bucket).values()) for bucket in counters}
+            self._generation += 1
+            self._write_snapshot(self._generation, counters, buckets)
+            if self._journal_enabled:
+                if self._journal_handle is not None:
+                    self._journal_handle.close()
+                    self._journal_handle = None
+                for path in self._journal_segments():
+                    path.unlink(missing_ok=True)
+                self._journal_records = 0
+                self._open_journal()
+
+    @contextmanager
+    def batch(self) -> Iterator[None]:
+        """Group mutations into a single durable write.
+
+        Writers made inside the block hold the datastore lock throughout and
+        only the final journal flush (or snapshot, when journaling is off)
+        touches the disk.
+        """
+        with self._lock:
+            self._batch_depth += 1
+            try:
+                yield
+            finally:
+                self._batch_depth -= 1
+                if self._batch_depth == 0 and self._batch_dirty:
+                    self._batch_dirty = False
+                    if not self._journal_enabled:
+                        self._persist()
+                    elif self._journal_handle is not None:
+                        self._journal_handle.flush()
+
+    def close(self) -> None:
+        """Compact outstanding journal records and release the segment handle."""
+        # An unloaded store holds nothing worth keeping; compacting it would
+        # replace the snapshot on disk with empty collections.
+        if not self._journal_enabled or not self._loaded.is_set():
+            return
+        self.compact()
+        with self._lock:
+            if self._journal_handle is not None:
+                self._journal_handle.close()
+                self._journal_handle = None
+                active = self._segment_path(self._journal_seq)
+                if active.exists() and active.stat().st_size == 0:
+                    active.unlink()
 
     @staticmethod
     def _parse_datetime(value: Optional[str]) -> Optional[datetime]:
@@ -146,79 +611,86 @@ class InMemoryDB:
         return user
 
     def _seed_defaults(self) -> None:
-        self.create_user(
-            username="superadmin",
-            email="super.admin@example.com",
-            password="superadmin123",
-            role=Role.super_admin,
-            department="Executive",
-            plant=None,
-        )
-        admin = self.create_user(
-            username="admin",
-            email="admin@example.com",
-            password="admin123",
-            role=Role.admin,
-            department="IT",
-            plant="P1",
-        )
-        # Seed functional team leads for auto-assignment rules.
-        self.create_user(
-            username="it_lead",
-            email="it.lead@example.com",
-            password="temps3cret",
-            role=Role.admin,
-            department="IT",
-            plant=None,
-        )
-        self.create_user(
-            username="network_specialist",
-            email="network.team@example.com",
-            password="temps3cret",
-            role=Role.admin,
-            department="IT",
-            plant=None,
-        )
-        self.create_user(
-            username="payroll_lead",
-            email="payroll.lead@example.com",
-            password="temps3cret",
-            role=Role.admin,
-            department="Payroll",
-            plant="P1",
-        )
-        self.create_user(
-            username="facilities_lead",
-            email="facilities.lead@example.com",
-            password="temps3cret",
-            role=Role.admin,
-            department="Facilities",
-            plant="P1",
-        )
-        self.create_user(
-            username="service_desk",
-            email="service.desk@example.com",
-            password="temps3cret",
-            role=Role.admin,
-            department="Unclassified",
-            plant=None,
-        )
-        self.create_user(
-            username="operations_manager",
-            email="ops.manager@example.com",
-            password="temps3cret",
-            role=Role.admin,
-            department="Facilities",
-            plant=None,
-        )
-        self.create_user(
-            username="facilities_p2",
-            email="facilities.p2@example.com",
-            password="temps3cret",
-            role=Role.admin,
-            department="Facilities",
-            plant="P2",
-        )
+        seed_users = [
+            dict(
+                username="superadmin",
+                email="super.admin@example.com",
+                password="superadmin123",
+                role=Role.super_admin,
+                department="Executive",
+                plant=None,
+            ),
+            dict(
+                username="admin",
+                email="admin@example.com",
+                password="admin123",
+                role=Role.admin,
+                department="IT",
+                plant="P1",
+            ),
+            # Functional team leads for auto-assignment rules.
+            dict(
+                username="it_lead",
+                email="it.lead@example.com",
+                password="temps3cret",
+                role=Role.admin,
+                department="IT",
+                plant=None,
+            ),
+            dict(
+                username="network_specialist",
+                email="network.team@example.com",
+                password="temps3cret",
+                role=Role.admin,
+                department="IT",
+                plant=None,
+            ),
+            dict(
+                username="payroll_lead",
+                email="payroll.lead@example.com",
+                password="temps3cret",
+                role=Role.admin,
+                department="Payroll",
+                plant="P1",
+            ),
+            dict(
+                username="facilities_lead",
+                email="facilities.lead@example.com",
+                password="temps3cret",
+                role=Role.admin,
+                department="Facilities",
+                plant="P1",
+            ),
+            dict(
+                username="service_desk",
+                email="service.desk@example.com",
+                password="temps3cret",
+                role=Role.admin,
+                department="Unclassified",
+                plant=None,
+            ),
+            dict(
+                username="operations_manager",
+                email="ops.manager@example.com",
+                password="temps3cret",
+                role=Role.admin,
+                department="Facilities",
+                plant=None,
+            ),
+            dict(
+                username="facilities_p2",
+                email="facilities.p2@example.com",
+                password="temps3cret",
+                role=Role.admin,
+                department="Facilities",
+                plant="P2",
+            ),
+        ]
+        # Hash the seed passwords concurrently rather than one bcrypt call at a time.
+        hashes = password_hasher.hash_many([spec["password"] for spec in seed_users])
+        for spec, password_hash in zip(seed_users, hashes):
+            self.create_user(**spec, password_hash=password_hash)
+        admin = self.get_user_by_username("admin")
         default_categories = [
             ("HR", "Human Resources related complaints"),
             ("Payroll", "Salary and payment issues"),
@@ -430,8 +902,10 @@ class InMemoryDB:
             if hours_ago is not None:
                 created_at = datetime.utcnow() - timedelta(hours=hours_ago)
                 existing = self.complaints[complaint.id]
-                self.complaints[complaint.id] = existing.model_copy(
-                    update={"created_at": created_at, "updated_at": created_at}
+                self._store(
+                    "complaints",
+                    complaint.id,
+                    existing.model_copy(update={"created_at": created_at, "updated_at": created_at}),
                 )
 
         # Add a reply to the payroll case and mark as resolved.
@@ -480,13 +954,16 @@ class InMemoryDB:
         plant: Optional[str] = None,
         manager_id: Optional[int] = None,
         initial_password: Optional[str] = None,
+        password_hash: Optional[str] = None,
     ) -> dict:
+        """Create a user; pass ``password_hash`` when ``password`` was already hashed."""
+        password_hash = password_hash or password_hasher.hash(password, admit=False)
         user_id = self._next_id("users")
         user = {
             "id": user_id,
             "username": username,
             "email": email,
-            "password_hash": hash_password(password),
+            "password_hash": password_hash,
             "role": role,
             "department": department,
             "plant": plant,
@@ -495,12 +972,20 @@ class InMemoryDB:
             "created_at": datetime.utcnow(),
             "updated_at": datetime.utcnow(),
         }
-        self.users[user_id] = user
-        self._persist()
+        if not initial_password or initial_password == password:
+            # The hash was just made from the initial password; start-up repair can skip it.
+            user["initial_password_checked"] = hash_fingerprint(password_hash)
+        self._store("users", user_id, user)
         return user
 
     def get_user_by_username(self, username: str) -> Optional[dict]:
-        return next((u for u in self.users.values() if u["username"] == username), None)
+        ids = self._lookup("users", "username", username)
+        return self.users.get(min(ids)) if ids else None
+
+    def get_user_by_email(self, email: str) -> Optional[dict]:
+        """Case-insensitive lookup of a user by email address."""
+        ids = self._lookup("users", "email", email.lower())
+        return self.users.get(min(ids)) if ids else None
 
     def get_user(self, user_id: int) -> Optional[dict]:
         return self.users.get(user_id)
@@ -510,8 +995,7 @@ class InMemoryDB:
         if not user:
             return None
         user = {**user, **updates, "updated_at": datetime.utcnow()}
-        self.users[user_id] = user
-        self._persist()
+        self._store("users", user_id, user)
         return user
 
     def list_users(self, *, role: Optional[Role] = None) -> List[dict]:
@@ -526,16 +1010,16 @@ class InMemoryDB:
     def delete_user(self, user_id: int) -> bool:
         """Delete a user from the system."""
         if user_id in self.users:
-            del self.users[user_id]
-            self._persist()
+            self._remove("users", user_id)
             return True
         return False
 
     def find_admin_for_category(self, category: str, plant: Optional[str]) -> Optional[dict]:
+        department_ids = self._lookup("users", "department", category)
         admins = [
             user
-            for user in self.users.values()
-            if user["role"] == Role.admin and user.get("department") == category
+            for user in (self.users[uid] for uid in department_ids if uid in self.users)
+            if user["role"] == Role.admin
         ]
         if not admins:
             return None
@@ -552,13 +1036,142 @@ class InMemoryDB:
     def list_complaints(self) -> List[Complaint]:
         return list(self.complaints.values())
 
-    def filter_complaints(self, **filters) -> List[Complaint]:
-        data = self.list_complaints()
+    def _complaint_candidates(
+        self,
+        created_from: Optional[datetime],
+        created_to: Optional[datetime],
+        ids: Optional[Iterable[int]],
+        filters: Dict[str, Any],
+    ) -> Tuple[Optional[Set[int]], Dict[str, Any]]:
+        """Narrow complaint ids through the indexes.
+
+        Returns the candidate ids (``None`` meaning every complaint) and the
+        filters on non-indexed fields that still have to be checked per record.
+        """
+        candidates: Optional[Set[int]] = set(ids) if ids is not None else None
+        residual: Dict[str, Any] = {}
         for field, value in filters.items():
             if value is None:
                 continue
-            data = [c for c in data if getattr(c, field) == value]
-        return data
+            index = self._field_index("complaints", field)
+            if index is None:
+                residual[field] = value
+                continue
+            if isinstance(value, (list, tuple, set, frozenset)):
+                matched = index.lookup_any(value)
+            else:
+                matched = index.lookup(value)
+            candidates = set(matched) if candidates is None else candidates & matched
+            if not candidates:
+                return set(), residual
+        if created_from is not None or created_to is not None:
+            created_index = cast(SortedIndex, self._indexes["complaints"]["created_at"])
+            matched = set(created_index.range(created_from, created_to))
+            candidates = matched if candidates is None else candidates & matched
+        return candidates, residual
+
+    @staticmethod
+    def _matches_residual(complaint: Complaint, residual: Dict[str, Any]) -> bool:
+        for field, value in residual.items():
+            actual = getattr(complaint, field)
+            if isinstance(value, (list, tuple, set, frozenset)):
+                if actual not in value:
+                    return False
+            elif actual != value:
+                return False
+        return True
+
+    def filter_complaints(
+        self,
+        *,
+        created_from: Optional[datetime] = None,
+        created_to: Optional[datetime] = None,
+        ids: Optional[Iterable[int]] = None,
+        **filters: Any,
+    ) -> List[Complaint]:
+        """Return complaints matching every non-``None`` filter, ordered by id.
+
+        A filter value may be a list, tuple or set to match any of its members.
+        Indexed fields and the ``created_at`` bounds narrow the candidate set
+        before any record is inspected; remaining fields are checked per record.
+        ``ids`` restricts the result to an already known candidate set.
+        """
+        candidates, residual = self._complaint_candidates(created_from, created_to, ids, filters)
+        if candidates is None:
+            data = self.list_complaints()
+        else:
+            data = [self.complaints[cid] for cid in sorted(candidates) if cid in self.complaints]
+        return [c for c in data if self._matches_residual(c, residual)]
+
+    def _sort_view(self, sort: str) -> SortedIndex:
+        name = _COMPLAINT_SORT_VIEWS.get(sort)
+        if name is None:
+            raise KeyError(f"No sorted view for complaints.{sort}")
+        return cast(SortedIndex, self._indexes["complaints"][name])
+
+    def complaint_sort_key(self, sort: str, complaint_id: int) -> Any:
+        """Key of ``complaint_id`` in the sorted view backing ``sort``."""
+        return self._sort_view(sort).key_of(complaint_id)
+
+    def page_complaints(
+        self,
+        sort: str = "created_at",
+        *,
+        descending: bool = True,
+        after: Optional[Tuple[Any, int]] = None,
+        offset: int = 0,
+        limit: int = 25,
+        created_from: Optional[datetime] = None,
+        created_to: Optional[datetime] = None,
+        ids: Optional[Iterable[int]] = None,
+        **filters: Any,
+    ) -> Tuple[List[Complaint], int]:
+        """Return one page of filtered complaints in ``sort`` order and the total match count.
+
+        Pages are read straight from the maintained sorted view, resuming
+        strictly after the ``(key, id)`` cursor ``after`` when given, so a page
+        costs roughly ``offset + limit`` steps rather than a full sort. When the
+        filters leave only a small candidate set it is ordered directly instead.
+        """
+        with self._lock:
+            candidates, residual = self._complaint_candidates(created_from, created_to, ids, filters)
+            view = self._sort_view(sort)
+            if candidates is not None and len(candidates) * 8 < len(view):
+                keyed = sorted(
+                    ((view.key_of(cid), cid) for cid in candidates if view.key_of(cid) is not None),
+                    reverse=descending,
+                )
+                if after is not None:
+                    keyed = [entry for entry in keyed if (entry < after if descending else entry > after)]
+                ordered: Iterable[int] = (cid for _, cid in keyed)
+            else:
+                ordered = view.iter_from(after, reverse=descending)
+
+            items: List[Complaint] = []
+            skipped = 0
+            for cid in ordered:
+                if candidates is not None and cid not in candidates:
+                    continue
+                complaint = self.complaints.get(cid)
+                if complaint is None or not self._matches_residual(complaint, residual):
+                    continue
+                if skipped < offset:
+                    skipped += 1
+                    continue
+                items.append(complaint)
+                if len(items) >= limit:
+                    break
+
+            if residual:
+                pool = self.complaints.values() if candidates is None else (
+                    self.complaints[cid] for cid in candidates if cid in self.complaints
+                )
+                total = sum(1 for c in pool if self._matches_residual(c, residual))
+            else:
+                total = len(self.complaints) if candidates is None else sum(
+                    1 for cid in candidates if cid in self.complaints
+                )
+            return items, total
 
     def get_complaint(self, complaint_id: int) -> Optional[Complaint]:
         return self.complaints.get(complaint_id)
@@ -586,8 +1199,7 @@ class InMemoryDB:
             category=category or "Unclassified",
             priority=priority or Priority.normal,
         )
-        self.complaints[complaint_id] = complaint
-        self._persist()
+        self._store("complaints", complaint_id, complaint)
         return complaint
 
     def update_complaint(self, complaint_id: int, **updates) -> Optional[Complaint]:
@@ -595,23 +1207,21 @@ class InMemoryDB:
         if not complaint:
             return None
         complaint = complaint.model_copy(update={**updates, "updated_at": datetime.utcnow()})
-        self.complaints[complaint_id] = complaint
-        self._persist()
+        self._store("complaints", complaint_id, complaint)
         return complaint
 
     def delete_complaint(self, complaint_id: int) -> bool:
-        removed = self.complaints.pop(complaint_id, None)
-        related_replies = [rid for rid, r in self.replies.items() if r.complaint_id == complaint_id]
-        for rid in related_replies:
-            self.replies.pop(rid, None)
-        related_attachments = [
-            aid for aid, a in self.attachments.items() if a.complaint_id == complaint_id
-        ]
-        for aid in related_attachments:
-            self.attachments.pop(aid, None)
-        if removed is not None:
-            self._persist()
-        return removed is not None
+        # Held throughout so an upload of the same content cannot reuse a blob
+        # between the refcount check and its release.
+        with self._lock:
+            removed = self._remove("complaints", complaint_id)
+            for rid in sorted(self._lookup("replies", "complaint_id", complaint_id)):
+                self._remove("replies", rid)
+            for aid in sorted(self._lookup("attachments", "complaint_id", complaint_id)):
+                attachment = self._remove("attachments", aid)
+                if attachment:
+                    self._release_attachment_file(attachment)
+            return removed is not None
 
     # Attachments -----------------------------------------------------------
     def create_attachment(
@@ -622,41 +1232,74 @@ class InMemoryDB:
         file_type: str,
         file_size: int,
         reply_id: Optional[int] = None,
+        sha256: Optional[str] = None,
     ) -> Attachment:
-        attachment_id = self._next_id("attachments")
-        attachment = Attachment(
-            id=attachment_id,
-            complaint_id=complaint_id,
-            reply_id=reply_id,
-            file_name=file_name,
-            file_path=file_path,
-            file_type=file_type,
-            file_size=file_size,
-        )
-        self.attachments[attachment_id] = attachment
-        complaint = self.complaints.get(complaint_id)
-        if complaint:
-            updated_ids = complaint.attachment_ids + [attachment_id]
-            self.complaints[complaint_id] = complaint.model_copy(update={"attachment_ids": updated_ids})
-        self._persist()
-        return attachment
+        """Record an attachment.
+
+        With ``sha256`` the file at ``file_path`` is moved into the
+        content-addressed blob store (or dropped if identical content is
+        already stored) and the attachment points at the shared blob.
+        """
+        with self._lock:
+            if sha256:
+                file_path = str(self.blobs.ingest(Path(file_path), sha256))
+            attachment_id = self._next_id("attachments")
+            attachment = Attachment(
+                id=attachment_id,
+                complaint_id=complaint_id,
+                reply_id=reply_id,
+                file_name=file_name,
+                file_path=file_path,
+                file_type=file_type,
+                file_size=file_size,
+                sha256=sha256,
+            )
+            self._store("attachments", attachment_id, attachment)
+            complaint = self.complaints.get(complaint_id)
+            if complaint:
+                updated_ids = complaint.attachment_ids + [attachment_id]
+                self._store("complaints", complaint_id, complaint.model_copy(update={"attachment_ids": updated_ids}))
+            return attachment
 
     def get_attachment(self, attachment_id: int) -> Optional[Attachment]:
         return self.attachments.get(attachment_id)
 
     def list_attachments_for_reply(self, reply_id: int) -> List[Attachment]:
-        return [attachment for attachment in self.attachments.values() if attachment.reply_id == reply_id]
+        ids = self._lookup("attachments", "reply_id", reply_id)
+        return [self.attachments[aid] for aid in sorted(ids) if aid in self.attachments]
+
+    def attachment_refcount(self, sha256: str) -> int:
+        index = self._field_index("attachments", "sha256")
+        return index.count(sha256) if index else 0
+
+    def _release_attachment_file(self, attachment: Attachment) -> None:
+        """Delete the bytes behind a removed attachment once nothing references them."""
+        if attachment.sha256:
+            if self.attachment_refcount(attachment.sha256) == 0:
+                self.blobs.release(attachment.sha256)
+            return
+        try:
+            Path(attachment.file_path).unlink(missing_ok=True)
+        except OSError:
+            pass
+
+    def sweep_attachment_blobs(self, grace_seconds: float = 3600.0) -> Dict[str, int]:
+        """Remove stored blobs that no attachment references any more."""
+        with self._lock:
+            index = self._field_index("attachments", "sha256")
+            referenced = {key for key in (index.keys() if index else []) if key}
+            return self.blobs.sweep(referenced, grace_seconds=grace_seconds)
 
     def delete_attachment(self, attachment_id: int) -> bool:
-        attachment = self.attachments.pop(attachment_id, None)
-        if attachment:
-            complaint = self.complaints.get(attachment.complaint_id)
-            if complaint:
-                updated_ids = [aid for aid in complaint.attachment_ids if aid != attachment_id]
-                self.complaints[complaint.id] = complaint.model_copy(update={"attachment_ids": updated_ids})
-        if attachment is not None:
-            self._persist()
-        return attachment is not None
+        with self._lock:
+            attachment = self._remove("attachments", attachment_id)
+            if attachment:
+                self._release_attachment_file(attachment)
+                complaint = self.complaints.get(attachment.complaint_id)
+                if complaint:
+                    updated_ids = [aid for aid in complaint.attachment_ids if aid != attachment_id]
+                    self._store("complaints", complaint.id, complaint.model_copy(update={"attachment_ids": updated_ids}))
+            return attachment is not None
 
     # Replies ---------------------------------------------------------------
     def create_reply(
@@ -676,18 +1319,22 @@ class InMemoryDB:
             email_sent=email_sent,
             email_sent_at=email_sent_at,
         )
-        self.replies[reply_id] = reply
+        self._store("replies", reply_id, reply)
         # Set first_response_at on the complaint if this is the first reply
         complaint = self.complaints.get(complaint_id)
         if complaint and not getattr(complaint, "first_response_at", None):
-            self.complaints[complaint_id] = complaint.model_copy(
-                update={"first_response_at": reply.created_at, "updated_at": datetime.utcnow()}
+            self._store(
+                "complaints",
+                complaint_id,
+                complaint.model_copy(
+                    update={"first_response_at": reply.created_at, "updated_at": datetime.utcnow()}
+                ),
             )
-        self._persist()
         return reply
 
     def list_replies_for_complaint(self, complaint_id: int) -> List[Reply]:
-        return [reply for reply in self.replies.values() if reply.complaint_id == complaint_id]
+        ids = self._lookup("replies", "complaint_id", complaint_id)
+        return [self.replies[rid] for rid in sorted(ids) if rid in self.replies]
 
     def get_reply(self, reply_id: int) -> Optional[Reply]:
         return self.replies.get(reply_id)
@@ -697,43 +1344,51 @@ class InMemoryDB:
         if not reply:
             return None
         reply = reply.model_copy(update=updates)
-        self.replies[reply_id] = reply
-        self._persist()
+        self._store("replies", reply_id, reply)
         return reply
 
     def delete_reply(self, reply_id: int) -> bool:
-        reply = self.replies.pop(reply_id, None)
-        if not reply:
-            return False
-        attachments = [aid for aid, a in self.attachments.items() if a.reply_id == reply_id]
-        for aid in attachments:
-            attachment = self.attachments.pop(aid, None)
-            if attachment:
-                complaint = self.complaints.get(attachment.complaint_id)
-                if complaint:
-                    updated_ids = [rid for rid in complaint.attachment_ids if rid != attachment.id]
-                    self.complaints[complaint.id] = complaint.model_copy(
-                        update={"attachment_ids": updated_ids}
-                    )
-        self._persist()
-        return True
+        with self._lock:
+            reply = self._remove("replies", reply_id)
+            if not reply:
+                return False
+            attachments = sorted(self._lookup("attachments", "reply_id", reply_id))
+            for aid in attachments:
+                attachment = self._remove("attachments", aid)
+                if attachment:
+                    self._release_attachment_file(attachment)
+                    complaint = self.complaints.get(attachment.complaint_id)
+                    if complaint:
+                        updated_ids = [rid for rid in complaint.attachment_ids if rid != attachment.id]
+                        self._store(
+                            "complaints",
+                            complaint.id,
+                            complaint.model_copy(update={"attachment_ids": updated_ids}),
+                        )
+            return True
 
     # Categories ------------------------------------------------------------
     def create_category(self, name: str, description: Optional[str]) -> Category:
         category_id = self._next_id("categories")
         category = Category(id=category_id, name=name, description=description)
-        self.categories[category_id] = category
-        self._persist()
+        self._store("categories", category_id, category)
         return category
 
     def get_categories(self) -> List[Category]:
         return list(self.categories.values())
+
+    def update_category(self, category_id: int, **updates) -> Optional[Category]:
+        category = self.categories.get(category_id)
+        if not category:
+            return None
+        updated = category.model_copy(update=updates)
+        self._store("categories", category_id, updated)
+        return updated
     
     def delete_category(self, category_id: int) -> bool:
         """Delete a category by ID. Returns True if deleted, False if not found."""
         if category_id in self.categories:
-            del self.categories[category_id]
-            self._persist()
+            self._remove("categories", category_id)
             return True
         return False
     
@@ -765,8 +1420,7 @@ class InMemoryDB:
             details=details or {},
             ip_address=ip_address,
         )
-        self.audit_logs[log_id] = log
-        self._persist()
+        self._store("audit_logs", log_id, log)
         return log
 
     # Reports ---------------------------------------------------------------
@@ -794,8 +1448,7 @@ class InMemoryDB:
             download_url=download_url,
             metadata=metadata or {},
         )
-        self.reports[report_id] = report
-        self._persist()
+        self._store("reports", report_id, report)
         return report
 
     def get_report(self, report_id: int) -> Optional[Report]:
@@ -824,14 +1477,12 @@ class InMemoryDB:
         if not report:
             return None
         updated = report.model_copy(update=updates)
-        self.reports[report_id] = updated
-        self._persist()
+        self._store("reports", report_id, updated)
         return updated
 
     def delete_report(self, report_id: int) -> bool:
         if report_id in self.reports:
-            del self.reports[report_id]
-            self._persist()
+            self._remove("reports", report_id)
             return True
         return False
 
@@ -856,8 +1507,7 @@ class InMemoryDB:
                 is_read=False,
                 created_at=datetime.utcnow(),
             )
-            self.notifications[notif.id] = notif
-            self._persist()
+            self._store("notifications", notif.id, notif)
             return notif
 
     def get_notification(self, notif_id: int) -> Optional[Notification]:
@@ -867,16 +1517,50 @@ class InMemoryDB:
         self,
         user_id: Optional[int] = None,
         is_read: Optional[bool] = None,
-        limit: int = 50
+        limit: int = 50,
+        after_id: Optional[int] = None,
     ) -> List[Notification]:
-        notifs = list(self.notifications.values())
         if user_id is not None:
-            notifs = [n for n in notifs if n.user_id == user_id]
+            return self._list_user_notifications(user_id, is_read, limit, after_id)
+        notifs = list(self.notifications.values())
+        if after_id is not None:
+            notifs = [n for n in notifs if n.id > after_id]
         if is_read is not None:
             notifs = [n for n in notifs if n.is_read == is_read]
         notifs = sorted(notifs, key=lambda n: n.created_at, reverse=True)
         return notifs[:limit]
 
+    def _notification_index(self) -> GroupIndex:
+        return cast(GroupIndex, self._indexes["notifications"]["user_id"])
+
+    def _list_user_notifications(
+        self,
+        user_id: int,
+        is_read: Optional[bool],
+        limit: int,
+        after_id: Optional[int],
+    ) -> List[Notification]:
+        """Newest first, walking only ``user_id``'s notifications."""
+        with self._lock:
+            index = self._notification_index()
+            if is_read is False:
+                unread = sorted(index.flagged(user_id), reverse=True)
+                ids: Iterable[int] = (i for i in unread if after_id is None or i > after_id)
+            else:
+                ids = index.iter_group(user_id, after=after_id, reverse=True)
+            notifs: List[Notification] = []
+            for notif_id in ids:
+                notif = self.notifications[notif_id]
+                if is_read is not None and notif.is_read != is_read:
+                    continue
+                notifs.append(notif)
+                if len(notifs) >= limit:
+                    break
+            return notifs
+
+    def count_unread_notifications(self, user_id: int) -> int:
+        return self._notification_index().flagged_count(user_id)
+
     def mark_notification_read(self, notif_id: int) -> Optional[Notification]:
         notif = self.notifications.get(notif_id)
         if not notif:
@@ -886,31 +1570,29 @@ class InMemoryDB:
                 "is_read": True,
                 "read_at": datetime.utcnow()
             })
-            self.notifications[notif_id] = updated
-            self._persist()
+            self._store("notifications", notif_id, updated)
             return updated
         return notif
 
     def mark_all_notifications_read(self, user_id: int) -> int:
         count = 0
-        for notif in self.notifications.values():
-            if notif.user_id == user_id and not notif.is_read:
+        with self.batch():
+            for notif_id in sorted(self._notification_index().flagged(user_id)):
+                notif = self.notifications[notif_id]
                 updated = notif.model_copy(update={
                     "is_read": True,
                     "read_at": datetime.utcnow()
                 })
-                self.notifications[notif.id] = updated
+                self._store("notifications", notif.id, updated)
                 count += 1
-        if count > 0:
-            self._persist()
         return count
 
     def delete_notification(self, notif_id: int) -> bool:
         if notif_id in self.notifications:
-            del self.notifications[notif_id]
-            self._persist()
+            self._remove("notifications", notif_id)
             return True
         return False
 
 
-db = InMemoryDB()
+# Loaded by the start-up pipeline in ``app.main`` (see ``app.startup``).
+db = InMemoryDB(load=False)
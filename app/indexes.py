@@ -0,0 +1,200 @@
+from __future__ import annotations
+
+from bisect import bisect_left, bisect_right, insort
+from collections import defaultdict
+from enum import Enum
+from typing import Any, Callable, Dict, Hashable, Iterable, Iterator, List, Optional, Set, Tuple
+
+_MISSING = object()
+
+
+def index_key(value: Any) -> Hashable:
+    """Normalise a field value so enum members and their raw values share a key."""
+    if isinstance(value, Enum):
+        return value.value
+    return value
+
+
+class FieldIndex:
+    """Maps each value of a single field to the ids of the records holding it."""
+
+    def __init__(self, getter: Callable[[Any], Any]) -> None:
+        self._getter = getter
+        self._ids: Dict[Hashable, Set[int]] = defaultdict(set)
+        self._keys: Dict[int, Hashable] = {}
+
+    def update(self, record_id: int, record: Optional[Any]) -> None:
+        """Re-index one record; ``None`` removes it."""
+        previous = self._keys.pop(record_id, _MISSING)
+        if previous is not _MISSING:
+            ids = self._ids.get(previous)
+            if ids is not None:
+                ids.discard(record_id)
+                if not ids:
+                    del self._ids[previous]
+        if record is None:
+            return
+        key = index_key(self._getter(record))
+        self._keys[record_id] = key
+        self._ids[key].add(record_id)
+
+    def lookup(self, value: Any) -> Set[int]:
+        return self._ids.get(index_key(value), set())
+
+    def lookup_any(self, values: Iterable[Any]) -> Set[int]:
+        matched: Set[int] = set()
+        for value in values:
+            matched |= self.lookup(value)
+        return matched
+
+    def count(self, value: Any) -> int:
+        return len(self._ids.get(index_key(value), ()))
+
+    def keys(self) -> List[Hashable]:
+        return list(self._ids.keys())
+
+    def rebuild(self, records: Iterable[Tuple[int, Any]]) -> None:
+        self.clear()
+        for record_id, record in records:
+            key = index_key(self._getter(record))
+            self._keys[record_id] = key
+            self._ids[key].add(record_id)
+
+    def clear(self) -> None:
+        self._ids.clear()
+        self._keys.clear()
+
+
+class SortedIndex:
+    """Keeps ``(key, id)`` pairs ordered for range scans."""
+
+    def __init__(self, getter: Callable[[Any], Any]) -> None:
+        self._getter = getter
+        self._entries: List[Tuple[Any, int]] = []
+        self._keys: Dict[int, Any] = {}
+
+    def update(self, record_id: int, record: Optional[Any]) -> None:
+        previous = self._keys.pop(record_id, _MISSING)
+        if previous is not _MISSING:
+            position = bisect_left(self._entries, (previous, record_id))
+            if position < len(self._entries) and self._entries[position] == (previous, record_id):
+                del self._entries[position]
+        if record is None:
+            return
+        key = self._getter(record)
+        if key is None:
+            return
+        self._keys[record_id] = key
+        insort(self._entries, (key, record_id))
+
+    def range(self, lower: Any = None, upper: Any = None) -> List[int]:
+        """Return ids whose key lies within ``[lower, upper]`` in ascending order."""
+        start = 0
+        end = len(self._entries)
+        if lower is not None:
+            start = bisect_left(self._entries, (lower, -1))
+        if upper is not None:
+            end = bisect_right(self._entries, (upper, float("inf")))
+        return [record_id for _, record_id in self._entries[start:end]]
+
+    def iter_from(self, after: Optional[Tuple[Any, int]] = None, *, reverse: bool = False) -> Iterator[int]:
+        """Yield ids in key order, starting strictly after the ``(key, id)`` cursor."""
+        if reverse:
+            end = len(self._entries) if after is None else bisect_left(self._entries, after)
+            for position in range(end - 1, -1, -1):
+                yield self._entries[position][1]
+        else:
+            start = 0 if after is None else bisect_right(self._entries, after)
+            for position in range(start, len(self._entries)):
+                yield self._entries[position][1]
+
+    def key_of(self, record_id: int) -> Any:
+        return self._keys.get(record_id)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def rebuild(self, records: Iterable[Tuple[int, Any]]) -> None:
+        """Replace the contents with ``(id, record)`` pairs, sorting once instead of inserting each."""
+        self.clear()
+        for record_id, record in records:
+            key = self._getter(record)
+            if key is not None:
+                self._keys[record_id] = key
+        self._entries = sorted((key, record_id) for record_id, key in self._keys.items())
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._keys.clear()
+
+
+class GroupIndex:
+    """Per-group record ids in ascending id order, tracking which members are flagged.
+
+    Suits append-mostly collections owned by one key (e.g. notifications per
+    user): listing a group, counting its flagged members and collecting them
+    never touch other groups' records.
+    """
+
+    def __init__(self, group_getter: Callable[[Any], Any], flag_getter: Callable[[Any], bool]) -> None:
+        self._group_getter = group_getter
+        self._flag_getter = flag_getter
+        self._ids: Dict[Hashable, List[int]] = {}
+        self._flagged: Dict[Hashable, Set[int]] = {}
+        self._groups: Dict[int, Hashable] = {}
+
+    def update(self, record_id: int, record: Optional[Any]) -> None:
+        previous = self._groups.pop(record_id, _MISSING)
+        if previous is not _MISSING:
+            ids = self._ids[previous]
+            position = bisect_left(ids, record_id)
+            if position < len(ids) and ids[position] == record_id:
+                del ids[position]
+            flagged = self._flagged.get(previous)
+            if flagged is not None:
+                flagged.discard(record_id)
+                if not flagged:
+                    del self._flagged[previous]
+            if not ids:
+                del self._ids[previous]
+        if record is None:
+            return
+        group = index_key(self._group_getter(record))
+        self._groups[record_id] = group
+        ids = self._ids.setdefault(group, [])
+        if not ids or ids[-1] < record_id:
+            ids.append(record_id)
+        else:
+            insort(ids, record_id)
+        if self._flag_getter(record):
+            self._flagged.setdefault(group, set()).add(record_id)
+
+    def iter_group(self, group: Any, *, after: Optional[int] = None, reverse: bool = False) -> Iterator[int]:
+        """Yield a group's ids in id order, limited to ids greater than ``after``."""
+        ids = self._ids.get(index_key(group), [])
+        start = 0 if after is None else bisect_right(ids, after)
+        if reverse:
+            for position in range(len(ids) - 1, start - 1, -1):
+                yield ids[position]
+        else:
+            for position in range(start, len(ids)):
+                yield ids[position]
+
+    def flagged(self, group: Any) -> Set[int]:
+        return set(self._flagged.get(index_key(group), ()))
+
+    def flagged_count(self, group: Any) -> int:
+        return len(self._flagged.get(index_key(group), ()))
+
+    def count(self, group: Any) -> int:
+        return len(self._ids.get(index_key(group), ()))
+
+    def rebuild(self, records: Iterable[Tuple[int, Any]]) -> None:
+        self.clear()
+        for record_id, record in records:
+            self.update(record_id, record)
+
+    def clear(self) -> None:
+        self._ids.clear()
+        self._flagged.clear()
+        self._groups.clear()
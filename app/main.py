@@ -10,9 +10,13 @@ from logging.config import dictConfig
 from pathlib import Path
 import uuid
 
+# Measured from here so the start-up log shows what the imports below cost.
+_imports_started = time.perf_counter()
+
 from apscheduler.schedulers.background import BackgroundScheduler
 from apscheduler.triggers.cron import CronTrigger
-from fastapi import FastAPI
+from apscheduler.triggers.interval import IntervalTrigger
+from fastapi import FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi import Request, HTTPException
 from fastapi.responses import JSONResponse
@@ -23,10 +27,15 @@ from .routers import (
     notes, ai_insights, advanced_analytics, profile, departments, chatbot,
     ai_recommendations, notifications
 )
+from .services import assignment
+from .services.llm_gateway import gateway as llm_gateway
+from .services.analysis_jobs import analysis_jobs
+from .services.previews import preview_service
 from .services.weekly_reports import weekly_report_service
 from .services.email import email_service
-from .security import verify_password, hash_password
+from .services.passwords import hash_fingerprint, password_hasher
 from .datastore import db
+from .startup import startup
 
 # ----------------------------------------------------------------------------
 # Logging configuration
@@ -71,7 +80,9 @@ class JsonFormatter(logging.Formatter):
             "message": _redact_string(record.getMessage()),
         }
         # merge extra if present
-        for key in ("request_id", "user_id", "method", "path", "status", "latency_ms", "remote_ip"):
+        for key in (
+            "request_id", "user_id", "method", "path", "status", "latency_ms", "remote_ip", "phase", "duration_ms"
+        ):
             if hasattr(record, key):
                 payload[key] = _redact_value(getattr(record, key))
         return json.dumps(payload, ensure_ascii=False)
@@ -180,6 +191,12 @@ app.include_router(profile.router)
 app.include_router(chatbot.router)
 app.include_router(notifications.router)
 
+startup.record("imports", time.perf_counter() - _imports_started)
+
+# Requests other than /health that arrive while start-up is still running
+# wait this long for it before being turned away with a 503.
+STARTUP_REQUEST_WAIT_SECONDS = 30.0
+
 scheduler: Optional[BackgroundScheduler] = None
 
 
@@ -249,45 +266,77 @@ def _schedule_weekly_report_job(instance: BackgroundScheduler) -> None:
     )
 
 
+def _sweep_attachment_blobs() -> None:
+    result = db.sweep_attachment_blobs()
+    if result["removed"]:
+        get_logger().info("Reclaimed orphaned attachment blobs", extra=result)
+
+
+def _schedule_attachment_gc_job(instance: BackgroundScheduler) -> None:
+    instance.add_job(
+        _sweep_attachment_blobs,
+        trigger=IntervalTrigger(hours=settings.attachment_gc_interval_hours, timezone=instance.timezone),
+        id="attachment_gc_job",
+        replace_existing=True,
+    )
+
+
+def _schedule_email_retry_job(instance: BackgroundScheduler) -> None:
+    instance.add_job(
+        email_service.process_queue,
+        trigger=IntervalTrigger(seconds=settings.email_retry_interval_seconds, timezone=instance.timezone),
+        id="email_retry_job",
+        replace_existing=True,
+        coalesce=True,
+        max_instances=1,
+    )
+
+
 def _ensure_seed_user_passwords() -> None:
     """Dev safety: ensure seeded users' password hashes validate.
 
     If a user record contains an `initial_password` but the stored hash does not
     verify (e.g., after migrating hash algorithms), re-hash the initial password
-    with bcrypt so the account remains usable.
+    with bcrypt so the account remains usable. Hashes already checked against
+    the initial password carry a fingerprint marker and are skipped; the rest
+    are verified concurrently on the password pool.
     """
-    repaired = 0
+    candidates = []
     for user in db.list_users():
         initial = user.get("initial_password")
         pwh = user.get("password_hash")
         if not initial or not isinstance(pwh, str):
             continue
-        try:
-            ok = verify_password(initial, pwh)
-        except Exception:
-            ok = False
-        if not ok:
-            try:
-                new_hash = hash_password(initial)
-                db.update_user(user["id"], password_hash=new_hash)
-                repaired += 1
-            except Exception:
-                pass
+        if user.get("initial_password_checked") == hash_fingerprint(pwh):
+            continue
+        candidates.append(user)
+    if not candidates:
+        return
+    try:
+        results = password_hasher.verify_many([(u["initial_password"], u["password_hash"]) for u in candidates])
+        broken = [user for user, ok in zip(candidates, results) if not ok]
+        repaired = dict(
+            zip(
+                (user["id"] for user in broken),
+                password_hasher.hash_many([user["initial_password"] for user in broken]),
+            )
+        )
+    except Exception:
+        return
+    with db.batch():
+        for user in candidates:
+            pwh = repaired.get(user["id"], user["password_hash"])
+            db.update_user(user["id"], password_hash=pwh, initial_password_checked=hash_fingerprint(pwh))
     if repaired:
-        get_logger().warning("Repaired %s user password hash(es) from initial_password", repaired)
-
+        get_logger().warning("Repaired %s user password hash(es) from initial_password", len(repaired))
 
-@app.get("/health")
-def health() -> dict:
-    return {"status": "ok", "environment": settings.environment}
 
-
-@app.on_event("startup")
-async def start_background_jobs() -> None:
+def _start_scheduler() -> None:
     global scheduler
-    _ensure_seed_user_passwords()
     scheduler = _create_scheduler()
     _schedule_weekly_report_job(scheduler)
+    _schedule_attachment_gc_job(scheduler)
+    _schedule_email_retry_job(scheduler)
     scheduler.start()
     get_logger().info(
         "Background scheduler started",
@@ -298,12 +347,63 @@ async def start_background_jobs() -> None:
     )
 
 
+# Everything a request may depend on. Reconciling auto-assignment runs once
+# for data loaded from disk; afterwards it is driven by datastore change events.
+_CORE_STARTUP_PHASES = [
+    ("datastore", db.load),
+    ("seed_passwords", _ensure_seed_user_passwords),
+    ("assignment", assignment.mark_all_dirty),
+]
+
+_SERVICE_STARTUP_PHASES = [
+    ("analysis_jobs", analysis_jobs.resume_interrupted),
+    ("email_workers", email_service.start),
+    ("scheduler", _start_scheduler),
+]
+
+
+@app.get("/health")
+def health(response: Response) -> dict:
+    if not startup.ready:
+        response.status_code = 503
+    return {"status": startup.state, "environment": settings.environment, "startup": startup.status()}
+
+
+@app.on_event("startup")
+async def start_background_jobs() -> None:
+    startup.start(_CORE_STARTUP_PHASES + _SERVICE_STARTUP_PHASES)
+
+
 @app.on_event("shutdown")
 async def stop_background_jobs() -> None:
     global scheduler
+    startup.stop()
     if scheduler:
         scheduler.shutdown(wait=False)
         get_logger().info("Background scheduler stopped.")
+    analysis_jobs.stop()
+    email_service.stop()
+    preview_service.close()
+    password_hasher.close()
+    llm_gateway.close()
+    db.close()
+
+
+@app.middleware("http")
+async def wait_for_startup(request: Request, call_next):
+    if not startup.ready:
+        # Servers that skip the start-up event (e.g. a bare TestClient) still
+        # need the datastore; the first request loads it.
+        startup.start(_CORE_STARTUP_PHASES)
+        if request.url.path != "/health" and not await startup.wait_async(STARTUP_REQUEST_WAIT_SECONDS):
+            request_id = getattr(request.state, "request_id", None) or str(uuid.uuid4())
+            content = {
+                "code": "503",
+                "message": "Service is starting; please retry shortly.",
+                "correlation_id": request_id,
+            }
+            return JSONResponse(status_code=503, content=content, headers={"Retry-After": "1"})
+    return await call_next(request)
 
 
 @app.middleware("http")
@@ -364,7 +464,7 @@ async def http_error_handler(request: Request, exc: HTTPException):
     return JSONResponse(
         status_code=exc.status_code,
         content=content,
-        headers={settings.request_id_header: request_id},
+        headers={**(exc.headers or {}), settings.request_id_header: request_id},
     )
 
 
@@ -39,6 +39,15 @@ class Priority(str, Enum):
     urgent = "urgent"
 
 
+# Sort weights used when ordering complaints by priority or status.
+PRIORITY_WEIGHT = {Priority.urgent.value: 2, Priority.normal.value: 1}
+STATUS_WEIGHT = {
+    ComplaintStatus.pending.value: 3,
+    ComplaintStatus.in_progress.value: 2,
+    ComplaintStatus.resolved.value: 1,
+}
+
+
 class ComplaintKind(str, Enum):
     complaint = "complaint"
     feedback = "feedback"
@@ -72,6 +81,8 @@ class AIInsights(BaseModel):
     estimated_resolution_time: Optional[int] = None  # in hours
     tags: List[str] = []
     analyzed_at: datetime = Field(default_factory=datetime.utcnow)
+    stage_timings_ms: Dict[str, float] = {}
+    failed_stages: List[str] = []
 
 
 class ChannelMetadata(BaseModel):
@@ -158,6 +169,7 @@ class Attachment(BaseModel):
     file_path: str
     file_type: str
     file_size: int
+    sha256: Optional[str] = None
     uploaded_at: datetime = Field(default_factory=datetime.utcnow)
 
 
@@ -35,7 +35,7 @@ def list_admins(_: dict = Depends(get_current_super_admin)):
 def create_admin(payload: AdminCreateRequest, _: dict = Depends(get_current_super_admin)):
     if db.get_user_by_username(payload.username):
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Username already exists")
-    if any(user["email"].lower() == payload.email.lower() for user in db.list_users()):
+    if db.get_user_by_email(payload.email):
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Email already exists")
     department = payload.department.strip() if payload.department else None
     plant = payload.plant.strip() if payload.plant else None
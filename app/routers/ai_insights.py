@@ -8,8 +8,9 @@ from fastapi import APIRouter, Depends, HTTPException, status
 from ..datastore import db
 from ..dependencies import get_current_user
 from ..models import User
-from ..schemas import AIInsightsResponse
+from ..schemas import AIInsightsResponse, AnalysisJobResponse
 from ..services.ai_enhanced import enhanced_ai_service
+from ..services.analysis_jobs import analysis_jobs
 
 logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/api/complaints", tags=["ai-insights"])
@@ -76,7 +77,9 @@ async def analyze_complaint_deeply(
             resolution_template=insights.resolution_template or "",
             estimated_resolution_time=insights.estimated_resolution_time or 0,
             tags=insights.tags or [],
-            analyzed_at=insights.analyzed_at
+            analyzed_at=insights.analyzed_at,
+            stage_timings_ms=insights.stage_timings_ms,
+            failed_stages=insights.failed_stages,
         )
 
         return response
@@ -107,33 +110,33 @@ async def regenerate_resolution_template(
     return {"template": template}
 
 
-@router.post("/analyze-all")
+@router.post(
+    "/analyze-all",
+    response_model=AnalysisJobResponse,
+    status_code=status.HTTP_202_ACCEPTED,
+)
 async def analyze_all_complaints(
     current_user: User = Depends(get_current_user)
 ):
-    """Batch analyze all complaints to enrich AI insights.
+    """Start (or join) the background job that enriches complaints with AI insights.
 
-    Iterates through all complaints and generates insights for those that
-    don't have them yet. Returns counts and any IDs that failed.
+    Complaints that already have insights are skipped. Poll
+    ``GET /api/complaints/analyze-all/{job_id}`` for progress.
     """
-    complaints = db.list_complaints()
-    analyzed = 0
-    skipped = 0
-    failed: list[int] = []
+    job = analysis_jobs.start(requested_by=current_user.get("username"))
+    return job.summary()
 
-    for c in complaints:
-        if getattr(c, "ai_insights", None):
-            skipped += 1
-            continue
-        try:
-            insights = await enhanced_ai_service.get_full_insights(c, complaints)
-            history = list(c.sentiment_history or [])
-            if insights and insights.sentiment:
-                history.append(insights.sentiment)
-            db.update_complaint(c.id, ai_insights=insights, sentiment_history=history)
-            analyzed += 1
-        except Exception as e:  # pragma: no cover - log and continue
-            logger.error("Batch analysis failed for %s: %s", c.id, e)
-            failed.append(c.id)
 
-    return {"analyzed": analyzed, "skipped": skipped, "failed": failed}
+@router.get("/analyze-all/{job_id}", response_model=AnalysisJobResponse)
+async def get_analysis_job(
+    job_id: str,
+    current_user: User = Depends(get_current_user)
+):
+    """Report progress of an analyze-all job."""
+    job = analysis_jobs.get(job_id)
+    if not job:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Analysis job not found"
+        )
+    return job.summary()
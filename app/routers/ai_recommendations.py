@@ -10,10 +10,11 @@ from typing import List, Dict, Any
 from fastapi import APIRouter, Depends, HTTPException, status
 
 from ..datastore import db
-from ..dependencies import get_current_user
+from ..dependencies import get_current_admin, get_current_user
 from ..models import Priority, ComplaintStatus
 from ..schemas import AIRecommendation, RecommendationsResponse, RootCauseResponse
 from ..services.ai_enhanced import enhanced_ai_service
+from ..services.llm_cache import llm_cache
 
 router = APIRouter(prefix="/api/ai", tags=["AI Recommendations"])
 logger = logging.getLogger(__name__)
@@ -191,6 +192,14 @@ async def refresh_root_causes(
         "cached_until": (datetime.utcnow() + timedelta(hours=1)).isoformat(),
     }
 
+@router.get("/cache/stats")
+async def get_llm_cache_stats(
+    current_user: dict = Depends(get_current_admin)
+) -> Dict[str, Any]:
+    """Hit/miss counters and size of the persistent LLM completion cache."""
+    return llm_cache.stats()
+
+
 async def _generate_recommendations(complaints: List) -> List[AIRecommendation]:
     """Generate recommendations from complaint data using AI."""
     try:
@@ -19,6 +19,7 @@ from ..schemas import (
     DepartmentStat,
 )
 from ..services import ai, analytics
+from ..services.aggregates import AggregateCell, complaint_aggregates
 from ..services.advanced_analytics import advanced_analytics_service
 
 router = APIRouter(prefix="/api/analytics", tags=["Analytics"])
@@ -47,62 +48,38 @@ def get_dashboard_kpis(
     current_user: dict = Depends(get_current_user)
 ):
     """Get KPI metrics for SuperAdmin dashboard."""
-    # Get all complaints
-    complaints = db.list_complaints()
-    
-    # Apply date filtering if provided
+    # Apply date filtering if provided (day granularity, both ends inclusive)
+    since = until = None
     if from_date or to_date:
         try:
-            from_dt = datetime.fromisoformat(from_date) if from_date else None
-            to_dt = datetime.fromisoformat(to_date) if to_date else None
-            
-            if from_dt:
-                complaints = [c for c in complaints if c.created_at >= from_dt]
-            if to_dt:
-                # Include full day
-                to_dt = to_dt.replace(hour=23, minute=59, second=59)
-                complaints = [c for c in complaints if c.created_at <= to_dt]
+            since = datetime.fromisoformat(from_date).date() if from_date else None
+            until = datetime.fromisoformat(to_date).date() if to_date else None
         except ValueError:
-            pass  # Ignore invalid dates
+            since = until = None  # Ignore invalid dates
     else:
         # Default to last 30 days
-        cutoff = datetime.utcnow() - timedelta(days=30)
-        complaints = [c for c in complaints if c.created_at >= cutoff]
-    
-    total = len(complaints)
-    resolved = sum(1 for c in complaints if c.status == ComplaintStatus.resolved)
-    urgent = sum(1 for c in complaints if c.priority == Priority.urgent and c.status != ComplaintStatus.resolved)
-    
+        since = (datetime.utcnow() - timedelta(days=30)).date()
+
+    totals = AggregateCell()
+    resolved = 0
+    urgent = 0
+    for key, cell in complaint_aggregates.cells(since=since, until=until):
+        totals.merge(cell)
+        if key.status == ComplaintStatus.resolved.value:
+            resolved += cell.count
+        elif key.priority == Priority.urgent.value:
+            urgent += cell.count
+    total = totals.count
+
     # Calculate resolution rate
     resolution_rate = (resolved / total * 100) if total > 0 else 0.0
-    
-    # Calculate avg response time and SLA compliance
-    response_times: list[float] = []
-    sla_compliant = 0
-    sla_threshold_hours = 48  # Define SLA as 48 hours for first response
 
-    for c in complaints:
-        # Prefer explicit first_response_at when available
-        response_hours: float | None = None
-        if getattr(c, "first_response_at", None):
-            response_hours = (c.first_response_at - c.created_at).total_seconds() / 3600  # type: ignore[operator]
-        else:
-            # Fallback to first reply delta
-            replies = db.list_replies_for_complaint(c.id)
-            if replies:
-                first_reply = min(replies, key=lambda r: r.created_at)
-                response_hours = (first_reply.created_at - c.created_at).total_seconds() / 3600
-
-        if response_hours is not None:
-            response_times.append(response_hours)
-            if response_hours <= sla_threshold_hours:
-                sla_compliant += 1
-    
-    avg_response_time = sum(response_times) / len(response_times) if response_times else 0.0
-    
+    # Avg response time uses first_response_at, falling back to the first reply
+    avg_response_time = totals.response_hours / totals.response_count if totals.response_count else 0.0
+
     # SLA compliance: for complaints with no response time, assume SLA not met
     # For complaints with response time available, check if within SLA threshold
-    sla_compliance = (sla_compliant / total * 100) if total > 0 else 100.0
+    sla_compliance = (totals.response_within_sla / total * 100) if total > 0 else 100.0
     
     return KpisResponse(
         total_complaints=total,
@@ -161,13 +138,9 @@ def get_top_categories(
     current_user: dict = Depends(get_current_user)
 ):
     """Get top N categories by complaint count."""
-    complaints = db.list_complaints()
-    
-    # Count complaints per category
-    category_counts: dict[str, int] = {}
-    for c in complaints:
-        cat = c.category or "Unclassified"
-        category_counts[cat] = category_counts.get(cat, 0) + 1
+    category_counts = {
+        name: cell.count for name, cell in complaint_aggregates.breakdown("category").items()
+    }
     
     # Sort by count descending and take top N
     top_categories = sorted(
@@ -187,19 +160,12 @@ def get_top_categories(
 @router.get("/distribution/status")
 def get_status_distribution(current_user: dict = Depends(get_current_user)):
     """Get complaint count distribution by status."""
-    complaints = db.list_complaints()
-    
+    counts = complaint_aggregates.breakdown("status")
     distribution = {
-        "Pending": 0,
-        "In Progress": 0,
-        "Resolved": 0
+        status_val: counts[status_val].count if status_val in counts else 0
+        for status_val in ("Pending", "In Progress", "Resolved")
     }
     
-    for c in complaints:
-        status_val = c.status.value if hasattr(c.status, 'value') else str(c.status)
-        if status_val in distribution:
-            distribution[status_val] += 1
-    
     return {"distribution": distribution}
 
 
@@ -260,7 +226,7 @@ def insights_header(
     from statistics import mean
 
     cutoff = datetime.utcnow() - timedelta(days=days)
-    complaints = [c for c in db.list_complaints() if c.created_at >= cutoff]
+    complaints = db.filter_complaints(created_from=cutoff)
 
     # AI confidence
     confidences = [float(c.ai_confidence) for c in complaints if getattr(c, "ai_confidence", None) is not None]
@@ -296,15 +262,13 @@ def insights_header(
 def department_stats(current_user: dict = Depends(get_current_admin)):
     """Aggregate metrics by department (category)."""
     categories_scope = admin_scoped_categories(current_user)
-    complaints = db.list_complaints()
     departments = sorted(set(categories_scope)) if categories_scope else None
-    if categories_scope:
-        complaints = [c for c in complaints if c.category in categories_scope]
 
-    metrics = advanced_analytics_service.calculate_department_stats(
-        complaints,
+    metrics = advanced_analytics_service.calculate_department_stats_from_aggregates(
+        complaint_aggregates.cells(categories=categories_scope),
         departments=departments,
         audit_logs=list(db.audit_logs.values()),
+        complaints_by_id=db.complaints,
     )
 
     items = [DepartmentStat.model_validate(metric.model_dump()) for metric in metrics]
@@ -326,7 +290,7 @@ def get_sentiment_metrics(
     """
     # Get complaints from last N days
     cutoff = datetime.utcnow() - timedelta(days=days)
-    complaints = [c for c in db.list_complaints() if c.created_at >= cutoff]
+    complaints = db.filter_complaints(created_from=cutoff)
     
     if not complaints:
         return SentimentMetrics(
@@ -10,8 +10,8 @@ router = APIRouter(prefix="/api/auth", tags=["Authentication"])
 
 
 @router.post("/login", response_model=TokenResponse)
-def login(credentials: LoginRequest):
-    tokens = auth_service.login(credentials.username, credentials.password)
+async def login(credentials: LoginRequest):
+    tokens = await auth_service.login(credentials.username, credentials.password)
     return TokenResponse(**tokens)
 
 
@@ -12,7 +12,7 @@ from app.config import settings
 from app.datastore import InMemoryDB, db
 from app.dependencies import get_current_user
 from app.models import ComplaintStatus, Priority
-from app.services.ai import get_groq_client
+from app.services.llm_gateway import gateway
 
 router = APIRouter(prefix="/api/chatbot", tags=["chatbot"])
 logger = logging.getLogger(__name__)
@@ -250,19 +250,12 @@ Be friendly, professional, and data-driven in your responses."""
         
         # Call Groq API
         try:
-            client = get_groq_client()
-            if client is None:
-                raise RuntimeError("Groq client is not initialized")
-
-            completion = client.chat.completions.create(
+            ai_response = await gateway.complete(
+                messages,
                 model=settings.groq_model,
-                messages=messages,
                 temperature=0.7,
                 max_tokens=1000,
             )
-
-            choice = completion.choices[0] if completion.choices else None
-            ai_response = (choice.message.content if choice and choice.message else "") or ""
             if not ai_response:
                 ai_response = "I could not generate a response right now. Please try again shortly."
 
@@ -1,9 +1,10 @@
 from __future__ import annotations
 
-import uuid
+import base64
+import binascii
+import json
 from datetime import datetime, timezone
-from pathlib import Path
-from typing import List, Optional
+from typing import Any, Dict, List, Optional, Set, Tuple
 
 from fastapi import APIRouter, Depends, File, Form, HTTPException, UploadFile, status, Query
 from pydantic import EmailStr
@@ -27,9 +28,11 @@ from ..schemas import (
     ComplaintUpdate,
     ComplaintListResponse,
     PaginationMeta,
+    SearchHighlight,
 )
 from ..services import ai, assignment
-from ..services.file_validation import sniff_mime, has_dangerous_double_extension, sanitize_filename
+from ..services.search import SearchHit, complaint_search
+from ..services.uploads import StagedUpload, stage_upload
 
 router = APIRouter(prefix="/api/complaints", tags=["Complaints"])
 
@@ -66,21 +69,17 @@ async def create_complaint(
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Plant is required")
     if payload.plant not in settings.supported_plants:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid plant selected")
-    file_bytes: Optional[bytes] = None
-    file_name: Optional[str] = None
-    content_type: Optional[str] = None
+    staged: Optional[StagedUpload] = None
     if attachment:
-        file_bytes = await attachment.read()
-        if len(file_bytes) > settings.max_file_size:
-            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="File exceeds size limit")
-        file_name = attachment.filename or "attachment"
-        if has_dangerous_double_extension(file_name):
-            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Dangerous file name detected")
-        sniffed = sniff_mime(file_bytes)
-        if sniffed not in settings.allowed_file_types:
-            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Unsupported or invalid file content")
-        content_type = sniffed
+        staged = await stage_upload(attachment)
+    try:
+        return await _create_complaint_record(payload, staged)
+    finally:
+        if staged is not None:
+            await staged.discard()
+
 
+async def _create_complaint_record(payload: ComplaintCreate, staged: Optional[StagedUpload]) -> Complaint:
     complaint = db.create_complaint(
         emp_id=payload.emp_id,
         email=payload.email,
@@ -92,7 +91,7 @@ async def create_complaint(
         priority=payload.priority,
     )
     try:
-        classification = ai.classify_complaint(payload.complaint_text)
+        classification = await ai.classify_complaint_async(payload.complaint_text)
     except Exception as exc:
         # Defensive: never fail ticket creation due to AI issues
         from ..main import get_logger
@@ -114,17 +113,14 @@ async def create_complaint(
     )
     current = assignment.apply_rules(updated or complaint)
 
-    if file_bytes is not None and content_type:
-        safe_name = f"{uuid.uuid4()}_{sanitize_filename(file_name)}"
-        destination = Path(settings.upload_dir) / safe_name
-        with open(destination, "wb") as buffer:
-            buffer.write(file_bytes)
+    if staged is not None:
         db.create_attachment(
             complaint_id=current.id,
-            file_name=file_name,
-            file_path=str(destination),
-            file_type=content_type,
-            file_size=len(file_bytes),
+            file_name=staged.file_name,
+            file_path=str(staged.temp_path),
+            file_type=staged.content_type,
+            file_size=staged.size,
+            sha256=staged.sha256,
         )
         refreshed = db.get_complaint(current.id)
         if refreshed:
@@ -133,12 +129,58 @@ async def create_complaint(
     return current
 
 
-PRIORITY_WEIGHT = {"urgent": 2, "normal": 1}
-STATUS_WEIGHT = {"Pending": 3, "In Progress": 2, "Resolved": 1}
-ALLOWED_SORT_FIELDS = {"created_at", "priority", "status"}
+ALLOWED_SORT_FIELDS = {"created_at", "priority", "status", "relevance"}
 ALLOWED_ORDER = {"asc", "desc"}
 
 
+def _within_scope(scope: Optional[List[str]], value: Optional[str]) -> Optional[object]:
+    """Combine an admin's scope with an explicit filter into one datastore filter.
+
+    Returns ``None`` (no constraint), the requested value, the scope list, or an
+    empty list when the requested value falls outside the scope.
+    """
+    if not scope:
+        return value
+    if value is None:
+        return scope
+    return value if value in scope else []
+
+
+def _encode_cursor(sort_field: str, order: str, key: Any, complaint_id: int) -> str:
+    """Pack a sorted-view position into an opaque, URL-safe token."""
+    weight, created_at = key if isinstance(key, tuple) else (None, key)
+    payload = {"s": sort_field, "o": order, "w": weight, "t": created_at.isoformat(), "id": complaint_id}
+    raw = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def _decode_cursor(token: str, sort_field: str, order: str) -> Tuple[Any, int]:
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        payload = json.loads(raw)
+        created_at = datetime.fromisoformat(payload["t"])
+        complaint_id = int(payload["id"])
+        weight = payload["w"]
+        if weight is not None:
+            weight = int(weight)
+    except (binascii.Error, ValueError, KeyError, TypeError):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid pagination cursor")
+    if payload.get("s") != sort_field or payload.get("o") != order:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Pagination cursor does not match the requested sort order",
+        )
+    # Only the priority and status views key on a weight; a cursor that
+    # disagrees would fail to compare against the index entries.
+    if (weight is None) != (sort_field == "created_at"):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid pagination cursor")
+    if created_at.tzinfo:
+        # Stored timestamps are naive UTC.
+        created_at = created_at.astimezone(timezone.utc).replace(tzinfo=None)
+    key = created_at if weight is None else (weight, created_at)
+    return key, complaint_id
+
+
 @router.get("", response_model=ComplaintListResponse)
 def list_complaints(
     kind: Optional[ComplaintKind] = None,
@@ -156,87 +198,97 @@ def list_complaints(
     to_date: Optional[datetime] = Query(None, description="ISO timestamp inclusive upper bound"),
     page: int = Query(1, ge=1),
     page_size: int = Query(25, ge=1, le=100),
+    after: Optional[str] = Query(
+        None,
+        description="Opaque cursor from meta.next_cursor; continues after that item and ignores page",
+    ),
     sort: str = Query("created_at"),
     order: str = Query("desc"),
     current_user: dict = Depends(get_current_admin),
 ):
-    assignment.refresh_all_complaints()
-    complaints = db.list_complaints()
-    categories = admin_scoped_categories(current_user)
-    if categories:
-        complaints = [complaint for complaint in complaints if complaint.category in categories]
-    plants = admin_scoped_plants(current_user)
-    if plants:
-        complaints = [complaint for complaint in complaints if complaint.plant in plants]
-    if kind:
-        complaints = [complaint for complaint in complaints if complaint.kind == kind]
-    if category:
-        complaints = [complaint for complaint in complaints if complaint.category == category]
-    if plant:
-        complaints = [complaint for complaint in complaints if complaint.plant == plant]
-    if priority:
-        complaints = [complaint for complaint in complaints if complaint.priority == priority]
-    if status_filter:
-        complaints = [complaint for complaint in complaints if complaint.status == status_filter]
-    if search:
-        term = search.strip().lower()
-        search_id: Optional[int] = None
-        stripped = term.lstrip("#")
-        if stripped.isdigit():
-            try:
-                search_id = int(stripped)
-            except ValueError:
-                search_id = None
-
-        def _matches(complaint: Complaint) -> bool:
-            if search_id is not None and complaint.id == search_id:
-                return True
-            haystacks = [
-                complaint.emp_id,
-                complaint.email,
-                complaint.phone,
-                complaint.complaint_text,
-                complaint.category,
-                complaint.plant or "",
-                complaint.status.value,
-                complaint.priority.value,
-            ]
-            for value in haystacks:
-                if term in value.lower():
-                    return True
-            return False
-
-        complaints = [complaint for complaint in complaints if _matches(complaint)]
+    lower_bound: Optional[datetime] = None
     if from_date:
         lower_bound = from_date
         if from_date.tzinfo:
             lower_bound = from_date.astimezone(timezone.utc).replace(tzinfo=None)
-        complaints = [complaint for complaint in complaints if complaint.created_at >= lower_bound]
+    upper_bound: Optional[datetime] = None
     if to_date:
         upper_bound = to_date
         if to_date.tzinfo:
             upper_bound = to_date.astimezone(timezone.utc).replace(tzinfo=None)
-        complaints = [complaint for complaint in complaints if complaint.created_at <= upper_bound]
-
+    hits: Dict[int, SearchHit] = {}
+    search_ids: Optional[Set[int]] = None
+    ticket_id: Optional[int] = None
+    term = (search or "").strip().lower()
     sort_field = sort if sort in ALLOWED_SORT_FIELDS else "created_at"
+    if sort_field == "relevance" and not term:
+        sort_field = "created_at"
+    if term:
+        if sort_field == "relevance":
+            hits = complaint_search.search(term)
+            search_ids = set(hits)
+        else:
+            # Only the page being returned needs scores, for its highlights.
+            search_ids = complaint_search.matches(term)
+        stripped = term.lstrip("#")
+        if stripped.isdigit():
+            ticket_id = int(stripped)
+            search_ids.add(ticket_id)
+    filters = dict(
+        category=_within_scope(admin_scoped_categories(current_user), category or None),
+        plant=_within_scope(admin_scoped_plants(current_user), plant or None),
+        kind=kind,
+        priority=priority,
+        status=status_filter,
+        created_from=lower_bound,
+        created_to=upper_bound,
+        ids=search_ids,
+    )
+
     order_value = order.lower()
     if order_value not in ALLOWED_ORDER:
         order_value = "desc"
     reverse = order_value == "desc"
 
-    def sort_key(complaint: Complaint):
-        if sort_field == "priority":
-            return PRIORITY_WEIGHT.get(complaint.priority.value, 0)
-        if sort_field == "status":
-            return STATUS_WEIGHT.get(complaint.status.value, 0)
-        return complaint.created_at
-
-    complaints.sort(key=sort_key, reverse=reverse)
-
-    total = len(complaints)
-    start = (page - 1) * page_size
-    end = start + page_size
-    items = complaints[start:end]
+    next_cursor: Optional[str] = None
+    if sort_field == "relevance":
+        if after:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Cursor pagination is not available when sorting by relevance",
+            )
+        complaints = db.filter_complaints(**filters)
+
+        def sort_key(complaint: Complaint):
+            hit = hits.get(complaint.id)
+            return (hit.score if hit else 0.0, complaint.created_at)
+
+        complaints.sort(key=sort_key, reverse=reverse)
+        if ticket_id is not None:
+            # An exact ticket-number match ranks first in either order.
+            complaints.sort(key=lambda complaint: complaint.id != ticket_id)
+        total = len(complaints)
+        start = (page - 1) * page_size
+        items = complaints[start : start + page_size]
+    else:
+        cursor = _decode_cursor(after, sort_field, order_value) if after else None
+        # Read one extra row to learn whether another page follows.
+        items, total = db.page_complaints(
+            sort_field,
+            descending=reverse,
+            after=cursor,
+            offset=0 if cursor else (page - 1) * page_size,
+            limit=page_size + 1,
+            **filters,
+        )
+        if len(items) > page_size:
+            items = items[:page_size]
+            last = items[-1]
+            next_cursor = _encode_cursor(
+                sort_field, order_value, db.complaint_sort_key(sort_field, last.id), last.id
+            )
+        if term:
+            hits = complaint_search.search(term, ids=[complaint.id for complaint in items])
     total_pages = (total + page_size - 1) // page_size if total else 0
 
     meta = PaginationMeta(
@@ -244,8 +296,19 @@ def list_complaints(
         page_size=page_size,
         total=total,
         total_pages=total_pages,
+        next_cursor=next_cursor,
     )
-    return ComplaintListResponse(items=items, meta=meta)
+    highlights = {
+        complaint.id: SearchHighlight(
+            field=hit.field,
+            snippet=hit.snippet,
+            match_start=hit.match_start,
+            match_end=hit.match_end,
+        )
+        for complaint in items
+        if (hit := hits.get(complaint.id)) is not None
+    }
+    return ComplaintListResponse(items=items, meta=meta, highlights=highlights)
 
 
 @router.get("/{complaint_id}", response_model=Complaint)
@@ -254,7 +317,7 @@ def get_complaint(complaint_id: int, current_user: dict = Depends(get_current_us
     if not complaint:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Complaint not found")
     ensure_complaint_access(complaint, current_user)
-    return assignment.apply_rules(complaint)
+    return complaint
 
 
 @router.put("/{complaint_id}", response_model=Complaint)
@@ -304,31 +367,22 @@ def list_attachments(complaint_id: int, current_user: dict = Depends(get_current
 
 @router.get("/category/{category}", response_model=List[Complaint])
 def filter_by_category(category: str, current_user: dict = Depends(get_current_admin)):
-    assignment.refresh_all_complaints()
     categories = admin_scoped_categories(current_user)
     if categories and category not in categories:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Access restricted to department data.",
         )
-    complaints = db.filter_complaints(category=category)
-    plants = admin_scoped_plants(current_user)
-    if plants:
-        complaints = [complaint for complaint in complaints if complaint.plant in plants]
-    return complaints
+    return db.filter_complaints(category=category, plant=admin_scoped_plants(current_user))
 
 
 @router.get("/status/{status}", response_model=List[Complaint])
 def filter_by_status(status: ComplaintStatus, current_user: dict = Depends(get_current_admin)):
-    assignment.refresh_all_complaints()
-    complaints = db.filter_complaints(status=status)
-    categories = admin_scoped_categories(current_user)
-    if categories:
-        complaints = [complaint for complaint in complaints if complaint.category in categories]
-    plants = admin_scoped_plants(current_user)
-    if plants:
-        complaints = [complaint for complaint in complaints if complaint.plant in plants]
-    return complaints
+    return db.filter_complaints(
+        status=status,
+        category=admin_scoped_categories(current_user),
+        plant=admin_scoped_plants(current_user),
+    )
 
 
 @router.post("/{complaint_id}/classify", response_model=ClassificationResponse)
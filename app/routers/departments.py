@@ -234,7 +234,7 @@ def add_employee_to_department(
             detail="Username already exists"
         )
     
-    if any(user["email"].lower() == payload.email.lower() for user in db.list_users()):
+    if db.get_user_by_email(payload.email):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Email already exists"
@@ -292,7 +292,7 @@ def add_admin_to_department(
             detail="Username already exists"
         )
     
-    if any(user["email"].lower() == payload.email.lower() for user in db.list_users()):
+    if db.get_user_by_email(payload.email):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Email already exists"
@@ -409,9 +409,7 @@ def create_department(
         if plant_tag not in current_desc:
             # Add the plant tag to the description
             new_desc = f"{current_desc} {plant_tag}".strip()
-            # Update category description (we need a method for this)
-            existing.description = new_desc
-            db._persist()
+            existing = db.update_category(existing.id, description=new_desc) or existing
         category = existing
     
     return {
@@ -1,19 +1,27 @@
 from __future__ import annotations
 
-import uuid
+import hashlib
+import os
+from email.utils import formatdate, parsedate_to_datetime
 from pathlib import Path
+from typing import Dict, Optional
 
-from fastapi import APIRouter, Depends, File, HTTPException, UploadFile, status
+from fastapi import APIRouter, Depends, File, HTTPException, Query, Request, Response, UploadFile, status
 from fastapi.responses import FileResponse
 
-from ..config import settings
-from ..services.file_validation import sniff_mime, has_dangerous_double_extension, sanitize_filename
 from ..datastore import db
 from ..dependencies import ensure_complaint_access, get_current_admin
 from ..models import Attachment
+from ..services.previews import VARIANTS, preview_service
+from ..services.uploads import stage_upload
 
 router = APIRouter(prefix="/api", tags=["Files"])
 
+# Content-addressed attachments never change, so clients may keep them for a
+# year without revalidating. Older per-upload files are revalidated by ETag.
+IMMUTABLE_CACHE_CONTROL = "private, max-age=31536000, immutable"
+REVALIDATE_CACHE_CONTROL = "private, no-cache"
+
 
 @router.post("/upload", response_model=Attachment, status_code=status.HTTP_201_CREATED)
 async def upload_file(
@@ -25,60 +33,140 @@ async def upload_file(
     if not complaint:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Complaint not found")
     ensure_complaint_access(complaint, current_user)
-    contents = await file.read()
-    if len(contents) > settings.max_file_size:
-        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="File exceeds size limit")
-    if has_dangerous_double_extension(file.filename):
-        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Dangerous file name detected")
-    sniffed = sniff_mime(contents)
-    if sniffed not in settings.allowed_file_types:
-        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Unsupported or invalid file content")
-    safe_name = f"{uuid.uuid4()}_{sanitize_filename(file.filename)}"
-    destination = Path(settings.upload_dir) / safe_name
-    with open(destination, "wb") as buffer:
-        buffer.write(contents)
-    attachment = db.create_attachment(
-        complaint_id=complaint_id,
-        file_name=file.filename,
-        file_path=str(destination),
-        file_type=sniffed or file.content_type or "application/octet-stream",
-        file_size=len(contents),
-    )
+    staged = await stage_upload(file)
+    try:
+        attachment = db.create_attachment(
+            complaint_id=complaint_id,
+            file_name=staged.file_name,
+            file_path=str(staged.temp_path),
+            file_type=staged.content_type,
+            file_size=staged.size,
+            sha256=staged.sha256,
+        )
+    finally:
+        await staged.discard()
     return attachment
 
 
-@router.get("/files/{attachment_id}")
-def download_file(attachment_id: int, current_user: dict = Depends(get_current_admin)):
+def _validators(attachment: Attachment, stat_result: os.stat_result) -> Dict[str, str]:
+    if attachment.sha256:
+        etag = f'"{attachment.sha256}"'
+        cache_control = IMMUTABLE_CACHE_CONTROL
+    else:
+        basis = f"{stat_result.st_mtime_ns}-{stat_result.st_size}".encode()
+        etag = f'"{hashlib.sha256(basis).hexdigest()[:32]}"'
+        cache_control = REVALIDATE_CACHE_CONTROL
+    return {
+        "etag": etag,
+        "last-modified": formatdate(stat_result.st_mtime, usegmt=True),
+        "cache-control": cache_control,
+    }
+
+
+def _etag_matches(header: str, etag: str) -> bool:
+    if header.strip() == "*":
+        return True
+    # If-None-Match uses weak comparison.
+    candidates = {tag.strip().removeprefix("W/") for tag in header.split(",")}
+    return etag in candidates
+
+
+def _not_modified(request: Request, etag: str, mtime: float) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        return _etag_matches(if_none_match, etag)
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since:
+        try:
+            since = parsedate_to_datetime(if_modified_since).timestamp()
+        except (TypeError, ValueError):
+            return False
+        return int(mtime) <= since
+    return False
+
+
+def _get_accessible_attachment(attachment_id: int, current_user: dict) -> Attachment:
     attachment = db.get_attachment(attachment_id)
     if not attachment:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="File not found")
     complaint = db.get_complaint(attachment.complaint_id)
     if complaint:
         ensure_complaint_access(complaint, current_user)
+    return attachment
+
+
+@router.get("/files/{attachment_id}")
+def download_file(
+    attachment_id: int,
+    request: Request,
+    current_user: dict = Depends(get_current_admin),
+):
+    """Serve an attachment with ETag/Last-Modified validators.
+
+    Conditional requests are answered with 304, and ``Range`` requests
+    (video seeking, PDF viewers) get 206 partial content.
+    """
+    attachment = _get_accessible_attachment(attachment_id, current_user)
     file_path = Path(attachment.file_path)
-    if not file_path.exists():
+    try:
+        stat_result: Optional[os.stat_result] = file_path.stat()
+    except OSError:
+        stat_result = None
+    if stat_result is None:
         raise HTTPException(
             status_code=status.HTTP_410_GONE,
             detail="File is no longer available on the server",
         )
+    headers = _validators(attachment, stat_result)
+    if _not_modified(request, headers["etag"], stat_result.st_mtime):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    # FileResponse handles Range/If-Range itself, checking If-Range against our ETag.
     return FileResponse(
         path=str(file_path),
         filename=attachment.file_name,
         media_type=attachment.file_type,
+        headers=headers,
+        stat_result=stat_result,
+    )
+
+
+@router.get("/files/{attachment_id}/preview")
+def download_preview(
+    attachment_id: int,
+    request: Request,
+    variant: str = Query("thumbnail", description=f"One of: {', '.join(VARIANTS)}"),
+    current_user: dict = Depends(get_current_admin),
+):
+    """Small JPEG rendition of an image or the first page of a PDF."""
+    if variant not in VARIANTS:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Unknown preview variant")
+    attachment = _get_accessible_attachment(attachment_id, current_user)
+    if not preview_service.supports(attachment):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Preview not available")
+    if not Path(attachment.file_path).exists():
+        raise HTTPException(
+            status_code=status.HTTP_410_GONE,
+            detail="File is no longer available on the server",
+        )
+    preview_path = preview_service.get(attachment, variant)
+    if preview_path is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Preview not available")
+    stat_result = preview_path.stat()
+    headers = _validators(attachment, stat_result)
+    if attachment.sha256:
+        headers["etag"] = f'"{attachment.sha256}-{variant}"'
+    if _not_modified(request, headers["etag"], stat_result.st_mtime):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return FileResponse(
+        path=str(preview_path),
+        media_type="image/jpeg",
+        headers=headers,
+        stat_result=stat_result,
     )
 
 
 @router.delete("/files/{attachment_id}", status_code=status.HTTP_204_NO_CONTENT)
 def delete_file(attachment_id: int, current_user: dict = Depends(get_current_admin)):
-    attachment = db.get_attachment(attachment_id)
-    if not attachment:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="File not found")
-    complaint = db.get_complaint(attachment.complaint_id)
-    if complaint:
-        ensure_complaint_access(complaint, current_user)
+    _get_accessible_attachment(attachment_id, current_user)
     db.delete_attachment(attachment_id)
-    try:
-        Path(attachment.file_path).unlink(missing_ok=True)
-    except OSError:
-        pass
     return None
@@ -5,6 +5,8 @@ from pathlib import Path
 from fastapi import APIRouter, Depends, HTTPException, status
 
 from ..dependencies import get_current_admin
+from ..services.email import email_service
+from ..services.passwords import password_hasher
 
 router = APIRouter(prefix="/api/logs", tags=["Logs"])
 
@@ -23,3 +25,15 @@ def read_logs(_: dict = Depends(get_current_admin)) -> dict:
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Unable to read application log.",
         ) from exc
+
+
+@router.get("/email-queue", response_model=dict)
+def read_email_queue_stats(_: dict = Depends(get_current_admin)) -> dict:
+    """Outbox depth, age of the oldest undelivered email and SMTP send latency."""
+    return email_service.queue_stats()
+
+
+@router.get("/password-hasher", response_model=dict)
+def read_password_hasher_stats(_: dict = Depends(get_current_admin)) -> dict:
+    """Queue depth and throughput of the password hashing pool."""
+    return password_hasher.stats()
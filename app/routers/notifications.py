@@ -2,15 +2,22 @@ import asyncio
 import json
 from typing import List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, status
 from fastapi.responses import StreamingResponse
 
+from ..config import settings
 from ..datastore import db
 from ..dependencies import get_current_user
+from ..models import Notification
 from ..schemas import NotificationCreate, NotificationResponse
+from ..services.notification_bus import notification_bus
 
 router = APIRouter(prefix="/api/notifications", tags=["notifications"])
 
+# Upper bound on notifications replayed to a reconnecting stream; a client
+# further behind is told to refetch its list instead.
+MAX_REPLAY = 200
+
 
 @router.get("/", response_model=List[NotificationResponse])
 def list_notifications(
@@ -27,6 +34,12 @@ def list_notifications(
     return notifications
 
 
+@router.get("/unread-count")
+def unread_notification_count(current_user: dict = Depends(get_current_user)):
+    """Number of unread notifications for the current user."""
+    return {"unread_count": db.count_unread_notifications(current_user["id"])}
+
+
 @router.get("/{notif_id}", response_model=NotificationResponse)
 def get_notification(
     notif_id: int,
@@ -105,60 +118,106 @@ def delete_notification(
     return None
 
 
+def _sse_ping() -> str:
+    return f"data: {json.dumps({'type': 'ping', 'timestamp': str(asyncio.get_event_loop().time())})}\n\n"
+
+
+def _sse_notification(notif: Notification) -> str:
+    event_data = {
+        "type": "notification",
+        "data": {
+            "id": notif.id,
+            "title": notif.title,
+            "message": notif.message,
+            "notification_type": notif.type,
+            "link": notif.link,
+            "created_at": notif.created_at.isoformat()
+        }
+    }
+    # The id line lets EventSource send Last-Event-ID when it reconnects.
+    return f"id: {notif.id}\ndata: {json.dumps(event_data)}\n\n"
+
+
+def _sse_resync(last_id: int) -> str:
+    return f"id: {last_id}\ndata: {json.dumps({'type': 'resync'})}\n\n"
+
+
 @router.get("/stream/sse")
-async def notification_stream(current_user: dict = Depends(get_current_user)):
+async def notification_stream(
+    current_user: dict = Depends(get_current_user),
+    last_event_id: Optional[str] = Header(None, alias="Last-Event-ID"),
+):
     """
     Server-Sent Events (SSE) stream for real-time notifications.
     
+    New notifications are pushed as they are created. A ping is sent after
+    ``NOTIFICATION_KEEPALIVE_SECONDS`` without traffic, and reconnecting
+    clients that send ``Last-Event-ID`` first receive everything they missed.
+    A client more than ``MAX_REPLAY`` notifications behind gets a single
+    ``resync`` event instead and should refetch ``/api/notifications/``.
+    
     Client usage example:
     ```javascript
     const eventSource = new EventSource('/api/notifications/stream/sse');
-    eventSource.addEventListener('notification', (event) => {
+    eventSource.onmessage = (event) => {
         const data = JSON.parse(event.data);
-        console.log('New notification:', data);
-    });
+        if (data.type === 'notification') console.log('New notification:', data.data);
+    };
     ```
     """
+    user_id = current_user["id"]
+    try:
+        resume_after: Optional[int] = int(last_event_id) if last_event_id else None
+    except ValueError:
+        resume_after = None
+
     async def event_generator():
-        user_id = current_user["id"]
-        last_count = len(db.list_notifications(user_id=user_id, limit=1000))
+        # Subscribe before catching up so nothing created in between is lost;
+        # anything seen twice is skipped by id.
+        subscription = notification_bus.subscribe(user_id)
+        last_sent = resume_after
         
-        # Send initial ping
-        yield f"data: {json.dumps({'type': 'ping', 'timestamp': str(asyncio.get_event_loop().time())})}\n\n"
+        def catch_up(after_id: int) -> List[str]:
+            nonlocal last_sent
+            missed = db.list_notifications(user_id=user_id, limit=MAX_REPLAY, after_id=after_id)
+            if len(missed) >= MAX_REPLAY:
+                # The oldest missed notifications did not fit; rather than
+                # dropping them silently, have the client reload its list.
+                last_sent = max([n.id for n in missed] + [last_sent or 0])
+                return [_sse_resync(last_sent)]
+            events = []
+            for notif in sorted(missed, key=lambda n: n.id):
+                if last_sent is None or notif.id > last_sent:
+                    events.append(_sse_notification(notif))
+                    last_sent = notif.id
+            return events
         
         try:
+            # Send initial ping
+            yield _sse_ping()
+            
+            if last_sent is not None:
+                for event in catch_up(last_sent):
+                    yield event
+            
             while True:
-                # Check for new notifications every 2 seconds
-                await asyncio.sleep(2)
-                
-                current_notifs = db.list_notifications(user_id=user_id, limit=1000)
-                current_count = len(current_notifs)
-                
-                if current_count > last_count:
-                    # New notifications detected
-                    new_notifs = current_notifs[:current_count - last_count]
-                    for notif in new_notifs:
-                        event_data = {
-                            "type": "notification",
-                            "data": {
-                                "id": notif.id,
-                                "title": notif.title,
-                                "message": notif.message,
-                                "notification_type": notif.type,
-                                "link": notif.link,
-                                "created_at": notif.created_at.isoformat()
-                            }
-                        }
-                        yield f"data: {json.dumps(event_data)}\n\n"
-                    
-                    last_count = current_count
-                else:
-                    # Send keep-alive ping
-                    yield f"data: {json.dumps({'type': 'ping', 'timestamp': str(asyncio.get_event_loop().time())})}\n\n"
+                notif = await subscription.get(timeout=settings.notification_keepalive_seconds)
+                if notif is not None and (last_sent is None or notif.id > last_sent):
+                    yield _sse_notification(notif)
+                    last_sent = notif.id
+                # If this client fell behind and its queue overflowed, catch up from the store.
+                dropped_from = subscription.take_overflow()
+                if dropped_from is not None:
+                    for event in catch_up(dropped_from - 1):
+                        yield event
+                elif notif is None:
+                    yield _sse_ping()
         
         except asyncio.CancelledError:
             # Client disconnected
             yield f"data: {json.dumps({'type': 'close'})}\n\n"
+        finally:
+            subscription.close()
     
     return StreamingResponse(
         event_generator(),
@@ -2,12 +2,13 @@ from __future__ import annotations
 
 from typing import List
 from fastapi import APIRouter, Depends, HTTPException, status, Body
+from fastapi.concurrency import run_in_threadpool
 
 from ..datastore import db
 from ..dependencies import get_current_user, get_current_admin
 from ..models import Role
 from ..schemas import ProfilePreferences, FeedbackPresetCollection, FeedbackPreset, EmployeeCreateByAdminRequest, EmployeeResponse
-from ..security import verify_password, hash_password
+from ..services.passwords import password_hasher
 
 router = APIRouter(prefix="/api/profile", tags=["Profile"])
 
@@ -55,18 +56,20 @@ def upsert_feedback_presets(
 
 
 @router.post("/change-password")
-def change_password(
+async def change_password(
     current_password: str = Body(...),
     new_password: str = Body(...),
     current_user: dict = Depends(get_current_user),
 ):
-    user = db.get_user(current_user["id"]) or {}
-    if not verify_password(current_password, user.get("password_hash", "")):
+    user = await run_in_threadpool(db.get_user, current_user["id"]) or {}
+    if not await password_hasher.verify_async(current_password, user.get("password_hash", "")):
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Current password is incorrect")
     # Basic password policy: min 10 chars
     if len(new_password) < 10:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Password must be at least 10 characters long")
-    db.update_user(user["id"], password_hash=hash_password(new_password))
+    password_hash = await password_hasher.hash_async(new_password)
+    # update_user appends to the journal; keep that disk write off the event loop.
+    await run_in_threadpool(db.update_user, user["id"], password_hash=password_hash)
     return {"success": True}
 
 
@@ -133,7 +136,7 @@ def add_employee(
     # Check for existing username/email
     if db.get_user_by_username(payload.username):
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Username already exists")
-    if any(user["email"].lower() == payload.email.lower() for user in db.list_users()):
+    if db.get_user_by_email(payload.email):
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Email already exists")
     
     # Create employee with admin as manager
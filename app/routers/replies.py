@@ -1,24 +1,30 @@
 from __future__ import annotations
 
 from datetime import datetime
-import uuid
-from pathlib import Path
 from typing import List, Optional
 
 from fastapi import APIRouter, Depends, File, Form, HTTPException, UploadFile, status, Query
 
 from ..datastore import db
 from ..dependencies import ensure_complaint_access, get_current_admin
-from ..models import Reply
+from ..models import Complaint, Reply
 from ..schemas import ReplyUpdate, ReplyListResponse, PaginationMeta
 from ..services.email import EmailPayload, email_service
 from ..services.email_templates import render_email
-from ..services.file_validation import sniff_mime, has_dangerous_double_extension, sanitize_filename
-from ..config import settings
+from ..services.uploads import StagedUpload, stage_upload
 
 router = APIRouter(prefix="/api/replies", tags=["Replies"])
 
 
+def _record_reply_delivery(metadata: dict, delivered: bool) -> None:
+    reply_id = metadata.get("reply_id")
+    if delivered and reply_id is not None:
+        db.update_reply(reply_id, email_sent=True, email_sent_at=datetime.utcnow())
+
+
+email_service.add_delivery_listener(_record_reply_delivery)
+
+
 @router.post("", response_model=Reply, status_code=status.HTTP_201_CREATED)
 async def create_reply(
     complaint_id: int = Form(...),
@@ -33,27 +39,29 @@ async def create_reply(
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Complaint not found")
     ensure_complaint_access(complaint, current_user)
 
-    file_bytes: Optional[bytes] = None
-    file_name: Optional[str] = None
-    content_type: Optional[str] = None
+    staged: Optional[StagedUpload] = None
     if attachment:
-        file_bytes = await attachment.read()
-        if len(file_bytes) > settings.max_file_size:
-            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="File exceeds size limit")
-        file_name = attachment.filename or "attachment"
-        if has_dangerous_double_extension(file_name):
-            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Dangerous file name detected")
-        sniffed = sniff_mime(file_bytes)
-        if sniffed not in settings.allowed_file_types:
-            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Unsupported or invalid file content")
-        content_type = sniffed
+        staged = await stage_upload(attachment)
+    try:
+        return await _create_reply_record(complaint, reply_text, send_email, staged, current_user)
+    finally:
+        if staged is not None:
+            await staged.discard()
+
 
+async def _create_reply_record(
+    complaint: Complaint,
+    reply_text: str,
+    send_email: bool,
+    staged: Optional[StagedUpload],
+    current_user: dict,
+) -> Reply:
+    complaint_id = complaint.id
     reply_text = reply_text.strip()
     if not reply_text:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Reply text cannot be empty")
 
-    email_sent = False
-    email_sent_at = None
+    message: Optional[EmailPayload] = None
     if send_email:
         email_document = render_email(
             "reply",
@@ -74,29 +82,26 @@ async def create_reply(
             html=email_document.html,
             text=email_document.text,
         )
-        email_sent = email_service.send_with_retry(message)
-        email_sent_at = datetime.utcnow() if email_sent else None
     author_id = current_user["id"]
+    # The reply is marked as emailed by the delivery worker once the message is out.
     reply = db.create_reply(
         complaint_id=complaint_id,
         admin_id=author_id,
         reply_text=reply_text,
-        email_sent=email_sent,
-        email_sent_at=email_sent_at,
+        email_sent=False,
     )
-    if file_bytes is not None and content_type and file_name:
-        safe_name = f"{uuid.uuid4()}_{sanitize_filename(file_name)}"
-        destination = Path(settings.upload_dir) / safe_name
-        with open(destination, "wb") as buffer:
-            buffer.write(file_bytes)
+    if staged is not None:
         db.create_attachment(
             complaint_id=complaint_id,
-            file_name=file_name,
-            file_path=str(destination),
-            file_type=content_type,
-            file_size=len(file_bytes),
+            file_name=staged.file_name,
+            file_path=str(staged.temp_path),
+            file_type=staged.content_type,
+            file_size=staged.size,
             reply_id=reply.id,
+            sha256=staged.sha256,
         )
+    if message is not None:
+        email_service.queue(message, metadata={"reply_id": reply.id})
     return reply
 
 
@@ -371,6 +371,24 @@ class AIInsightsResponse(BaseModel):
     estimated_resolution_time: int
     tags: List[str]
     analyzed_at: datetime
+    stage_timings_ms: Dict[str, float] = Field(default_factory=dict)
+    failed_stages: List[str] = Field(default_factory=list)
+
+
+class AnalysisJobResponse(BaseModel):
+    """Progress of the background analyze-all job."""
+    job_id: str
+    status: str
+    total: int
+    processed: int
+    remaining: int
+    analyzed: int
+    skipped: int
+    failed: List[int]
+    created_at: datetime
+    updated_at: datetime
+    finished_at: Optional[datetime] = None
+    error: Optional[str] = None
 
 
 # Advanced Analytics Schemas
@@ -432,11 +450,20 @@ class PaginationMeta(BaseModel):
     page_size: int
     total: int
     total_pages: int
+    next_cursor: Optional[str] = None
+
+
+class SearchHighlight(BaseModel):
+    field: str
+    snippet: str
+    match_start: int
+    match_end: int
 
 
 class ComplaintListResponse(BaseModel):
     items: List[Complaint]
     meta: PaginationMeta
+    highlights: Dict[int, SearchHighlight] = Field(default_factory=dict)
 
 
 class ReplyListResponse(BaseModel):
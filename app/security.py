@@ -1,8 +1,11 @@
 from __future__ import annotations
 
+import base64
 import hashlib
 import hmac
-from typing import Final
+import json
+import time
+from typing import Any, Dict, Final, Optional
 import os
 import bcrypt
 
@@ -38,3 +41,41 @@ def verify_password(password: str, hashed: str) -> bool:
 def needs_rehash(hashed: str) -> bool:
     """Whether the stored hash should be upgraded to bcrypt."""
     return not (hashed.startswith("$2b$") or hashed.startswith("$2a$"))
+
+
+def _b64url(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode("ascii")
+
+
+def _b64url_decode(segment: str) -> bytes:
+    return base64.urlsafe_b64decode(segment + "=" * (-len(segment) % 4))
+
+
+_JWT_HEADER: Final = _b64url(json.dumps({"alg": "HS256", "typ": "JWT"}, separators=(",", ":")).encode("utf-8"))
+
+
+def encode_jwt(claims: Dict[str, Any], secret: str) -> str:
+    """Sign ``claims`` as a compact HS256 JSON Web Token."""
+    payload = _b64url(json.dumps(claims, separators=(",", ":")).encode("utf-8"))
+    signing_input = f"{_JWT_HEADER}.{payload}".encode("ascii")
+    signature = hmac.new(secret.encode("utf-8"), signing_input, hashlib.sha256).digest()
+    return f"{_JWT_HEADER}.{payload}.{_b64url(signature)}"
+
+
+def decode_jwt(token: str, secret: str, *, verify_exp: bool = True) -> Optional[Dict[str, Any]]:
+    """Return the claims of a valid HS256 token, or None if it is malformed, forged or expired."""
+    try:
+        header, payload, signature = token.split(".")
+        if json.loads(_b64url_decode(header)).get("alg") != "HS256":
+            return None
+        expected = hmac.new(secret.encode("utf-8"), f"{header}.{payload}".encode("ascii"), hashlib.sha256).digest()
+        if not hmac.compare_digest(expected, _b64url_decode(signature)):
+            return None
+        claims = json.loads(_b64url_decode(payload))
+    except (ValueError, TypeError, AttributeError):
+        return None
+    if not isinstance(claims, dict):
+        return None
+    if verify_exp and not (isinstance(claims.get("exp"), (int, float)) and claims["exp"] > time.time()):
+        return None
+    return claims
@@ -5,7 +5,7 @@ import logging
 import statistics
 from collections import defaultdict
 from datetime import datetime, timedelta
-from typing import Any, Dict, Iterable, List, Optional
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Tuple
 
 from ..config import settings
 from ..models import (
@@ -20,6 +20,7 @@ from ..models import (
     ComplaintStatus,
     Priority,
 )
+from .aggregates import AggregateCell, AggregateKey
 
 logger = logging.getLogger(__name__)
 
@@ -380,6 +381,80 @@ class AdvancedAnalyticsService:
 
         return results
     
+    def calculate_department_stats_from_aggregates(
+        self,
+        cells: Iterable[Tuple[AggregateKey, AggregateCell]],
+        *,
+        departments: Optional[Iterable[str]] = None,
+        audit_logs: Optional[Iterable[AuditLog]] = None,
+        complaints_by_id: Optional[Mapping[int, Complaint]] = None,
+    ) -> List[DepartmentMetrics]:
+        """Same metrics as ``calculate_department_stats``, built from materialized counters.
+
+        Only complaints reopened according to the audit trail are looked up
+        individually (via ``complaints_by_id``).
+        """
+        totals: Dict[str, AggregateCell] = defaultdict(AggregateCell)
+        by_status: Dict[Tuple[str, str], AggregateCell] = defaultdict(AggregateCell)
+        for key, cell in cells:
+            totals[key.category].merge(cell)
+            by_status[(key.category, key.status)].merge(cell)
+
+        if departments:
+            target_departments = sorted({dept for dept in departments})
+        else:
+            target_departments = sorted(totals.keys())
+
+        reopened: Dict[str, int] = defaultdict(int)
+        if complaints_by_id is not None:
+            for complaint_id, count in self._reopen_counts(audit_logs).items():
+                complaint = complaints_by_id.get(complaint_id)
+                if count <= 0 or complaint is None:
+                    continue
+                if complaint.resolved_at or complaint.status == ComplaintStatus.resolved:
+                    reopened[complaint.category] += 1
+
+        now_seconds = (datetime.utcnow() - datetime(1970, 1, 1)).total_seconds()
+        results: List[DepartmentMetrics] = []
+        for dept in target_departments:
+            cell = totals.get(dept) or AggregateCell()
+            resolved = by_status.get((dept, ComplaintStatus.resolved.value), AggregateCell()).count
+            pending = by_status.get((dept, ComplaintStatus.pending.value), AggregateCell())
+            in_progress = by_status.get((dept, ComplaintStatus.in_progress.value), AggregateCell())
+            backlog = AggregateCell()
+            backlog.merge(pending)
+            backlog.merge(in_progress)
+
+            total = cell.count
+            resolution_rate = (resolved / total * 100.0) if total else 0.0
+            avg_resolution = cell.resolution_hours / cell.resolution_count if cell.resolution_count else 0.0
+            avg_first_response = (
+                cell.first_response_hours / cell.first_response_count if cell.first_response_count else 0.0
+            )
+            avg_backlog_age = (
+                (now_seconds - backlog.created_seconds / backlog.count) / 3600 if backlog.count else 0.0
+            )
+            sla_breach_rate = (cell.sla_breaches / cell.sla_considered * 100.0) if cell.sla_considered else 0.0
+            reopen_rate = (reopened[dept] / cell.ever_resolved * 100.0) if cell.ever_resolved else 0.0
+
+            results.append(
+                DepartmentMetrics(
+                    department=dept,
+                    total=total,
+                    resolved=resolved,
+                    pending=pending.count,
+                    in_progress=in_progress.count,
+                    resolution_rate=round(resolution_rate, 1),
+                    avg_resolution_time_hours=round(avg_resolution, 1),
+                    avg_first_response_hours=round(avg_first_response, 1),
+                    sla_breach_rate=round(sla_breach_rate, 1),
+                    reopen_rate=round(reopen_rate, 1),
+                    avg_backlog_age_hours=round(avg_backlog_age, 1),
+                )
+            )
+
+        return results
+
     def generate_predictive_insights(
         self, 
         complaints: List[Complaint],
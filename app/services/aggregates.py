@@ -0,0 +1,170 @@
+"""Materialized complaint counters kept current from datastore change events."""
+from __future__ import annotations
+
+from dataclasses import dataclass, fields
+from datetime import date, datetime
+from threading import RLock
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from ..config import settings
+from ..datastore import db
+from ..models import Complaint, ComplaintStatus, Priority
+
+# First responses within this many hours count towards the KPI SLA figure.
+KPI_RESPONSE_SLA_HOURS = 48
+
+_EPOCH = datetime(1970, 1, 1)
+
+
+class AggregateKey(NamedTuple):
+    category: str
+    plant: Optional[str]
+    status: str
+    priority: str
+    kind: str
+    day: date
+
+
+@dataclass
+class AggregateCell:
+    """Additive statistics for every complaint sharing one ``AggregateKey``."""
+
+    count: int = 0
+    # Hours to first response, falling back to the earliest reply (KPI view).
+    response_count: int = 0
+    response_hours: float = 0.0
+    response_within_sla: int = 0
+    # Hours to first response from ``first_response_at`` only (department view).
+    first_response_count: int = 0
+    first_response_hours: float = 0.0
+    resolution_count: int = 0
+    resolution_hours: float = 0.0
+    sla_considered: int = 0
+    sla_breaches: int = 0
+    ever_resolved: int = 0
+    created_seconds: float = 0.0
+
+    def merge(self, other: "AggregateCell", sign: int = 1) -> None:
+        for field in fields(self):
+            setattr(self, field.name, getattr(self, field.name) + sign * getattr(other, field.name))
+
+
+def _value(raw: object) -> str:
+    return getattr(raw, "value", raw)  # type: ignore[return-value]
+
+
+def _resolution_hours(complaint: Complaint) -> Optional[float]:
+    if complaint.resolution_time_hours is not None:
+        return float(complaint.resolution_time_hours)
+    if complaint.resolved_at:
+        return (complaint.resolved_at - complaint.created_at).total_seconds() / 3600
+    return None
+
+
+def _sla_threshold(priority: Priority) -> float:
+    if _value(priority) == Priority.urgent.value:
+        return float(settings.sla_hours_urgent)
+    return float(settings.sla_hours_normal)
+
+
+def _contribution(complaint: Complaint) -> Tuple[AggregateKey, AggregateCell]:
+    key = AggregateKey(
+        category=complaint.category or "Unclassified",
+        plant=complaint.plant,
+        status=_value(complaint.status),
+        priority=_value(complaint.priority),
+        kind=_value(complaint.kind),
+        day=complaint.created_at.date(),
+    )
+    cell = AggregateCell(count=1, created_seconds=(complaint.created_at - _EPOCH).total_seconds())
+
+    response_hours: Optional[float] = None
+    if complaint.first_response_at:
+        response_hours = (complaint.first_response_at - complaint.created_at).total_seconds() / 3600
+        cell.first_response_count = 1
+        cell.first_response_hours = response_hours
+    else:
+        replies = db.list_replies_for_complaint(complaint.id)
+        if replies:
+            first_reply = min(replies, key=lambda r: r.created_at)
+            response_hours = (first_reply.created_at - complaint.created_at).total_seconds() / 3600
+    if response_hours is not None:
+        cell.response_count = 1
+        cell.response_hours = response_hours
+        cell.response_within_sla = int(response_hours <= KPI_RESPONSE_SLA_HOURS)
+
+    resolved = key.status == ComplaintStatus.resolved.value
+    resolution_hours = _resolution_hours(complaint)
+    if resolution_hours is not None:
+        cell.resolution_count = 1
+        cell.resolution_hours = resolution_hours
+        if resolved:
+            cell.sla_considered = 1
+            cell.sla_breaches = int(resolution_hours > _sla_threshold(complaint.priority))
+    cell.ever_resolved = int(resolved or complaint.resolved_at is not None)
+    return key, cell
+
+
+class ComplaintAggregates:
+    """Counters keyed by (category, plant, status, priority, kind, day).
+
+    Each complaint's last contribution is remembered so an update subtracts
+    exactly what was previously added; every change is O(1) regardless of how
+    many complaints exist.
+    """
+
+    def __init__(self) -> None:
+        self._lock = RLock()
+        self._cells: Dict[AggregateKey, AggregateCell] = {}
+        self._contributions: Dict[int, Tuple[AggregateKey, AggregateCell]] = {}
+
+    def apply(self, previous: Optional[Complaint], current: Optional[Complaint]) -> None:
+        """Datastore listener: move one complaint's contribution between cells."""
+        with self._lock:
+            complaint_id = (current or previous).id  # type: ignore[union-attr]
+            old = self._contributions.pop(complaint_id, None)
+            if old is not None:
+                key, cell = old
+                bucket = self._cells[key]
+                bucket.merge(cell, -1)
+                if bucket.count <= 0:
+                    del self._cells[key]
+            if current is not None:
+                key, cell = _contribution(current)
+                self._contributions[complaint_id] = (key, cell)
+                self._cells.setdefault(key, AggregateCell()).merge(cell)
+
+    def cells(
+        self,
+        *,
+        categories: Optional[Iterable[str]] = None,
+        since: Optional[date] = None,
+        until: Optional[date] = None,
+    ) -> List[Tuple[AggregateKey, AggregateCell]]:
+        """Return copies of the cells matching the optional category scope and day window."""
+        scope = set(categories) if categories else None
+        with self._lock:
+            return [
+                (key, AggregateCell(**vars(cell)))
+                for key, cell in self._cells.items()
+                if (scope is None or key.category in scope)
+                and (since is None or key.day >= since)
+                and (until is None or key.day <= until)
+            ]
+
+    def totals(self, **filters) -> AggregateCell:
+        total = AggregateCell()
+        for _, cell in self.cells(**filters):
+            total.merge(cell)
+        return total
+
+    def breakdown(self, field: str, **filters) -> Dict[object, AggregateCell]:
+        """Sum matching cells grouped by one key field (e.g. ``"status"``)."""
+        grouped: Dict[object, AggregateCell] = {}
+        for key, cell in self.cells(**filters):
+            grouped.setdefault(getattr(key, field), AggregateCell()).merge(cell)
+        return grouped
+
+
+complaint_aggregates = ComplaintAggregates()
+db.add_listener("complaints", complaint_aggregates.apply, replay=True)
@@ -5,23 +5,24 @@ import logging
 import re
 from collections import Counter
 from datetime import datetime
-from typing import Dict, Iterable, List, Optional, Union
+from functools import lru_cache
+from typing import Callable, Dict, Iterable, List, Optional, Union
 
-try:
-    import yaml
-except ImportError:  # pragma: no cover - optional dependency
-    yaml = None  # type: ignore[assignment]
-
-try:
-    from groq import Groq
-except ImportError:  # pragma: no cover - fallback when package missing
-    Groq = None  # type: ignore[assignment]
-
-from ..config import settings
 from ..models import Complaint, ComplaintKind, ComplaintStatus, Priority, ReportPeriod, Reply
+from .llm_gateway import gateway
 
 logger = logging.getLogger(__name__)
 
+
+@lru_cache(maxsize=1)
+def _yaml():
+    """PyYAML, imported on first use; only malformed completions need it."""
+    try:
+        import yaml
+    except ImportError:  # pragma: no cover - optional dependency
+        return None
+    return yaml
+
 CATEGORY_KEYWORDS: Dict[str, List[str]] = {
     "HR": ["harass", "manager", "leave", "promotion", "hr", "appraisal", "discipline", "supervisor"],
     "Payroll": ["salary", "payroll", "bonus", "compensation", "paycheck", "overtime", "allowance"],
@@ -125,31 +126,14 @@ COMPLAINT_MARKERS = [
 
 ALLOWED_CATEGORIES = list(CATEGORY_KEYWORDS.keys()) + ["Unclassified"]
 
+# Cache namespace for classification completions; bump when the prompt changes.
+CLASSIFICATION_CACHE = "classification:v1"
+
 
 class AIUnavailableError(Exception):
     """Raised when the external AI provider cannot produce a response."""
 
 
-_groq_client: Optional["Groq"] = None
-if Groq and settings.groq_api_key:
-    try:
-        _groq_client = Groq(api_key=settings.groq_api_key)
-        logger.info("Groq client initialized for model %s", settings.groq_model)
-    except Exception as exc:  # pragma: no cover - init error path
-        logger.warning("Failed to initialize Groq client: %s", exc)
-        _groq_client = None
-else:
-    if not Groq:
-        logger.warning("Groq SDK not installed; AI features disabled.")
-    elif not settings.groq_api_key:
-        logger.warning("Groq API key not configured; AI features disabled.")
-
-
-def get_groq_client() -> Optional["Groq"]:
-    """Expose the cached Groq client for modules that need raw access."""
-    return _groq_client
-
-
 def _match_keywords(text: str, keywords: Iterable[str]) -> int:
     pattern = "|".join(map(re.escape, keywords))
     return len(re.findall(pattern, text, flags=re.IGNORECASE)) if pattern else 0
@@ -261,6 +245,7 @@ def _parse_json_payload(content: str) -> Optional[Dict[str, object]]:
                 Path("logs/groq_last_response.json").write_text(candidate, encoding="utf-8")
             except Exception:  # pragma: no cover - best effort debug write
                 pass
+            yaml = _yaml()
             if yaml:
                 try:
                     loaded = yaml.safe_load(candidate)
@@ -272,48 +257,89 @@ def _parse_json_payload(content: str) -> Optional[Dict[str, object]]:
     return None
 
 
+DEFAULT_SYSTEM_PROMPT = "You are a helpful assistant that follows instructions precisely."
+
+
+def _build_messages(prompt: str, system_prompt: str) -> List[Dict[str, str]]:
+    messages: List[Dict[str, str]] = []
+    if system_prompt:
+        messages.append({"role": "system", "content": system_prompt})
+    messages.append({"role": "user", "content": prompt})
+    return messages
+
+
+def _json_validator(expect_json: bool) -> Optional[Callable[[str], bool]]:
+    if not expect_json:
+        return None
+    return lambda content: _parse_json_payload(content) is not None
+
+
+def _interpret_content(content: str, expect_json: bool) -> Optional[Union[str, Dict[str, object]]]:
+    if not content:
+        return None
+    if expect_json:
+        parsed = _parse_json_payload(content)
+        if parsed is not None:
+            return parsed
+        logger.warning("Groq JSON parse failed; content preview: %s", content[:200])
+        return None
+    return content
+
+
 def _invoke_groq(
     prompt: str,
     *,
     expect_json: bool,
     temperature: float,
     max_tokens: int,
-    system_prompt: str = "You are a helpful assistant that follows instructions precisely.",
+    system_prompt: str = DEFAULT_SYSTEM_PROMPT,
+    cache_namespace: Optional[str] = None,
 ) -> Optional[Union[str, Dict[str, object]]]:
-    if not _groq_client:
+    if not gateway.available:
         return None
+    try:
+        content = gateway.complete_sync(
+            _build_messages(prompt, system_prompt),
+            temperature=temperature,
+            max_tokens=max_tokens,
+            cache_namespace=cache_namespace,
+            cache_validator=_json_validator(expect_json),
+        )
+    except Exception as exc:
+        logger.warning("Groq call failed: %s", exc)
+        return None
+    return _interpret_content(content, expect_json)
+
 
+async def _ainvoke_groq(
+    prompt: str,
+    *,
+    expect_json: bool,
+    temperature: float,
+    max_tokens: int,
+    system_prompt: str = DEFAULT_SYSTEM_PROMPT,
+    cache_namespace: Optional[str] = None,
+) -> Optional[Union[str, Dict[str, object]]]:
+    if not gateway.available:
+        return None
     try:
-        messages: List[Dict[str, str]] = []
-        if system_prompt:
-            messages.append({"role": "system", "content": system_prompt})
-        messages.append({"role": "user", "content": prompt})
-
-        response = _groq_client.chat.completions.create(
-            model=settings.groq_model,
-            messages=messages,
+        content = await gateway.complete(
+            _build_messages(prompt, system_prompt),
             temperature=temperature,
             max_tokens=max_tokens,
+            cache_namespace=cache_namespace,
+            cache_validator=_json_validator(expect_json),
         )
-        if not response.choices:
-            return None
-        content = (response.choices[0].message.content or "").strip()
-        if not content:
-            return None
-        if expect_json:
-            parsed = _parse_json_payload(content)
-            if parsed is not None:
-                return parsed
-            logger.warning("Groq JSON parse failed; content preview: %s", content[:200])
-            return None
-        return content
     except Exception as exc:
         logger.warning("Groq call failed: %s", exc)
         return None
+    return _interpret_content(content, expect_json)
 
 
-def _call_groq_json(prompt: str) -> Optional[Dict[str, object]]:
-    data = _invoke_groq(prompt, expect_json=True, temperature=0.2, max_tokens=1200)
+def _call_groq_json(prompt: str, cache_namespace: Optional[str] = None) -> Optional[Dict[str, object]]:
+    data = _invoke_groq(
+        prompt, expect_json=True, temperature=0.2, max_tokens=1200, cache_namespace=cache_namespace
+    )
     return data if isinstance(data, dict) else None
 
 
@@ -448,6 +474,23 @@ def _heuristic_classification(complaint_text: str) -> Dict[str, object]:
 
 def classify_complaint(complaint_text: str) -> Dict[str, object]:
     """Run complaint classification through Groq; blend with heuristics when confidence is low."""
+    data = _call_groq_json(_classification_prompt(complaint_text), cache_namespace=CLASSIFICATION_CACHE)
+    return _blend_classification(complaint_text, data)
+
+
+async def classify_complaint_async(complaint_text: str) -> Dict[str, object]:
+    """Awaitable ``classify_complaint`` for request handlers running on the event loop."""
+    data = await _ainvoke_groq(
+        _classification_prompt(complaint_text),
+        expect_json=True,
+        temperature=0.2,
+        max_tokens=1200,
+        cache_namespace=CLASSIFICATION_CACHE,
+    )
+    return _blend_classification(complaint_text, data if isinstance(data, dict) else None)
+
+
+def _blend_classification(complaint_text: str, result: Optional[Dict[str, object]]) -> Dict[str, object]:
     heuristic = _heuristic_classification(complaint_text)
     final_category = heuristic["category"]
     final_priority = heuristic["priority"]
@@ -457,7 +500,6 @@ def classify_complaint(complaint_text: str) -> Dict[str, object]:
     final_kind_conf = heuristic["kind_confidence"]
     final_kind_reason = heuristic["kind_reason"]
 
-    result = _call_groq_json(_classification_prompt(complaint_text))
     if result:
         try:
             category = str(result.get("category", "Unclassified"))
@@ -526,7 +568,9 @@ def suggest_categories(complaint_text: str) -> List[Dict[str, object]]:
     results: List[Dict[str, object]] = []
     seen: set[str] = set()
 
-    ai_payload = _call_groq_json(_category_suggestions_prompt(complaint_text))
+    ai_payload = _call_groq_json(
+        _category_suggestions_prompt(complaint_text), cache_namespace="category-suggestions:v1"
+    )
     if ai_payload:
         raw_suggestions = ai_payload.get("suggestions") or ai_payload.get("categories")
         if isinstance(raw_suggestions, list):
@@ -691,7 +735,7 @@ def _complaint_summary_prompt(complaint: Complaint) -> str:
 
 
 def summarize_complaint(complaint: Complaint) -> Dict[str, object]:
-    data = _call_groq_json(_complaint_summary_prompt(complaint))
+    data = _call_groq_json(_complaint_summary_prompt(complaint), cache_namespace="complaint-summary:v1")
     heuristic = _heuristic_classification(complaint.complaint_text)
     heuristic_summary = complaint.complaint_text.strip()
     if len(heuristic_summary) > 400:
@@ -793,7 +837,7 @@ def _assistance_prompt(complaint: Complaint, replies: List[Reply]) -> str:
 
 
 def generate_reply_assistance(complaint: Complaint, replies: List[Reply]) -> Dict[str, object]:
-    data = _call_groq_json(_assistance_prompt(complaint, replies))
+    data = _call_groq_json(_assistance_prompt(complaint, replies), cache_namespace="reply-assistance:v1")
     if data:
         recommendations = data.get("recommended_actions") or []
         if isinstance(recommendations, str):
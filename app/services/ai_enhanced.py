@@ -1,48 +1,50 @@
 """Enhanced AI service with advanced capabilities."""
 from __future__ import annotations
 
+import asyncio
 import json
 import logging
+import time
 from collections import Counter
 from datetime import datetime
-from typing import Dict, List, Optional
-
-try:
-    from groq import Groq
-except ImportError:
-    Groq = None
+from typing import Any, Awaitable, Dict, List, Optional
 
 from ..config import settings
 from ..models import Complaint, SentimentAnalysis, SimilarComplaint, AIInsights, RootCauseInsight
 from ..datastore import db
+from .llm_gateway import gateway
+from .similarity import complaint_similarity
 
 logger = logging.getLogger(__name__)
 
 
+def _is_json(content: str) -> bool:
+    try:
+        json.loads(content)
+    except ValueError:
+        return False
+    return True
+
+
 class EnhancedAIService:
     """Enhanced AI service with sentiment analysis and insights."""
     
     def __init__(self):
-        if Groq is None:
-            logger.warning("Groq not installed, AI features will use fallbacks")
-            self.client = None
-        else:
-            api_key = getattr(settings, 'groq_api_key', None)
-            self.client = Groq(api_key=api_key) if api_key else None
         self.model = getattr(settings, 'groq_model', "llama-3.3-70b-versatile")
         self.last_root_cause_source: str = "fallback"
     
-    async def analyze_sentiment(self, text: str) -> SentimentAnalysis:
+    async def analyze_sentiment(self, text: str, *, strict: bool = False) -> SentimentAnalysis:
         """
         Analyze sentiment and emotional tone of complaint text.
         
         Args:
             text: Complaint description
+            strict: Raise on LLM or parsing errors instead of returning the fallback
             
         Returns:
             SentimentAnalysis with sentiment, emotion, and urgency
         """
-        if not self.client:
+        if not gateway.available:
             return self._fallback_sentiment()
         
         try:
@@ -59,14 +61,16 @@ Complaint text:
 
 Respond ONLY with valid JSON, no other text."""
 
-            response = self.client.chat.completions.create(
+            content = await gateway.complete(
                 messages=[{"role": "user", "content": prompt}],
                 model=self.model,
                 temperature=0.3,
-                max_tokens=500
+                max_tokens=500,
+                cache_namespace="sentiment:v1",
+                cache_validator=_is_json,
             )
             
-            result = json.loads(response.choices[0].message.content)
+            result = json.loads(content)
             
             return SentimentAnalysis(
                 sentiment=result["sentiment"],
@@ -77,6 +81,8 @@ Respond ONLY with valid JSON, no other text."""
             )
             
         except Exception as e:
+            if strict:
+                raise
             logger.error(f"Sentiment analysis failed: {e}")
             return self._fallback_sentiment()
     
@@ -136,7 +142,7 @@ Respond ONLY with valid JSON, no other text."""
                     complaint_count=count,
                     departments=departments,
                     severity=severity,
-                    confidence=0.6 if self.client is None else 0.7,
+                    confidence=0.7 if gateway.available else 0.6,
                     summary=summary,
                     recommended_actions=recommended_actions,
                 )
@@ -148,110 +154,140 @@ Respond ONLY with valid JSON, no other text."""
         self, 
         complaint: Complaint, 
         all_complaints: List[Complaint],
-        top_k: int = 5
+        top_k: int = 5,
+        *,
+        failed: Optional[List[str]] = None,
     ) -> List[SimilarComplaint]:
         """
-        Find similar complaints using AI-powered semantic matching.
+        Find similar resolved complaints.
+        
+        Neighbours come from the local similarity index, which covers every
+        resolved complaint in the datastore. When Groq is configured the
+        closest few are reranked by the LLM, which also summarises how each
+        one was resolved; otherwise the local ranking is returned as is.
         
         Args:
             complaint: Current complaint to match against
-            all_complaints: All historical complaints
+            all_complaints: All historical complaints (unused; the index tracks the datastore)
             top_k: Number of similar complaints to return
+            failed: When given, ``"similar_complaints"`` is appended to it if
+                the rerank fails and the local ranking is used instead
             
         Returns:
             List of SimilarComplaint objects
         """
-        if not self.client:
+        pool = max(top_k, settings.similarity_rerank_candidates)
+        neighbours = complaint_similarity.nearest(complaint, pool)
+        if not neighbours:
             return []
         
-        try:
-            # Filter out the current complaint and keep only resolved ones
-            candidates = [
-                c for c in all_complaints 
-                if c.id != complaint.id and c.status.value == "Resolved"
-            ]
-            complaint_map = {c.id: c for c in all_complaints}
-            
-            if not candidates:
-                return []
-            
-            # Create summary of candidates for AI
-            candidates_text = "\n\n".join([
-                f"ID: {c.id}\nText: {c.complaint_text[:200]}...\nCategory: {c.category}"
-                for c in candidates[:20]  # Limit to avoid token limits
-            ])
-            
-            prompt = f"""Given this new complaint, identify the most similar resolved complaints from the list.
+        matches = {
+            n.complaint_id: SimilarComplaint(
+                complaint_id=n.complaint_id,
+                similarity_score=n.score,
+                matched_keywords=n.matched_keywords,
+                resolution_summary=self._latest_reply_summary(n.complaint_id),
+            )
+            for n in neighbours
+        }
+        order = [n.complaint_id for n in neighbours]
+        
+        if gateway.available and settings.similarity_rerank_candidates > 1 and len(order) > 1:
+            try:
+                order = await self._rerank_similar(
+                    complaint, order[: settings.similarity_rerank_candidates], matches
+                ) + order[settings.similarity_rerank_candidates :]
+            except Exception as e:
+                logger.warning(f"Similar complaints rerank failed, using local ranking: {e}")
+                if failed is not None:
+                    failed.append("similar_complaints")
+        
+        return [matches[complaint_id] for complaint_id in order[:top_k]]
+    
+    async def _rerank_similar(
+        self,
+        complaint: Complaint,
+        candidate_ids: List[int],
+        matches: Dict[int, SimilarComplaint],
+    ) -> List[int]:
+        """Ask the LLM to reorder the local neighbours; fills in resolution summaries."""
+        candidates_text = "\n\n".join(
+            f"ID: {c.id}\nText: {c.complaint_text[:200]}...\nCategory: {c.category}"
+            for c in (db.get_complaint(cid) for cid in candidate_ids)
+            if c is not None
+        )
+        
+        prompt = f"""Given this new complaint, rank the resolved complaints below from most to least similar.
 Consider semantic similarity in description, category, and issue type.
 
 NEW COMPLAINT:
 Text: {complaint.complaint_text}
 Category: {complaint.category}
 
-HISTORICAL COMPLAINTS:
+RESOLVED COMPLAINTS:
 {candidates_text}
 
-Return top {top_k} matches in JSON format:
+Return every ID from the list in JSON format:
 {{
-  "matches": [
+  "ranking": [
     {{
       "complaint_id": ID_from_list,
-      "similarity_score": 0.0-1.0,
-      "matched_keywords": ["keyword1", "keyword2"],
       "resolution_summary": "brief summary of how it was resolved"
     }}
   ]
 }}
 
 Respond ONLY with valid JSON."""
-
-            response = self.client.chat.completions.create(
-                messages=[{"role": "user", "content": prompt}],
-                model=self.model,
-                temperature=0.5,
-                max_tokens=1000
-            )
-            
-            result = json.loads(response.choices[0].message.content)
-            
-            matches = []
-            for match in result.get("matches", []):
-                raw_id = match.get("complaint_id")
-                normalized_id: Optional[int] = None
-                if isinstance(raw_id, int):
-                    normalized_id = raw_id
-                elif isinstance(raw_id, str):
-                    digits = "".join(ch for ch in raw_id if ch.isdigit())
-                    if digits:
-                        normalized_id = int(digits)
-                if normalized_id is None or normalized_id not in complaint_map:
-                    logger.warning("Skipping similar complaint with invalid id: %s", raw_id)
-                    continue
-                matches.append(
-                    SimilarComplaint(
-                        complaint_id=normalized_id,
-                        similarity_score=float(match.get("similarity_score", 0.0)),
-                        matched_keywords=match.get("matched_keywords", []),
-                        resolution_summary=match.get("resolution_summary")
-                    )
-                )
-            return matches[:top_k]
-            
-        except Exception as e:
-            logger.error(f"Similar complaints search failed: {e}")
-            return []
+        
+        content = await gateway.complete(
+            messages=[{"role": "user", "content": prompt}],
+            model=self.model,
+            temperature=0.2,
+            max_tokens=800,
+            cache_namespace="similar-rerank:v1",
+            cache_validator=_is_json,
+        )
+        result = json.loads(content)
+        
+        ranked: List[int] = []
+        for entry in result.get("ranking", []):
+            raw_id = entry.get("complaint_id")
+            normalized_id: Optional[int] = None
+            if isinstance(raw_id, int):
+                normalized_id = raw_id
+            elif isinstance(raw_id, str):
+                digits = "".join(ch for ch in raw_id if ch.isdigit())
+                if digits:
+                    normalized_id = int(digits)
+            if normalized_id is None or normalized_id not in candidate_ids or normalized_id in ranked:
+                logger.warning("Skipping reranked complaint with invalid id: %s", raw_id)
+                continue
+            ranked.append(normalized_id)
+            summary = entry.get("resolution_summary")
+            if summary:
+                matches[normalized_id].resolution_summary = str(summary)
+        # Anything the model dropped keeps its local position after the reranked ones.
+        return ranked + [cid for cid in candidate_ids if cid not in ranked]
+    
+    def _latest_reply_summary(self, complaint_id: int) -> Optional[str]:
+        replies = db.list_replies_for_complaint(complaint_id)
+        if not replies:
+            return None
+        text = max(replies, key=lambda r: r.created_at).reply_text.strip()
+        return text if len(text) <= 200 else text[:197] + "..."
     
-    async def generate_resolution_template(self, complaint: Complaint) -> str:
+    async def generate_resolution_template(self, complaint: Complaint, *, strict: bool = False) -> str:
         """
         Generate a draft response template for admin to customize.
         
         Args:
             complaint: Complaint to generate response for
+            strict: Raise on LLM errors instead of returning the default template
             
         Returns:
             Draft response text
         """
-        if not self.client:
+        if not gateway.available:
             return self._fallback_template()
         
         try:
@@ -277,16 +313,18 @@ Keep it concise (3-4 paragraphs). Use [PLACEHOLDER] for specific details the adm
 
 Response template:"""
 
-            response = self.client.chat.completions.create(
+            content = await gateway.complete(
                 messages=[{"role": "user", "content": prompt}],
                 model=self.model,
                 temperature=0.7,
                 max_tokens=800
             )
             
-            return response.choices[0].message.content.strip()
+            return content.strip()
             
         except Exception as e:
+            if strict:
+                raise
             logger.error(f"Template generation failed: {e}")
             return self._fallback_template()
     
@@ -299,13 +337,16 @@ Thank you for bringing this to our attention. [PLACEHOLDER: Address specific con
 Best regards,
 Customer Support Team"""
     
-    async def estimate_resolution_time(self, complaint: Complaint, historical_data: List[Complaint]) -> int:
+    async def estimate_resolution_time(
+        self, complaint: Complaint, historical_data: List[Complaint], *, strict: bool = False
+    ) -> int:
         """
         Estimate resolution time in hours based on historical data.
         
         Args:
             complaint: Current complaint
             historical_data: Resolved complaints for pattern matching
+            strict: Raise on errors instead of returning the 48 hour default
             
         Returns:
             Estimated hours to resolution
@@ -333,20 +374,23 @@ Customer Support Team"""
             return int(avg_time)
             
         except Exception as e:
+            if strict:
+                raise
             logger.error(f"Resolution time estimation failed: {e}")
             return 48  # Default 48 hours
     
-    async def extract_tags(self, complaint: Complaint) -> List[str]:
+    async def extract_tags(self, complaint: Complaint, *, strict: bool = False) -> List[str]:
         """
         Extract relevant tags/keywords from complaint text.
         
         Args:
             complaint: Complaint to extract tags from
+            strict: Raise on LLM or parsing errors instead of returning no tags
             
         Returns:
             List of tag strings
         """
-        if not self.client:
+        if not gateway.available:
             return []
         
         try:
@@ -361,20 +405,48 @@ Complaint:
 
 Return ONLY a JSON array of strings: ["tag1", "tag2", "tag3"]"""
 
-            response = self.client.chat.completions.create(
+            content = await gateway.complete(
                 messages=[{"role": "user", "content": prompt}],
                 model=self.model,
                 temperature=0.4,
-                max_tokens=200
+                max_tokens=200,
+                cache_namespace="tags:v1",
+                cache_validator=_is_json,
             )
             
-            tags = json.loads(response.choices[0].message.content)
-            return tags if isinstance(tags, list) else []
+            tags = json.loads(content)
+            if not isinstance(tags, list):
+                raise ValueError(f"expected a JSON array of tags, got {type(tags).__name__}")
+            return tags
             
         except Exception as e:
+            if strict:
+                raise
             logger.error(f"Tag extraction failed: {e}")
             return []
     
+    async def _run_stage(
+        self,
+        name: str,
+        stage: Awaitable[Any],
+        fallback: Any,
+        timings: Dict[str, float],
+        failed: List[str],
+    ) -> Any:
+        """Await one analysis stage, recording its duration and substituting ``fallback`` on error."""
+        started = time.perf_counter()
+        try:
+            return await asyncio.wait_for(stage, timeout=settings.groq_timeout_seconds + 5)
+        except asyncio.TimeoutError:
+            logger.warning("Insight stage %s timed out", name)
+            failed.append(name)
+        except Exception as e:
+            logger.error(f"Insight stage {name} failed: {e}")
+            failed.append(name)
+        finally:
+            timings[name] = round((time.perf_counter() - started) * 1000, 1)
+        return fallback
+
     async def get_full_insights(
         self, 
         complaint: Complaint,
@@ -383,6 +455,13 @@ Return ONLY a JSON array of strings: ["tag1", "tag2", "tag3"]"""
         """
         Generate comprehensive AI insights for a complaint.
         
+        The independent analyses run concurrently. Stages run in strict mode,
+        so one that fails or times out contributes its fallback value and is
+        listed in ``failed_stages``; a failed rerank of similar complaints
+        keeps the local ranking but is listed too. Per-stage wall time is
+        reported in ``stage_timings_ms``. With Groq not configured the
+        fallbacks are the expected result and no stage is listed.
+        
         Args:
             complaint: Complaint to analyze
             all_complaints: All complaints for similarity matching
@@ -390,37 +469,63 @@ Return ONLY a JSON array of strings: ["tag1", "tag2", "tag3"]"""
         Returns:
             Complete AIInsights object
         """
-        try:
-            # Run analyses
-            sentiment = await self.analyze_sentiment(complaint.complaint_text)
-            similar = await self.find_similar_complaints(complaint, all_complaints)
-            template = await self.generate_resolution_template(complaint)
-            estimated_time = await self.estimate_resolution_time(complaint, all_complaints)
-            tags = await self.extract_tags(complaint)
-            
-            return AIInsights(
-                sentiment=sentiment,
-                similar_complaints=similar,
-                suggested_category=complaint.category,
-                suggested_priority=complaint.priority.value,
-                suggested_assignee=None,
-                resolution_template=template,
-                estimated_resolution_time=estimated_time,
-                tags=tags,
-                analyzed_at=datetime.utcnow()
-            )
-            
-        except Exception as e:
-            logger.error(f"Full insights generation failed: {e}")
-            raise
-
+        timings: Dict[str, float] = {}
+        failed: List[str] = []
+        started = time.perf_counter()
+        sentiment, similar, template, estimated_time, tags = await asyncio.gather(
+            self._run_stage(
+                "sentiment",
+                self.analyze_sentiment(complaint.complaint_text, strict=True),
+                self._fallback_sentiment(),
+                timings,
+                failed,
+            ),
+            self._run_stage(
+                "similar_complaints",
+                self.find_similar_complaints(complaint, all_complaints, failed=failed),
+                [],
+                timings,
+                failed,
+            ),
+            self._run_stage(
+                "resolution_template",
+                self.generate_resolution_template(complaint, strict=True),
+                self._fallback_template(),
+                timings,
+                failed,
+            ),
+            self._run_stage(
+                "estimated_resolution_time",
+                self.estimate_resolution_time(complaint, all_complaints, strict=True),
+                48,
+                timings,
+                failed,
+            ),
+            self._run_stage("tags", self.extract_tags(complaint, strict=True), [], timings, failed),
+        )
+        timings["total"] = round((time.perf_counter() - started) * 1000, 1)
+
+        return AIInsights(
+            sentiment=sentiment,
+            similar_complaints=similar,
+            suggested_category=complaint.category,
+            suggested_priority=complaint.priority.value,
+            suggested_assignee=None,
+            resolution_template=template,
+            estimated_resolution_time=estimated_time,
+            tags=tags,
+            analyzed_at=datetime.utcnow(),
+            stage_timings_ms=timings,
+            failed_stages=sorted(failed),
+        )
+
     async def generate_root_cause_insights(self, complaints: List[Complaint]) -> List[RootCauseInsight]:
         """Generate root cause insights for the current complaint dataset."""
         if not complaints:
             self.last_root_cause_source = "fallback"
             return []
 
-        if not self.client:
+        if not gateway.available:
             logger.warning("AI client not available, using heuristic root cause analysis")
             return self._fallback_root_causes(complaints)
 
@@ -486,14 +591,13 @@ Return ONLY a JSON array of strings: ["tag1", "tag2", "tag3"]"""
                 "Respond with JSON only."
             )
 
-            response = self.client.chat.completions.create(
+            raw_content = await gateway.complete(
                 messages=[{"role": "user", "content": prompt}],
                 model=self.model,
                 temperature=0.4,
                 max_tokens=1500,
             )
 
-            raw_content = response.choices[0].message.content
             parsed = json.loads(raw_content)
 
             if isinstance(parsed, dict):
@@ -564,7 +668,7 @@ Return ONLY a JSON array of strings: ["tag1", "tag2", "tag3"]"""
         Returns:
             List of recommendation dictionaries with actionable insights
         """
-        if not self.client:
+        if not gateway.available:
             logger.warning("AI client not available, using fallback recommendations")
             return []
         
@@ -648,7 +752,7 @@ Focus on:
 
 Respond ONLY with valid JSON array, no other text."""
 
-            response = self.client.chat.completions.create(
+            content = await gateway.complete(
                 messages=[{"role": "user", "content": prompt}],
                 model=self.model,
                 temperature=0.7,
@@ -656,7 +760,7 @@ Respond ONLY with valid JSON array, no other text."""
             )
             
             # Parse AI response
-            recommendations = json.loads(response.choices[0].message.content)
+            recommendations = json.loads(content)
             
             # Validate and return
             if isinstance(recommendations, list):
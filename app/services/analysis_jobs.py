@@ -0,0 +1,253 @@
+"""Background job that enriches every complaint with AI insights.
+
+``POST /api/complaints/analyze-all`` used to analyse complaints one at a time
+inside the request. The work now runs on a job thread with a small pool of
+worker coroutines; results are committed to the datastore in batches and the
+job state is checkpointed after every batch so an interrupted run resumes on
+the next start-up.
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import os
+import random
+import uuid
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+from threading import Event, Lock, Thread
+from typing import Any, Dict, List, Optional, Tuple
+
+from ..config import settings
+from ..datastore import db
+from ..models import AIInsights, Complaint
+from .ai_enhanced import enhanced_ai_service
+from .llm_gateway import gateway
+
+logger = logging.getLogger(__name__)
+
+MAX_BACKOFF_SECONDS = 60.0
+ACTIVE_STATUSES = {"queued", "running"}
+
+
+@dataclass
+class AnalysisJob:
+    id: str
+    status: str = "queued"
+    total: int = 0
+    analyzed: int = 0
+    skipped: int = 0
+    failed: List[int] = field(default_factory=list)
+    pending: List[int] = field(default_factory=list)
+    requested_by: Optional[str] = None
+    created_at: datetime = field(default_factory=datetime.utcnow)
+    updated_at: datetime = field(default_factory=datetime.utcnow)
+    finished_at: Optional[datetime] = None
+    error: Optional[str] = None
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "job_id": self.id,
+            "status": self.status,
+            "total": self.total,
+            "processed": self.analyzed + self.skipped + len(self.failed),
+            "remaining": len(self.pending),
+            "analyzed": self.analyzed,
+            "skipped": self.skipped,
+            "failed": list(self.failed),
+            "created_at": self.created_at,
+            "updated_at": self.updated_at,
+            "finished_at": self.finished_at,
+            "error": self.error,
+        }
+
+    def to_checkpoint(self) -> Dict[str, Any]:
+        payload = asdict(self)
+        for key in ("created_at", "updated_at", "finished_at"):
+            if payload[key] is not None:
+                payload[key] = payload[key].isoformat()
+        return payload
+
+    @classmethod
+    def from_checkpoint(cls, payload: Dict[str, Any]) -> "AnalysisJob":
+        data = dict(payload)
+        for key in ("created_at", "updated_at", "finished_at"):
+            if data.get(key):
+                data[key] = datetime.fromisoformat(data[key])
+        return cls(**data)
+
+
+class AnalysisJobRunner:
+    """Runs at most one analyze-all job at a time."""
+
+    def __init__(self) -> None:
+        path = settings.data_store_path
+        self._checkpoint_path = path.with_name(f"{path.stem}.analysis_job.json")
+        self._lock = Lock()
+        self._job: Optional[AnalysisJob] = None
+        self._thread: Optional[Thread] = None
+        self._stop = Event()
+
+    # Public API ----------------------------------------------------------
+    def start(self, requested_by: Optional[str] = None) -> AnalysisJob:
+        """Start a new job, or return the one already in progress."""
+        with self._lock:
+            if self._job is not None and self._job.status in ACTIVE_STATUSES:
+                return self._job
+            complaints = db.list_complaints()
+            pending = [c.id for c in complaints if not c.ai_insights]
+            job = AnalysisJob(
+                id=uuid.uuid4().hex,
+                total=len(complaints),
+                skipped=len(complaints) - len(pending),
+                pending=pending,
+                requested_by=requested_by,
+            )
+            self._launch(job)
+            return job
+
+    def get(self, job_id: str) -> Optional[AnalysisJob]:
+        job = self._job
+        if job is not None and job.id == job_id:
+            return job
+        return None
+
+    def current(self) -> Optional[AnalysisJob]:
+        return self._job
+
+    def resume_interrupted(self) -> Optional[AnalysisJob]:
+        """Restart a job whose checkpoint shows it was still running at shutdown."""
+        try:
+            payload = json.loads(self._checkpoint_path.read_text(encoding="utf-8"))
+            job = AnalysisJob.from_checkpoint(payload)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError, TypeError) as exc:
+            logger.warning("Ignoring unreadable analysis checkpoint %s: %s", self._checkpoint_path, exc)
+            return None
+        with self._lock:
+            self._job = job
+            if job.status not in ACTIVE_STATUSES:
+                return job
+            job.pending = [cid for cid in job.pending if (c := db.get_complaint(cid)) and not c.ai_insights]
+            logger.info("Resuming analysis job %s with %s complaints left", job.id, len(job.pending))
+            self._launch(job)
+            return job
+
+    def stop(self, timeout: float = 10.0) -> None:
+        """Ask workers to finish their current item; the checkpoint keeps the job resumable."""
+        self._stop.set()
+        thread = self._thread
+        if thread is not None:
+            thread.join(timeout=timeout)
+
+    # Internals -----------------------------------------------------------
+    def _launch(self, job: AnalysisJob) -> None:
+        self._job = job
+        self._stop.clear()
+        self._checkpoint(job)
+        self._thread = Thread(target=self._run_thread, args=(job,), name="analysis-job", daemon=True)
+        self._thread.start()
+
+    def _checkpoint(self, job: AnalysisJob) -> None:
+        job.updated_at = datetime.utcnow()
+        tmp_path = self._checkpoint_path.with_suffix(".tmp")
+        try:
+            tmp_path.write_text(json.dumps(job.to_checkpoint()), encoding="utf-8")
+            os.replace(tmp_path, self._checkpoint_path)
+        except OSError as exc:  # pragma: no cover - disk errors only
+            logger.warning("Failed to write analysis checkpoint: %s", exc)
+
+    def _run_thread(self, job: AnalysisJob) -> None:
+        job.status = "running"
+        try:
+            asyncio.run(self._run(job))
+        except Exception as exc:  # pragma: no cover - unexpected failure
+            logger.exception("Analysis job %s failed", job.id)
+            job.status = "failed"
+            job.error = str(exc)
+            job.finished_at = datetime.utcnow()
+        self._checkpoint(job)
+        logger.info(
+            "Analysis job %s %s: analyzed=%s skipped=%s failed=%s remaining=%s",
+            job.id,
+            job.status,
+            job.analyzed,
+            job.skipped,
+            len(job.failed),
+            len(job.pending),
+        )
+
+    async def _run(self, job: AnalysisJob) -> None:
+        corpus = db.list_complaints()
+        queue: asyncio.Queue[int] = asyncio.Queue()
+        for complaint_id in job.pending:
+            queue.put_nowait(complaint_id)
+        buffer: List[Tuple[int, Optional[AIInsights]]] = []
+
+        async def worker() -> None:
+            while not self._stop.is_set():
+                try:
+                    complaint_id = queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+                buffer.append((complaint_id, await self._analyze(complaint_id, corpus)))
+                if len(buffer) >= settings.analysis_job_batch_size:
+                    self._commit(job, buffer)
+                    buffer.clear()
+
+        await asyncio.gather(*(worker() for _ in range(settings.analysis_job_concurrency)))
+        if buffer:
+            self._commit(job, buffer)
+        if not self._stop.is_set():
+            job.status = "completed"
+            job.finished_at = datetime.utcnow()
+
+    async def _analyze(self, complaint_id: int, corpus: List[Complaint]) -> Optional[AIInsights]:
+        attempts = settings.analysis_job_max_attempts
+        for attempt in range(1, attempts + 1):
+            complaint = db.get_complaint(complaint_id)
+            if complaint is None:
+                return None
+            cooldown = gateway.cooldown_remaining()
+            if cooldown:
+                await asyncio.sleep(cooldown)
+            rate_limits_before = gateway.rate_limit_events
+            try:
+                insights = await enhanced_ai_service.get_full_insights(complaint, corpus)
+            except Exception as exc:
+                logger.warning("Analysis attempt %s/%s for %s failed: %s", attempt, attempts, complaint_id, exc)
+            else:
+                # Stages fall back silently when throttled, so a rate-limit
+                # event during the call means the result is not trustworthy.
+                if gateway.rate_limit_events == rate_limits_before:
+                    return insights
+                logger.info("Analysis of %s was rate limited (attempt %s/%s)", complaint_id, attempt, attempts)
+            if attempt < attempts:
+                backoff = min(MAX_BACKOFF_SECONDS, 2.0 ** attempt)
+                await asyncio.sleep(max(backoff + random.uniform(0, 1), gateway.cooldown_remaining()))
+        return None
+
+    def _commit(self, job: AnalysisJob, results: List[Tuple[int, Optional[AIInsights]]]) -> None:
+        done = set()
+        with db.batch():
+            for complaint_id, insights in results:
+                done.add(complaint_id)
+                complaint = db.get_complaint(complaint_id)
+                if complaint is None:
+                    job.skipped += 1
+                    continue
+                if insights is None:
+                    job.failed.append(complaint_id)
+                    continue
+                history = list(complaint.sentiment_history or [])
+                if insights.sentiment:
+                    history.append(insights.sentiment)
+                db.update_complaint(complaint_id, ai_insights=insights, sentiment_history=history)
+                job.analyzed += 1
+        job.pending = [cid for cid in job.pending if cid not in done]
+        self._checkpoint(job)
+
+
+analysis_jobs = AnalysisJobRunner()
@@ -6,40 +6,39 @@ from typing import Dict, List, Optional
 
 from ..datastore import db
 from ..models import ComplaintKind, ComplaintStatus
-from . import assignment
+from .aggregates import complaint_aggregates
 
 
 def dashboard_snapshot(categories: Optional[List[str]] = None) -> Dict[str, object]:
-    assignment.refresh_all_complaints()
-    complaints = db.list_complaints()
-    if categories:
-        complaints = [complaint for complaint in complaints if complaint.category in categories]
-    total = len(complaints)
-    complaint_items = [c for c in complaints if c.kind == ComplaintKind.complaint]
-    feedback_items = [c for c in complaints if c.kind == ComplaintKind.feedback]
-    total_complaints = len(complaint_items)
-    total_feedback = len(feedback_items)
-    resolved = len([c for c in complaints if c.status == ComplaintStatus.resolved])
-    pending = len([c for c in complaints if c.status == ComplaintStatus.pending])
-    in_progress = len([c for c in complaints if c.status == ComplaintStatus.in_progress])
-    unclassified = len([c for c in complaints if c.category == "Unclassified"])
-    urgent = len([c for c in complaints if c.priority.value == "urgent"])
-
-    category_counter = Counter(c.category for c in complaints)
+    cells = complaint_aggregates.cells(categories=categories)
+    total = 0
+    status_counter: Counter = Counter()
+    kind_counter: Counter = Counter()
+    category_counter: Counter = Counter()
+    urgent = 0
+    for key, cell in cells:
+        total += cell.count
+        status_counter[key.status] += cell.count
+        kind_counter[key.kind] += cell.count
+        category_counter[key.category] += cell.count
+        if key.priority == "urgent":
+            urgent += cell.count
+    total_complaints = kind_counter[ComplaintKind.complaint.value]
+    total_feedback = kind_counter[ComplaintKind.feedback.value]
     return {
         "total": total,
         "total_complaints": total_complaints,
         "total_feedback": total_feedback,
-        "resolved": resolved,
-        "pending": pending,
-        "in_progress": in_progress,
-        "unclassified": unclassified,
+        "resolved": status_counter[ComplaintStatus.resolved.value],
+        "pending": status_counter[ComplaintStatus.pending.value],
+        "in_progress": status_counter[ComplaintStatus.in_progress.value],
+        "unclassified": category_counter["Unclassified"],
         "urgent": urgent,
         "by_kind": {
             ComplaintKind.complaint.value: total_complaints,
             ComplaintKind.feedback.value: total_feedback,
         },
-        "by_category": dict(category_counter),
+        "by_category": {name: count for name, count in category_counter.items() if count},
     }
 
 
@@ -57,7 +56,6 @@ def complaint_trends(
         total: number of tickets created in the bucket
         resolved: number of tickets resolved in the bucket
     """
-    assignment.refresh_all_complaints()
     complaints = db.list_complaints()
     if categories:
         complaints = [c for c in complaints if c.category in categories]
@@ -1,14 +1,23 @@
 from __future__ import annotations
 
 import logging
+import re
+from dataclasses import dataclass
 from datetime import datetime, timedelta
-from typing import Dict, Iterable, Optional
+from threading import Event, Lock, Thread
+from typing import Dict, Iterable, List, Optional, Pattern, Set
 
 from ..datastore import db
 from ..models import Complaint, ComplaintStatus, Priority
 
 logger = logging.getLogger(__name__)
 
+# Complaint fields that feed the routing rules; a change to any of them makes
+# the complaint's assignment stale.
+_ROUTING_FIELDS = ("complaint_text", "category", "priority", "plant")
+# User fields that affect which admin a rule resolves to.
+_ROSTER_FIELDS = ("username", "role", "department", "plant")
+
 
 def _resolve_user_id(username: str) -> Optional[int]:
     user = db.get_user_by_username(username)
@@ -45,6 +54,64 @@ DEFAULT_ASSIGNMENT = {
 }
 
 
+@dataclass(frozen=True)
+class CompiledRule:
+    """An assignment rule with its keyword list folded into one regex."""
+
+    name: str
+    assign_to: str
+    note: str
+    keywords: Optional[Pattern[str]] = None
+    category: Optional[str] = None
+    priority: Optional[Priority] = None
+
+    def matches(self, complaint: Complaint) -> bool:
+        if self.keywords is not None and not self.keywords.search(complaint.complaint_text):
+            return False
+        if self.category is not None and complaint.category != self.category:
+            return False
+        if self.priority is not None and complaint.priority != self.priority:
+            return False
+        return True
+
+    def as_rule(self) -> Dict[str, object]:
+        return {"name": self.name, "assign_to": self.assign_to, "note": self.note}
+
+
+def compile_rules(rules: Iterable[Dict[str, object]]) -> List[CompiledRule]:
+    compiled: List[CompiledRule] = []
+    for rule in rules:
+        keywords = rule.get("keywords")
+        pattern = None
+        if keywords:
+            pattern = re.compile(
+                "|".join(re.escape(str(keyword)) for keyword in keywords),  # type: ignore[union-attr]
+                re.IGNORECASE,
+            )
+        compiled.append(
+            CompiledRule(
+                name=str(rule["name"]),
+                assign_to=str(rule["assign_to"]),
+                note=str(rule["note"]),
+                keywords=pattern,
+                category=rule.get("category"),  # type: ignore[arg-type]
+                priority=rule.get("priority"),  # type: ignore[arg-type]
+            )
+        )
+    return compiled
+
+
+_compiled_rules: List[CompiledRule] = compile_rules(ASSIGNMENT_RULES)
+
+
+def set_rules(rules: Iterable[Dict[str, object]]) -> None:
+    """Replace the routing rules and re-evaluate every complaint in the background."""
+    global ASSIGNMENT_RULES, _compiled_rules
+    ASSIGNMENT_RULES = list(rules)
+    _compiled_rules = compile_rules(ASSIGNMENT_RULES)
+    mark_all_dirty()
+
+
 def _build_plant_assignment(complaint: Complaint) -> Optional[Dict[str, object]]:
     if not complaint.category:
         return None
@@ -64,11 +131,6 @@ def _build_plant_assignment(complaint: Complaint) -> Optional[Dict[str, object]]
     return _build_assignment_update(complaint, rule)
 
 
-def _match_keywords(text: str, keywords: Iterable[str]) -> bool:
-    lower = text.lower()
-    return any(keyword in lower for keyword in keywords)
-
-
 def _should_auto_assign(complaint: Complaint) -> bool:
     if complaint.assigned_to is None:
         return True
@@ -82,15 +144,9 @@ def _determine_assignment(complaint: Complaint) -> Optional[Dict[str, object]]:
     if not _should_auto_assign(complaint):
         return None
 
-    text = complaint.complaint_text
-    for rule in ASSIGNMENT_RULES:
-        if "keywords" in rule and not _match_keywords(text, rule["keywords"]):  # type: ignore[arg-type]
-            continue
-        if "category" in rule and complaint.category != rule["category"]:
-            continue
-        if "priority" in rule and complaint.priority != rule["priority"]:
-            continue
-        return _build_assignment_update(complaint, rule)
+    for rule in _compiled_rules:
+        if rule.matches(complaint):
+            return _build_assignment_update(complaint, rule.as_rule())
 
     plant_assignment = _build_plant_assignment(complaint)
     if plant_assignment:
@@ -122,19 +178,29 @@ def _build_assignment_update(complaint: Complaint, rule: Dict[str, object]) -> O
 
 
 def apply_rules(complaint: Complaint) -> Complaint:
-    """Apply assignment rules to a single complaint."""
-    updates: Dict[str, object] = {}
+    """Apply assignment rules to a single complaint.
 
-    assignment_updates = _determine_assignment(complaint)
-    if assignment_updates:
-        updates.update(assignment_updates)
+    The complaint is re-read, evaluated and updated under the datastore lock,
+    so an assignment is never computed from a copy that another thread has
+    since changed; such a change re-marks the complaint dirty afterwards.
+    """
+    with db.batch():
+        _queue.discard(complaint.id)
+        current = db.get_complaint(complaint.id)
+        if current is None:
+            return complaint
+        updates: Dict[str, object] = {}
 
-    if updates:
-        updated = db.update_complaint(complaint.id, **updates)
-        if updated:
-            logger.info("Applied assignment updates for complaint %s", complaint.id)
-            return updated
-    return complaint
+        assignment_updates = _determine_assignment(current)
+        if assignment_updates:
+            updates.update(assignment_updates)
+
+        if updates:
+            updated = db.update_complaint(current.id, **updates)
+            if updated:
+                logger.info("Applied assignment updates for complaint %s", current.id)
+                return updated
+        return current
 
 
 def refresh_all_complaints() -> None:
@@ -142,3 +208,96 @@ def refresh_all_complaints() -> None:
     complaints = db.list_complaints()
     for complaint in complaints:
         apply_rules(complaint)
+
+
+class _DirtyQueue:
+    """Set of complaint ids awaiting re-assignment, drained by a daemon thread."""
+
+    def __init__(self) -> None:
+        self._ids: Set[int] = set()
+        self._lock = Lock()
+        self._wakeup = Event()
+        self._thread: Optional[Thread] = None
+
+    def add(self, complaint_ids: Iterable[int]) -> None:
+        with self._lock:
+            self._ids.update(complaint_ids)
+            if self._thread is None:
+                self._thread = Thread(target=self._run, name="assignment-drain", daemon=True)
+                self._thread.start()
+        self._wakeup.set()
+
+    def discard(self, complaint_id: int) -> None:
+        with self._lock:
+            self._ids.discard(complaint_id)
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def drain(self) -> int:
+        with self._lock:
+            pending, self._ids = self._ids, set()
+        applied = 0
+        for complaint_id in sorted(pending):
+            complaint = db.get_complaint(complaint_id)
+            if complaint is None:
+                continue
+            try:
+                apply_rules(complaint)
+                applied += 1
+            except Exception:  # pragma: no cover - keep draining other complaints
+                logger.exception("Auto-assignment failed for complaint %s", complaint_id)
+        return applied
+
+    def _run(self) -> None:
+        while True:
+            self._wakeup.wait()
+            self._wakeup.clear()
+            self.drain()
+
+
+_queue = _DirtyQueue()
+
+
+def mark_dirty(complaint_ids: Iterable[int]) -> None:
+    """Schedule complaints for background re-assignment."""
+    _queue.add(complaint_ids)
+
+
+def mark_all_dirty() -> None:
+    mark_dirty(list(db.complaints.keys()))
+
+
+def drain_dirty() -> int:
+    """Re-assign every pending complaint synchronously; returns how many were evaluated."""
+    return _queue.drain()
+
+
+def pending_count() -> int:
+    return len(_queue)
+
+
+def _on_complaint_change(previous: Optional[Complaint], current: Optional[Complaint]) -> None:
+    if current is None:
+        _queue.discard(previous.id)  # type: ignore[union-attr]
+        return
+    if previous is None:
+        mark_dirty([current.id])
+        return
+    if any(getattr(previous, field) != getattr(current, field) for field in _ROUTING_FIELDS):
+        mark_dirty([current.id])
+    elif current.assigned_to is None and previous.assigned_to is not None:
+        mark_dirty([current.id])
+
+
+def _on_user_change(previous: Optional[dict], current: Optional[dict]) -> None:
+    if previous is not None and current is not None:
+        if all(previous.get(field) == current.get(field) for field in _ROSTER_FIELDS):
+            return
+    # Rules resolve assignees by username and department, so any roster change
+    # can reroute complaints anywhere; re-evaluate the lot off the request path.
+    mark_all_dirty()
+
+
+db.add_listener("complaints", _on_complaint_change)
+db.add_listener("users", _on_user_change)
@@ -1,50 +1,23 @@
 from __future__ import annotations
 
-from datetime import datetime, timedelta
-from secrets import token_urlsafe
-from typing import Dict, Optional
+import time
+from typing import Dict, Optional, Tuple
 
 from fastapi import HTTPException, status
+from fastapi.concurrency import run_in_threadpool
 
 from ..config import settings
 from ..datastore import db
-from ..security import verify_password, needs_rehash, hash_password
-
-
-class TokenStore:
-    def __init__(self) -> None:
-        self.tokens: Dict[str, Dict[str, object]] = {}
-
-    def issue(self, user_id: int, token_type: str, minutes: int) -> str:
-        token = token_urlsafe(32)
-        self.tokens[token] = {
-            "user_id": user_id,
-            "type": token_type,
-            "expires_at": datetime.utcnow() + timedelta(minutes=minutes),
-        }
-        return token
-
-    def verify(self, token: str, expected_type: str = "access") -> Optional[int]:
-        payload = self.tokens.get(token)
-        if not payload:
-            return None
-        if payload["type"] != expected_type:
-            return None
-        if payload["expires_at"] < datetime.utcnow():
-            self.tokens.pop(token, None)
-            return None
-        return payload["user_id"]
-
-    def revoke(self, token: str) -> None:
-        self.tokens.pop(token, None)
-
-
-token_store = TokenStore()
+from ..security import needs_rehash
+from .passwords import password_hasher
+from .tokens import token_store
 
 
 class AuthService:
     def __init__(self) -> None:
         self.settings = settings
+        # user id -> (expires at, serialized user); invalidated on user changes.
+        self._principals: Dict[int, Tuple[float, Dict[str, object]]] = {}
 
     @staticmethod
     def _serialize_user(user: dict) -> Dict[str, object]:
@@ -60,26 +33,24 @@ class AuthService:
             "updated_at": user["updated_at"],
         }
 
-    def login(self, username: str, password: str) -> Dict[str, object]:
-        user = db.get_user_by_username(username)
+    async def login(self, username: str, password: str) -> Dict[str, object]:
+        # Only the hashing is awaited here; datastore and token-store calls
+        # can write to disk, so they run on the threadpool like a sync handler.
+        user = await run_in_threadpool(db.get_user_by_username, username)
         if not user:
             raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found")
         
-        if not verify_password(password, user["password_hash"]):
+        if not await password_hasher.verify_async(password, user["password_hash"]):
             raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid credentials")
         # Seamless migration: if legacy hash, upgrade to bcrypt after successful login
         if needs_rehash(user["password_hash"]):
             try:
-                new_hash = hash_password(password)
-                db.update_user(user["id"], password_hash=new_hash)
-                user = db.get_user(user["id"]) or user
+                new_hash = await password_hasher.hash_async(password)
+                user = await run_in_threadpool(self._store_password_hash, user, new_hash)
             except Exception:
                 # Do not fail login due to rehash issues; proceed with legacy hash
                 pass
-        access = token_store.issue(user_id=user["id"], token_type="access", minutes=settings.token_exp_minutes)
-        refresh = token_store.issue(
-            user_id=user["id"], token_type="refresh", minutes=settings.refresh_token_exp_minutes
-        )
+        access, refresh = await run_in_threadpool(self._issue_tokens, user["id"])
         return {
             "access_token": access,
             "refresh_token": refresh,
@@ -87,6 +58,19 @@ class AuthService:
             "user": self._serialize_user(user),
         }
 
+    @staticmethod
+    def _store_password_hash(user: dict, password_hash: str) -> dict:
+        db.update_user(user["id"], password_hash=password_hash)
+        return db.get_user(user["id"]) or user
+
+    @staticmethod
+    def _issue_tokens(user_id: int) -> Tuple[str, str]:
+        access = token_store.issue(user_id=user_id, token_type="access", minutes=settings.token_exp_minutes)
+        refresh = token_store.issue(
+            user_id=user_id, token_type="refresh", minutes=settings.refresh_token_exp_minutes
+        )
+        return access, refresh
+
     def refresh(self, refresh_token: str) -> Dict[str, object]:
         user_id = token_store.verify(refresh_token, expected_type="refresh")
         if not user_id:
@@ -98,13 +82,30 @@ class AuthService:
         token_store.revoke(token)
 
     def get_user_from_token(self, token: str) -> dict:
+        """Resolve an access token to the serialized user; the result is shared and read-only."""
         user_id = token_store.verify(token, expected_type="access")
         if not user_id:
             raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid or expired token")
+        now = time.monotonic()
+        cached = self._principals.get(user_id)
+        if cached is not None and cached[0] > now:
+            return cached[1]
         user = db.get_user(user_id)
         if not user:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
-        return self._serialize_user(user)
+        principal = self._serialize_user(user)
+        self._principals[user_id] = (now + settings.auth_principal_cache_seconds, principal)
+        return principal
+
+    def apply_user_change(self, previous: Optional[dict], current: Optional[dict]) -> None:
+        """Datastore listener: drop cached principals, and a deleted user's tokens."""
+        user = current or previous
+        if user is None:
+            return
+        self._principals.pop(user["id"], None)
+        if current is None:
+            token_store.revoke_user(user["id"])
 
 
 auth_service = AuthService()
+db.add_listener("users", auth_service.apply_user_change)
@@ -1,17 +1,38 @@
 from __future__ import annotations
 
+import json
 import logging
+import random
 import smtplib
-import ssl
+import time
 from dataclasses import dataclass, field
 from email.message import EmailMessage as MIMEEmailMessage
-from typing import Dict, Iterable, List, Optional
+from threading import Event, Lock, Thread
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
 from datetime import datetime, timedelta
 
 from ..config import settings
+from .email_outbox import EmailOutbox, OutboxEntry
+from .email_templates import EmailContent, render_email
+from .smtp_pool import SMTPConnectionPool
 
 logger = logging.getLogger(__name__)
 
+# Outbox entries claimed per round trip, by workers and the retry job alike.
+DELIVERY_BATCH_SIZE = 20
+MAX_DELIVERY_ATTEMPTS = 5
+MAX_BACKOFF_MINUTES = 60
+# Upper bounds, in milliseconds, of the send latency histogram buckets.
+LATENCY_BUCKETS_MS = (100, 250, 500, 1000, 2500, 5000, 10000)
+# Failures that leave the SMTP session usable for the next message.
+MESSAGE_REJECTED_ERRORS = (
+    smtplib.SMTPRecipientsRefused,
+    smtplib.SMTPSenderRefused,
+    smtplib.SMTPDataError,
+)
+
+DeliveryListener = Callable[[Dict[str, Any], bool], None]
+
 
 @dataclass
 class EmailPayload:
@@ -34,17 +55,83 @@ class EmailPayload:
             f"has_html={bool(self.html)}, has_text={bool(self.text)})"
         )
 
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "to": list(self.to),
+            "subject": self.subject,
+            "html": self.html,
+            "text": self.text,
+            "headers": dict(self.headers),
+        }
+
+    @classmethod
+    def from_dict(cls, payload: Dict[str, Any]) -> "EmailPayload":
+        return cls(**payload)
+
 
 @dataclass
-class QueuedEmail:
-    payload: EmailPayload
-    attempts: int = 0
-    last_error: Optional[str] = None
-    next_run: datetime = field(default_factory=datetime.utcnow)
+class DeliveryOutcome:
+    """Result of one message in a batch send."""
+
+    recipient: str
+    sent: bool
+    error: Optional[str] = None
+    retry_queued: bool = False
+
+
+class DeliveryMetrics:
+    """Process-local delivery counters and a histogram of SMTP send latency."""
+
+    def __init__(self) -> None:
+        self._lock = Lock()
+        self.sent = 0
+        self.retried = 0
+        self.abandoned = 0
+        self._buckets = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+        self._latency_total_ms = 0.0
+
+    def observe_send(self, elapsed_ms: float) -> None:
+        index = next(
+            (i for i, bound in enumerate(LATENCY_BUCKETS_MS) if elapsed_ms <= bound),
+            len(LATENCY_BUCKETS_MS),
+        )
+        with self._lock:
+            self.sent += 1
+            self._buckets[index] += 1
+            self._latency_total_ms += elapsed_ms
+
+    def count_retry(self) -> None:
+        with self._lock:
+            self.retried += 1
+
+    def count_abandoned(self) -> None:
+        with self._lock:
+            self.abandoned += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            labels = [f"le_{bound}ms" for bound in LATENCY_BUCKETS_MS] + ["inf"]
+            return {
+                "sent": self.sent,
+                "retried": self.retried,
+                "abandoned": self.abandoned,
+                "send_latency_ms": {
+                    "buckets": dict(zip(labels, self._buckets)),
+                    "count": self.sent,
+                    "avg": round(self._latency_total_ms / self.sent, 1) if self.sent else 0.0,
+                },
+            }
 
 
 class EmailService:
-    """SMTP-backed email service with graceful fallback to logging."""
+    """SMTP-backed email service with graceful fallback to logging.
+
+    ``send`` delivers synchronously. ``queue`` persists the message to the
+    outbox and returns at once; background workers started by ``start`` send
+    it over pooled SMTP sessions. Failed deliveries stay in the outbox with an
+    exponential, jittered backoff and are retried by ``process_queue``, which
+    the scheduler runs periodically.
+    """
 
     def __init__(self) -> None:
         self._host = settings.smtp_host
@@ -53,16 +140,23 @@ class EmailService:
         self._password = settings.smtp_pass
         self._from = settings.email_from
         self._enabled = bool(self._host and self._port and self._user and self._password)
-        self._queue: List[QueuedEmail] = []
-
-    def send(self, message: EmailPayload) -> bool:
-        if not self._enabled:
-            logger.info(
-                "Email skipped; SMTP credentials missing.",
-                extra={"mail_to": list(message.to), "mail_subject": message.subject},
-            )
-            return False
+        self.metrics = DeliveryMetrics()
+        self._pool = SMTPConnectionPool(
+            self._host,
+            self._port,
+            user=self._user,
+            password=self._password,
+            size=settings.smtp_pool_size,
+        )
+        path = settings.data_store_path
+        self._outbox = EmailOutbox(path.with_name(f"{path.stem}.email_outbox.sqlite3"))
+        self._listeners: List[DeliveryListener] = []
+        self._workers: List[Thread] = []
+        self._state_lock = Lock()
+        self._wake = Event()
+        self._stop = Event()
 
+    def _build_message(self, message: EmailPayload) -> MIMEEmailMessage:
         mail = MIMEEmailMessage()
         mail["Subject"] = message.subject
         mail["From"] = self._from
@@ -77,23 +171,20 @@ class EmailService:
 
         if message.html:
             mail.add_alternative(message.html, subtype="html")
+        return mail
+
+    def send(self, message: EmailPayload) -> bool:
+        if not self._enabled:
+            logger.info(
+                "Email skipped; SMTP credentials missing.",
+                extra={"mail_to": list(message.to), "mail_subject": message.subject},
+            )
+            return False
 
+        mail = self._build_message(message)
         try:
-            if self._port == 465:
-                context = ssl.create_default_context()
-                with smtplib.SMTP_SSL(self._host, self._port, context=context) as server:
-                    server.login(self._user, self._password)
-                    server.send_message(mail)
-            else:
-                with smtplib.SMTP(self._host, self._port) as server:
-                    server.ehlo()
-                    try:
-                        server.starttls(context=ssl.create_default_context())
-                        server.ehlo()
-                    except smtplib.SMTPException:
-                        logger.debug("SMTP server does not support STARTTLS; continuing without TLS.")
-                    server.login(self._user, self._password)
-                    server.send_message(mail)
+            with self._pool.session() as server:
+                self._send_timed(server, mail)
             logger.info(
                 "Email sent",
                 extra={
@@ -108,64 +199,329 @@ class EmailService:
             logger.error("SMTP send failed", extra={"error": str(exc)})
             return False
 
-    def send_with_retry(self, message: EmailPayload) -> bool:
-        success = self.send(message)
-        if not success:
-            self.enqueue_retry(message, error="Initial send failed")
-        return success
+    # Batches -----------------------------------------------------------------
+    def send_batch(
+        self, template_name: str, recipients: Iterable[Tuple[str, Dict[str, Any]]]
+    ) -> List[DeliveryOutcome]:
+        """Render ``template_name`` for each ``(address, context)`` and send one message per address.
 
-    def enqueue_retry(self, message: EmailPayload, error: Optional[str] = None) -> None:
-        queued = QueuedEmail(payload=message, attempts=1, last_error=error)
-        queued.next_run = datetime.utcnow() + timedelta(minutes=1)
-        self._queue.append(queued)
-        logger.warning(
-            "Email queued for retry",
-            extra={"mail_to": list(message.to), "mail_subject": message.subject, "error": error},
+        The template is rendered once per distinct context, so a fan-out that
+        shares a context renders it once.
+        """
+        rendered: Dict[str, EmailContent] = {}
+        messages: List[EmailPayload] = []
+        for address, context in recipients:
+            key = json.dumps(context, sort_keys=True, default=str)
+            content = rendered.get(key)
+            if content is None:
+                content = rendered[key] = render_email(template_name, context)
+            messages.append(
+                EmailPayload(to=[address], subject=content.subject, html=content.html, text=content.text)
+            )
+        return self.send_many(messages)
+
+    def send_many(self, messages: Sequence[EmailPayload]) -> List[DeliveryOutcome]:
+        """Send ``messages`` back to back over one pooled SMTP session.
+
+        Returns one outcome per message, in order. A rejected message does not
+        stop the batch; it is queued for retry like ``send_with_retry`` does.
+        """
+        if not messages:
+            return []
+        if not self._enabled:
+            logger.info("Email batch skipped; SMTP credentials missing.", extra={"mail_count": len(messages)})
+            return [DeliveryOutcome(", ".join(m.to), False, "SMTP credentials missing") for m in messages]
+
+        started = time.perf_counter()
+        outcomes: List[Optional[DeliveryOutcome]] = [None] * len(messages)
+        remaining = list(range(len(messages)))
+        reconnected = False
+        while remaining:
+            try:
+                with self._pool.session() as server:
+                    self._send_indexed(server, messages, remaining, outcomes)
+                break
+            except smtplib.SMTPServerDisconnected as exc:
+                if not reconnected:
+                    # The session dropped (or was stale); carry on once over a fresh one.
+                    reconnected = True
+                    continue
+                failure: Exception = exc
+            except Exception as exc:
+                failure = exc
+            for index in remaining:
+                outcomes[index] = self._batch_failure(messages[index], failure)
+            break
+
+        results = [outcome for outcome in outcomes if outcome is not None]
+        sent = sum(1 for outcome in results if outcome.sent)
+        logger.info(
+            "Email batch sent",
+            extra={
+                "mail_host": self._host,
+                "mail_count": len(results),
+                "mail_sent": sent,
+                "mail_failed": len(results) - sent,
+                "elapsed_ms": round((time.perf_counter() - started) * 1000, 1),
+            },
         )
+        return results
+
+    def _send_indexed(
+        self,
+        server: smtplib.SMTP,
+        messages: Sequence[EmailPayload],
+        remaining: List[int],
+        outcomes: List[Optional[DeliveryOutcome]],
+    ) -> None:
+        while remaining:
+            index = remaining[0]
+            message = messages[index]
+            try:
+                self._send_timed(server, self._build_message(message))
+            except MESSAGE_REJECTED_ERRORS as exc:
+                remaining.pop(0)
+                outcomes[index] = self._batch_failure(message, exc)
+                continue
+            remaining.pop(0)
+            outcomes[index] = DeliveryOutcome(", ".join(message.to), True)
+
+    def _batch_failure(self, message: EmailPayload, exc: Exception) -> DeliveryOutcome:
+        error = str(exc) or exc.__class__.__name__
+        logger.warning("Email batch delivery failed", extra={"mail_to": list(message.to), "error": error})
+        self.enqueue_retry(message, error=error)
+        return DeliveryOutcome(", ".join(message.to), False, error, retry_queued=True)
+
+    # Outbox ----------------------------------------------------------------
+    def queue(self, message: EmailPayload, metadata: Optional[Dict[str, Any]] = None) -> bool:
+        """Persist ``message`` for background delivery; returns False when email is disabled.
+
+        ``metadata`` is handed back to delivery listeners once the message is
+        sent or abandoned.
+        """
+        if not self._enabled:
+            logger.info(
+                "Email skipped; SMTP credentials missing.",
+                extra={"mail_to": list(message.to), "mail_subject": message.subject},
+            )
+            return False
+        self._outbox.enqueue(message.to_dict(), metadata)
+        self._wake.set()
+        return True
 
-    def process_queue(self) -> None:
-        if not self._queue:
+    def add_delivery_listener(self, listener: DeliveryListener) -> None:
+        """Call ``listener(metadata, delivered)`` when a queued message is sent or given up on."""
+        self._listeners.append(listener)
+
+    def start(self) -> None:
+        """Start the delivery workers, resuming messages interrupted by a shutdown."""
+        if not self._enabled:
             return
-        remaining: List[QueuedEmail] = []
-        for item in self._queue:
-            if datetime.utcnow() < item.next_run:
-                remaining.append(item)
+        with self._state_lock:
+            if self._workers:
+                return
+            self._stop.clear()
+            requeued = self._outbox.requeue_interrupted()
+            if requeued:
+                logger.info("Requeued %s interrupted email deliveries", requeued)
+            self._workers = [
+                Thread(target=self._run_worker, name=f"email-delivery-{index}", daemon=True)
+                for index in range(settings.smtp_pool_size)
+            ]
+            for worker in self._workers:
+                worker.start()
+
+    def stop(self, timeout: float = 10.0) -> None:
+        """Let workers finish the message in hand, then close pooled sessions."""
+        with self._state_lock:
+            workers, self._workers = self._workers, []
+        self._stop.set()
+        self._wake.set()
+        for worker in workers:
+            worker.join(timeout=timeout)
+        self._pool.close()
+        self._outbox.close()
+
+    def _run_worker(self) -> None:
+        # Workers only pick up freshly queued mail; due retries are drained by
+        # ``process_queue`` on the scheduler, so idle workers simply sleep.
+        while not self._stop.is_set():
+            self._wake.clear()
+            try:
+                entries = self._outbox.claim(DELIVERY_BATCH_SIZE)
+            except Exception as exc:  # pragma: no cover - disk errors only
+                logger.error("Email outbox unavailable: %s", exc)
+                entries = []
+            if entries:
+                self._deliver_batch(entries)
                 continue
-            success = self.send(item.payload)
-            if success:
-                logger.info(
-                    "Email retry succeeded",
-                    extra={"mail_to": list(item.payload.to), "attempts": item.attempts + 1},
-                )
+            self._wake.wait()
+
+    def process_queue(self) -> int:
+        """Deliver every due outbox entry in batches; returns how many were attempted."""
+        if not self._enabled:
+            return 0
+        attempted = 0
+        while not self._stop.is_set():
+            entries = self._outbox.claim(DELIVERY_BATCH_SIZE)
+            if not entries:
+                break
+            self._deliver_batch(entries)
+            attempted += len(entries)
+        return attempted
+
+    def _deliver_batch(self, entries: List[OutboxEntry]) -> None:
+        remaining = list(entries)
+        reconnected = False
+        while remaining and not self._stop.is_set():
+            untouched = len(remaining)
+            connected = False
+            try:
+                with self._pool.session() as server:
+                    connected = True
+                    self._send_over(server, remaining)
+                break
+            except smtplib.SMTPServerDisconnected as exc:
+                if connected and not reconnected and len(remaining) == untouched:
+                    # The pooled session had been dropped by the server; retry on a fresh one.
+                    reconnected = True
+                    continue
+                self._record_session_failure(remaining, exc, connected)
+                break
+            except Exception as exc:
+                self._record_session_failure(remaining, exc, connected)
+                break
+        if remaining:
+            self._outbox.release([entry.id for entry in remaining])
+
+    def _send_over(self, server: smtplib.SMTP, remaining: List[OutboxEntry]) -> None:
+        """Send entries from the front of ``remaining``, removing each once it is dealt with."""
+        while remaining and not self._stop.is_set():
+            entry = remaining[0]
+            try:
+                mail = self._build_message(EmailPayload.from_dict(entry.payload))
+            except (TypeError, ValueError) as exc:
+                remaining.pop(0)
+                self._record_failure(entry, exc, retry=False)
+                continue
+            try:
+                self._send_timed(server, mail)
+            except MESSAGE_REJECTED_ERRORS as exc:
+                remaining.pop(0)
+                self._record_failure(entry, exc)
                 continue
-            item.attempts += 1
-            item.last_error = "Retry failed"
-            backoff_minutes = min(2 ** item.attempts, 60)
-            item.next_run = datetime.utcnow() + timedelta(minutes=backoff_minutes)
+            remaining.pop(0)
+            self._record_success(entry)
+
+    def _record_session_failure(self, remaining: List[OutboxEntry], exc: Exception, connected: bool) -> None:
+        if connected:
+            # The session broke while sending the first remaining message; the
+            # rest were never tried and go straight back to the queue.
+            self._record_failure(remaining.pop(0), exc)
+            return
+        logger.warning("SMTP connection failed: %s", exc)
+        for entry in remaining:
+            self._record_failure(entry, exc)
+        remaining.clear()
+
+    def _send_timed(self, server: smtplib.SMTP, mail: MIMEEmailMessage) -> None:
+        started = time.perf_counter()
+        server.send_message(mail)
+        self.metrics.observe_send((time.perf_counter() - started) * 1000)
+
+    @staticmethod
+    def _retry_delay_seconds(attempts: int) -> float:
+        """Exponential backoff with jitter, so a burst of failures doesn't retry in lockstep."""
+        backoff = min(2 ** attempts, MAX_BACKOFF_MINUTES) * 60.0
+        return backoff / 2 + random.uniform(0, backoff / 2)
+
+    def _record_success(self, entry: OutboxEntry) -> None:
+        self._outbox.complete(entry.id)
+        logger.info(
+            "Email sent",
+            extra={
+                "mail_host": self._host,
+                "mail_port": self._port,
+                "mail_to": entry.payload.get("to"),
+                "mail_subject": entry.payload.get("subject"),
+                "attempts": entry.attempts + 1,
+            },
+        )
+        self._notify(entry, True)
+
+    def _record_failure(self, entry: OutboxEntry, exc: Exception, retry: bool = True) -> None:
+        attempts = entry.attempts + 1
+        error = str(exc) or exc.__class__.__name__
+        if retry and attempts < MAX_DELIVERY_ATTEMPTS:
+            delay = self._retry_delay_seconds(attempts)
+            self._outbox.reschedule(entry.id, time.time() + delay, error)
+            self.metrics.count_retry()
             logger.warning(
                 "Email retry scheduled",
                 extra={
-                    "mail_to": list(item.payload.to),
-                    "attempts": item.attempts,
-                    "next_run": item.next_run.isoformat(),
+                    "mail_to": entry.payload.get("to"),
+                    "attempts": attempts,
+                    "next_run": (datetime.utcnow() + timedelta(seconds=delay)).isoformat(),
+                    "error": error,
                 },
             )
-            if item.attempts < 5:
-                remaining.append(item)
-            else:
-                logger.error(
-                    "Email delivery abandoned after retries",
-                    extra={"mail_to": list(item.payload.to), "subject": item.payload.subject},
-                )
-        self._queue = remaining
+            return
+        self._outbox.abandon(entry.id, error)
+        self.metrics.count_abandoned()
+        logger.error(
+            "Email delivery abandoned after retries",
+            extra={"mail_to": entry.payload.get("to"), "subject": entry.payload.get("subject"), "error": error},
+        )
+        self._notify(entry, False)
+
+    def _notify(self, entry: OutboxEntry, delivered: bool) -> None:
+        for listener in list(self._listeners):
+            try:
+                listener(entry.metadata, delivered)
+            except Exception as exc:  # pragma: no cover - listener bugs must not stop delivery
+                logger.error("Email delivery listener failed: %s", exc)
+
+    # Retries -----------------------------------------------------------------
+    def send_with_retry(self, message: EmailPayload) -> bool:
+        success = self.send(message)
+        if not success:
+            self.enqueue_retry(message, error="Initial send failed")
+        return success
+
+    def enqueue_retry(self, message: EmailPayload, error: Optional[str] = None) -> None:
+        """Persist a message whose synchronous send failed for a later retry."""
+        if not self._enabled:
+            return
+        delay = self._retry_delay_seconds(0)
+        self._outbox.enqueue(message.to_dict(), attempts=1, delay_seconds=delay, error=error)
+        self.metrics.count_retry()
+        logger.warning(
+            "Email queued for retry",
+            extra={"mail_to": list(message.to), "mail_subject": message.subject, "error": error},
+        )
 
     def pending_retry_count(self) -> int:
-        return len(self._queue)
+        counts = self._outbox.counts()
+        return counts["pending"] + counts["sending"]
 
     def next_retry_eta(self) -> Optional[datetime]:
-        if not self._queue:
+        next_due = self._outbox.next_due_at()
+        if next_due is None:
             return None
-        return min(item.next_run for item in self._queue)
+        return datetime.utcfromtimestamp(next_due)
+
+    def queue_stats(self) -> Dict[str, Any]:
+        counts = self._outbox.counts()
+        oldest = self._outbox.oldest_created_at()
+        eta = self.next_retry_eta()
+        return {
+            "pending": counts["pending"] + counts["sending"],
+            "in_flight": counts["sending"],
+            "failed": counts["failed"],
+            "oldest_age_seconds": round(max(time.time() - oldest, 0.0), 1) if oldest is not None else None,
+            "next_retry_eta": eta.isoformat() if eta else None,
+            **self.metrics.snapshot(),
+        }
 
 
 email_service = EmailService()
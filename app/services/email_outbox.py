@@ -0,0 +1,172 @@
+"""Durable queue of outgoing email.
+
+Messages are written to a small SQLite file next to the datastore before the
+request that produced them returns, so a crash or restart never loses mail
+that was accepted. Delivery workers ``claim`` due entries (marking them
+``sending``), then either ``complete`` them or ``reschedule``/``abandon`` them
+after a failure. Entries still marked ``sending`` at start-up were interrupted
+mid-delivery and go back to ``pending``.
+
+Entries that exhausted their attempts stay behind as ``failed`` for
+inspection; delivered entries are deleted.
+"""
+from __future__ import annotations
+
+import json
+import sqlite3
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from threading import Lock
+from typing import Any, Dict, List, Optional
+
+PENDING = "pending"
+SENDING = "sending"
+FAILED = "failed"
+
+
+@dataclass
+class OutboxEntry:
+    id: int
+    payload: Dict[str, Any]
+    metadata: Dict[str, Any] = field(default_factory=dict)
+    attempts: int = 0
+    created_at: float = 0.0
+    next_attempt_at: float = 0.0
+    last_error: Optional[str] = None
+
+
+class EmailOutbox:
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self._lock = Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(self.path), check_same_thread=False, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS outbox ("
+                "id INTEGER PRIMARY KEY AUTOINCREMENT, payload TEXT NOT NULL, "
+                "metadata TEXT NOT NULL, status TEXT NOT NULL, attempts INTEGER NOT NULL, "
+                "created_at REAL NOT NULL, next_attempt_at REAL NOT NULL, last_error TEXT)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS outbox_due ON outbox (status, next_attempt_at)")
+            self._conn = conn
+        return self._conn
+
+    def enqueue(
+        self,
+        payload: Dict[str, Any],
+        metadata: Optional[Dict[str, Any]] = None,
+        *,
+        attempts: int = 0,
+        delay_seconds: float = 0.0,
+        error: Optional[str] = None,
+    ) -> int:
+        now = time.time()
+        with self._lock:
+            cursor = self._connection().execute(
+                "INSERT INTO outbox (payload, metadata, status, attempts, created_at, next_attempt_at, last_error) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (json.dumps(payload), json.dumps(metadata or {}), PENDING, attempts, now, now + delay_seconds, error),
+            )
+            return int(cursor.lastrowid)
+
+    def claim(self, limit: int, now: Optional[float] = None) -> List[OutboxEntry]:
+        """Mark up to ``limit`` due entries as ``sending`` and return them, oldest first."""
+        now = time.time() if now is None else now
+        with self._lock:
+            conn = self._connection()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                rows = conn.execute(
+                    "SELECT id, payload, metadata, attempts, created_at, next_attempt_at, last_error "
+                    "FROM outbox WHERE status = ? AND next_attempt_at <= ? "
+                    "ORDER BY next_attempt_at, id LIMIT ?",
+                    (PENDING, now, limit),
+                ).fetchall()
+                conn.executemany(
+                    "UPDATE outbox SET status = ? WHERE id = ?", [(SENDING, row[0]) for row in rows]
+                )
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+        return [
+            OutboxEntry(
+                id=row[0],
+                payload=json.loads(row[1]),
+                metadata=json.loads(row[2]),
+                attempts=row[3],
+                created_at=row[4],
+                next_attempt_at=row[5],
+                last_error=row[6],
+            )
+            for row in rows
+        ]
+
+    def complete(self, entry_id: int) -> None:
+        with self._lock:
+            self._connection().execute("DELETE FROM outbox WHERE id = ?", (entry_id,))
+
+    def reschedule(self, entry_id: int, next_attempt_at: float, error: str) -> None:
+        with self._lock:
+            self._connection().execute(
+                "UPDATE outbox SET status = ?, attempts = attempts + 1, next_attempt_at = ?, last_error = ? "
+                "WHERE id = ?",
+                (PENDING, next_attempt_at, error, entry_id),
+            )
+
+    def abandon(self, entry_id: int, error: str) -> None:
+        with self._lock:
+            self._connection().execute(
+                "UPDATE outbox SET status = ?, attempts = attempts + 1, last_error = ? WHERE id = ?",
+                (FAILED, error, entry_id),
+            )
+
+    def release(self, entry_ids: List[int]) -> None:
+        """Return claimed entries that were never attempted to the queue as-is."""
+        with self._lock:
+            self._connection().executemany(
+                "UPDATE outbox SET status = ? WHERE id = ?", [(PENDING, entry_id) for entry_id in entry_ids]
+            )
+
+    def requeue_interrupted(self) -> int:
+        with self._lock:
+            cursor = self._connection().execute(
+                "UPDATE outbox SET status = ? WHERE status = ?", (PENDING, SENDING)
+            )
+            return cursor.rowcount
+
+    def next_due_at(self) -> Optional[float]:
+        with self._lock:
+            row = self._connection().execute(
+                "SELECT MIN(next_attempt_at) FROM outbox WHERE status = ?", (PENDING,)
+            ).fetchone()
+        return row[0] if row else None
+
+    def counts(self) -> Dict[str, int]:
+        with self._lock:
+            rows = self._connection().execute(
+                "SELECT status, COUNT(*) FROM outbox GROUP BY status"
+            ).fetchall()
+        counts = {PENDING: 0, SENDING: 0, FAILED: 0}
+        counts.update({status: count for status, count in rows})
+        return counts
+
+    def oldest_created_at(self) -> Optional[float]:
+        """Creation time of the oldest entry still waiting to be delivered."""
+        with self._lock:
+            row = self._connection().execute(
+                "SELECT MIN(created_at) FROM outbox WHERE status IN (?, ?)", (PENDING, SENDING)
+            ).fetchone()
+        return row[0] if row else None
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
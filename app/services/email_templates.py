@@ -4,15 +4,18 @@ import re
 from dataclasses import dataclass
 from functools import lru_cache
 from pathlib import Path
-from typing import Any, Dict, Optional
+from typing import TYPE_CHECKING, Any, Dict, Optional
 
-from jinja2 import Environment, FileSystemLoader, TemplateNotFound, select_autoescape
+if TYPE_CHECKING:  # pragma: no cover - jinja2 is imported on first render
+    from jinja2 import Environment
 
 TEMPLATES_DIR = Path("templates")
 
 
 @lru_cache(maxsize=1)
-def _jinja_env() -> Environment:
+def _jinja_env() -> "Environment":
+    from jinja2 import Environment, FileSystemLoader, select_autoescape
+
     env = Environment(
         loader=FileSystemLoader(TEMPLATES_DIR),
         autoescape=select_autoescape(["html", "xml"]),
@@ -42,6 +45,8 @@ def _fallback_plaintext(html: str) -> str:
 
 
 def render_email(template_name: str, context: Dict[str, Any]) -> EmailContent:
+    from jinja2 import TemplateNotFound
+
     env = _jinja_env()
 
     subject = context.get("subject", "AI Complaint Notification")
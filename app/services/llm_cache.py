@@ -0,0 +1,149 @@
+"""Persistent, content-addressed cache for LLM completions.
+
+Entries are keyed by a SHA-256 of the prompt template version, the model and
+the normalised prompt, so the same complaint text submitted twice (or the same
+complaint viewed again) is answered without a Groq round-trip. Entries live in
+a small SQLite file next to the datastore, expire after a TTL and are evicted
+least-recently-used once the size bound is reached.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import sqlite3
+import time
+from pathlib import Path
+from threading import Lock
+from typing import Dict, Iterable, Optional
+
+from ..config import settings
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_text(value: str) -> str:
+    """Collapse whitespace so trivially different submissions share a key."""
+    return " ".join(value.split())
+
+
+def cache_key(namespace: str, model: str, parts: Iterable[str]) -> str:
+    payload = json.dumps([namespace, model, [normalize_text(part) for part in parts]], ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class LLMCache:
+    def __init__(self, path: Path, *, max_entries: int, ttl_seconds: float, enabled: bool = True) -> None:
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.enabled = enabled
+        self._lock = Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._entries = 0
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(self.path), check_same_thread=False, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS llm_cache ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, "
+                "created_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS llm_cache_accessed ON llm_cache (accessed_at)")
+            self._entries = conn.execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0]
+            self._conn = conn
+        return self._conn
+
+    def get(self, key: str) -> Optional[str]:
+        if not self.enabled:
+            return None
+        now = time.time()
+        try:
+            with self._lock:
+                conn = self._connection()
+                row = conn.execute("SELECT value, created_at FROM llm_cache WHERE key = ?", (key,)).fetchone()
+                if row is None:
+                    self.misses += 1
+                    return None
+                value, created_at = row
+                if now - created_at > self.ttl_seconds:
+                    conn.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+                    self._entries -= 1
+                    self.expirations += 1
+                    self.misses += 1
+                    return None
+                conn.execute("UPDATE llm_cache SET accessed_at = ? WHERE key = ?", (now, key))
+                self.hits += 1
+                return value
+        except sqlite3.Error as exc:
+            logger.warning("LLM cache read failed: %s", exc)
+            return None
+
+    def put(self, key: str, value: str) -> None:
+        if not self.enabled:
+            return
+        now = time.time()
+        try:
+            with self._lock:
+                conn = self._connection()
+                existed = conn.execute("SELECT 1 FROM llm_cache WHERE key = ?", (key,)).fetchone()
+                conn.execute(
+                    "INSERT OR REPLACE INTO llm_cache (key, value, created_at, accessed_at) VALUES (?, ?, ?, ?)",
+                    (key, value, now, now),
+                )
+                if not existed:
+                    self._entries += 1
+                self.stores += 1
+                overflow = self._entries - self.max_entries
+                if overflow > 0:
+                    conn.execute(
+                        "DELETE FROM llm_cache WHERE key IN "
+                        "(SELECT key FROM llm_cache ORDER BY accessed_at LIMIT ?)",
+                        (overflow,),
+                    )
+                    self._entries -= overflow
+                    self.evictions += overflow
+        except sqlite3.Error as exc:
+            logger.warning("LLM cache write failed: %s", exc)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._connection().execute("DELETE FROM llm_cache")
+            self._entries = 0
+
+    def stats(self) -> Dict[str, object]:
+        lookups = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "entries": self._entries,
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "stores": self.stores,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+llm_cache = LLMCache(
+    settings.data_store_path.with_name(f"{settings.data_store_path.stem}.llm_cache.sqlite3"),
+    max_entries=settings.llm_cache_max_entries,
+    ttl_seconds=settings.llm_cache_ttl_seconds,
+    enabled=settings.llm_cache_enabled,
+)
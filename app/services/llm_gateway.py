@@ -0,0 +1,251 @@
+"""Shared gateway for Groq chat completions.
+
+All LLM traffic goes through one ``AsyncGroq`` client running on a dedicated
+event loop thread. Coroutine callers await the result without blocking the
+server's event loop; synchronous callers (threadpool endpoints, scheduled
+jobs) block only their own thread. A semaphore bounds requests in flight and
+every request carries its own timeout. When the provider answers 429 the
+gateway pauses new requests for the advertised ``retry-after`` interval.
+
+Callers that pass ``cache_namespace`` (a prompt template name plus version,
+e.g. ``"classify:v1"``) have completions served from and stored in
+``llm_cache``; bump the version whenever the prompt or its parsing changes.
+"""
+from __future__ import annotations
+
+import asyncio
+import importlib.util
+import logging
+import time
+from concurrent.futures import Future
+from functools import lru_cache
+from threading import Lock, Thread
+from typing import TYPE_CHECKING, Any, Callable, Coroutine, Dict, List, Optional
+
+if TYPE_CHECKING:  # pragma: no cover - imported lazily in ``_ensure_started``
+    from groq import AsyncGroq
+
+from ..config import settings
+from .llm_cache import cache_key, llm_cache
+
+logger = logging.getLogger(__name__)
+
+Messages = List[Dict[str, str]]
+CacheValidator = Callable[[str], bool]
+
+
+class LLMUnavailableError(Exception):
+    """Raised when a completion cannot be obtained (not configured, timed out or failed)."""
+
+
+class LLMRateLimitedError(LLMUnavailableError):
+    """Raised when the provider rejected a request with HTTP 429."""
+
+
+DEFAULT_RATE_LIMIT_COOLDOWN = 5.0
+
+
+@lru_cache(maxsize=1)
+def _groq_installed() -> bool:
+    return importlib.util.find_spec("groq") is not None
+
+
+class LLMGateway:
+    def __init__(
+        self,
+        *,
+        api_key: Optional[str],
+        model: str,
+        max_concurrency: int,
+        timeout: float,
+    ) -> None:
+        self.model = model
+        self.timeout = timeout
+        self._api_key = api_key
+        self._max_concurrency = max_concurrency
+        self._client: Optional["AsyncGroq"] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[Thread] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._start_lock = Lock()
+        self._cooldown_until = 0.0
+        self.rate_limit_events = 0
+
+    @property
+    def available(self) -> bool:
+        return bool(self._api_key) and _groq_installed()
+
+    def cooldown_remaining(self) -> float:
+        """Seconds until the provider's last rate-limit window is expected to clear."""
+        return max(0.0, self._cooldown_until - time.monotonic())
+
+    def _note_rate_limit(self, exc: Exception) -> float:
+        retry_after = DEFAULT_RATE_LIMIT_COOLDOWN
+        headers = getattr(getattr(exc, "response", None), "headers", None) or {}
+        try:
+            retry_after = float(headers.get("retry-after", retry_after))
+        except (TypeError, ValueError):
+            pass
+        self._cooldown_until = max(self._cooldown_until, time.monotonic() + retry_after)
+        self.rate_limit_events += 1
+        return retry_after
+
+    def _ensure_started(self) -> asyncio.AbstractEventLoop:
+        with self._start_lock:
+            if self._loop is not None:
+                return self._loop
+            if not self.available:
+                raise LLMUnavailableError("Groq client is not configured")
+            loop = asyncio.new_event_loop()
+            thread = Thread(target=loop.run_forever, name="llm-gateway", daemon=True)
+            thread.start()
+            # The SDK (and httpx beneath it) is a sizeable import; defer it
+            # until the first completion instead of paying for it at boot.
+            from groq import AsyncGroq
+
+            self._client = AsyncGroq(api_key=self._api_key)
+            self._semaphore = asyncio.Semaphore(self._max_concurrency)
+            self._loop = loop
+            self._thread = thread
+            logger.info(
+                "LLM gateway started for model %s (max %s concurrent)", self.model, self._max_concurrency
+            )
+            return loop
+
+    async def _complete(
+        self,
+        messages: Messages,
+        *,
+        model: Optional[str],
+        temperature: float,
+        max_tokens: int,
+        timeout: float,
+        cache_namespace: Optional[str] = None,
+        cache_validator: Optional[CacheValidator] = None,
+    ) -> str:
+        assert self._client is not None and self._semaphore is not None
+        key: Optional[str] = None
+        if cache_namespace:
+            key = cache_key(
+                cache_namespace,
+                model or self.model,
+                [f"{message['role']}:{message['content']}" for message in messages],
+            )
+            cached = llm_cache.get(key)
+            if cached is not None:
+                return cached
+        delay = self.cooldown_remaining()
+        if delay:
+            await asyncio.sleep(delay)
+        async with self._semaphore:
+            try:
+                response = await asyncio.wait_for(
+                    self._client.chat.completions.create(
+                        model=model or self.model,
+                        messages=messages,  # type: ignore[arg-type]
+                        temperature=temperature,
+                        max_tokens=max_tokens,
+                    ),
+                    timeout=timeout,
+                )
+            except asyncio.TimeoutError as exc:
+                raise LLMUnavailableError(f"Groq request timed out after {timeout:g}s") from exc
+            except Exception as exc:
+                if getattr(exc, "status_code", None) == 429:
+                    retry_after = self._note_rate_limit(exc)
+                    raise LLMRateLimitedError(
+                        f"Groq rate limit hit; retry after {retry_after:g}s"
+                    ) from exc
+                raise
+        choice = response.choices[0] if response.choices else None
+        content = ((choice.message.content if choice and choice.message else "") or "").strip()
+        if key and content and (cache_validator is None or cache_validator(content)):
+            llm_cache.put(key, content)
+        return content
+
+    def _submit(self, messages: Messages, **options: Any) -> Future:
+        loop = self._ensure_started()
+        options.setdefault("timeout", self.timeout)
+        coro: Coroutine[Any, Any, str] = self._complete(messages, **options)
+        return asyncio.run_coroutine_threadsafe(coro, loop)
+
+    async def complete(
+        self,
+        messages: Messages,
+        *,
+        model: Optional[str] = None,
+        temperature: float = 0.2,
+        max_tokens: int = 1000,
+        timeout: Optional[float] = None,
+        cache_namespace: Optional[str] = None,
+        cache_validator: Optional[CacheValidator] = None,
+    ) -> str:
+        """Return the completion text; cancelling the caller cancels the request."""
+        future = self._submit(
+            messages,
+            model=model,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            timeout=timeout or self.timeout,
+            cache_namespace=cache_namespace,
+            cache_validator=cache_validator,
+        )
+        try:
+            return await asyncio.wrap_future(future)
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+
+    def complete_sync(
+        self,
+        messages: Messages,
+        *,
+        model: Optional[str] = None,
+        temperature: float = 0.2,
+        max_tokens: int = 1000,
+        timeout: Optional[float] = None,
+        cache_namespace: Optional[str] = None,
+        cache_validator: Optional[CacheValidator] = None,
+    ) -> str:
+        """Blocking variant for code that is not running on an event loop."""
+        future = self._submit(
+            messages,
+            model=model,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            timeout=timeout or self.timeout,
+            cache_namespace=cache_namespace,
+            cache_validator=cache_validator,
+        )
+        return future.result()
+
+    def close(self) -> None:
+        with self._start_lock:
+            loop, client = self._loop, self._client
+            self._loop = self._client = self._semaphore = None
+        if loop is None:
+            return
+        if client is not None:
+            try:
+                asyncio.run_coroutine_threadsafe(client.close(), loop).result(timeout=5)
+            except Exception as exc:  # pragma: no cover - best effort on shutdown
+                logger.debug("Failed to close Groq client: %s", exc)
+        loop.call_soon_threadsafe(loop.stop)
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+        loop.close()
+        llm_cache.close()
+
+
+gateway = LLMGateway(
+    api_key=settings.groq_api_key,
+    model=settings.groq_model,
+    max_concurrency=settings.groq_max_concurrency,
+    timeout=settings.groq_timeout_seconds,
+)
+
+if not _groq_installed():
+    logger.warning("Groq SDK not installed; AI features disabled.")
+elif not settings.groq_api_key:
+    logger.warning("Groq API key not configured; AI features disabled.")
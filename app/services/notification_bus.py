@@ -0,0 +1,110 @@
+"""In-process fan-out of new notifications to live SSE connections.
+
+Every SSE connection subscribes with its user id and gets a bounded
+``asyncio.Queue`` on its own event loop. The bus listens to the datastore's
+``notifications`` bucket, so each ``create_notification`` is pushed to the
+owner's queues as it happens instead of being discovered by polling.
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+from threading import Lock
+from typing import Dict, Optional, Set
+
+from ..datastore import db
+from ..models import Notification
+
+logger = logging.getLogger(__name__)
+
+SUBSCRIBER_QUEUE_SIZE = 100
+
+
+class Subscription:
+    """One connection's view of the bus; create it from the consuming event loop."""
+
+    def __init__(self, bus: "NotificationBus", user_id: int) -> None:
+        self.user_id = user_id
+        self._bus = bus
+        self._loop = asyncio.get_running_loop()
+        self._queue: asyncio.Queue[Notification] = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        self._dropped_from: Optional[int] = None
+
+    def _offer(self, notification: Notification) -> None:
+        try:
+            self._queue.put_nowait(notification)
+        except asyncio.QueueFull:
+            if self._dropped_from is None:
+                self._dropped_from = notification.id
+
+    def _deliver(self, notification: Notification) -> None:
+        try:
+            self._loop.call_soon_threadsafe(self._offer, notification)
+        except RuntimeError:  # loop already closed; the connection is gone
+            self.close()
+
+    async def get(self, timeout: float) -> Optional[Notification]:
+        """Next notification, or ``None`` if nothing arrived within ``timeout`` seconds."""
+        try:
+            return await asyncio.wait_for(self._queue.get(), timeout=timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    def take_overflow(self) -> Optional[int]:
+        """Return the lowest undelivered id if notifications were dropped, else ``None``.
+
+        After an overflow the queue is emptied and the consumer is expected to
+        re-read the datastore from the returned id onwards.
+        """
+        if self._dropped_from is None:
+            return None
+        floor = self._dropped_from
+        self._dropped_from = None
+        while not self._queue.empty():
+            floor = min(floor, self._queue.get_nowait().id)
+        return floor
+
+    def close(self) -> None:
+        self._bus._unsubscribe(self)
+
+
+class NotificationBus:
+    def __init__(self) -> None:
+        self._lock = Lock()
+        self._subscribers: Dict[int, Set[Subscription]] = {}
+
+    def subscribe(self, user_id: int) -> Subscription:
+        subscription = Subscription(self, user_id)
+        with self._lock:
+            self._subscribers.setdefault(user_id, set()).add(subscription)
+        return subscription
+
+    def _unsubscribe(self, subscription: Subscription) -> None:
+        with self._lock:
+            subscribers = self._subscribers.get(subscription.user_id)
+            if subscribers is None:
+                return
+            subscribers.discard(subscription)
+            if not subscribers:
+                del self._subscribers[subscription.user_id]
+
+    def subscriber_count(self, user_id: Optional[int] = None) -> int:
+        with self._lock:
+            if user_id is not None:
+                return len(self._subscribers.get(user_id, ()))
+            return sum(len(subscribers) for subscribers in self._subscribers.values())
+
+    def publish(self, notification: Notification) -> None:
+        with self._lock:
+            subscribers = list(self._subscribers.get(notification.user_id, ()))
+        for subscription in subscribers:
+            subscription._deliver(notification)
+
+    def apply(self, previous: Optional[Notification], current: Optional[Notification]) -> None:
+        """Datastore listener: publish newly created notifications."""
+        if previous is None and current is not None:
+            self.publish(current)
+
+
+notification_bus = NotificationBus()
+db.add_listener("notifications", notification_bus.apply)
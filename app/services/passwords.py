@@ -0,0 +1,115 @@
+"""Password hashing off the request threads.
+
+bcrypt at the configured cost takes a few hundred milliseconds of CPU per
+call. Hashes and checks run on a small dedicated pool instead of Starlette's
+request threadpool; bcrypt releases the GIL while it works, so the pool's
+threads use separate cores. At most ``max_pending`` interactive calls may be
+queued or running. Beyond that, callers get ``PasswordHasherBusy`` right away,
+so a login storm turns into quick 503s rather than a backlog that starves
+every other endpoint.
+"""
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from threading import Lock
+from typing import Any, Callable, Dict, List, Sequence, Tuple
+
+from fastapi import HTTPException, status
+
+from ..config import settings
+from ..security import hash_password, needs_rehash, verify_password
+
+
+class PasswordHasherBusy(HTTPException):
+    """Raised when too many password operations are already waiting; surfaces as a 503."""
+
+    def __init__(self) -> None:
+        super().__init__(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Too many sign-in attempts in progress; please retry shortly.",
+            headers={"Retry-After": "1"},
+        )
+
+
+def hash_fingerprint(password_hash: str) -> str:
+    """Short digest identifying a stored hash, for "already checked" markers."""
+    return hashlib.sha256(password_hash.encode("utf-8")).hexdigest()[:16]
+
+
+class PasswordHasher:
+    def __init__(self, workers: int, max_pending: int) -> None:
+        self.workers = workers
+        self.max_pending = max_pending
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="passwords")
+        self._lock = Lock()
+        self._pending = 0
+        self.completed = 0
+        self.rejected = 0
+        self._busy_seconds = 0.0
+
+    def _run(self, fn: Callable[..., Any], *args: Any) -> Any:
+        started = time.perf_counter()
+        try:
+            return fn(*args)
+        finally:
+            elapsed = time.perf_counter() - started
+            with self._lock:
+                self._pending -= 1
+                self.completed += 1
+                self._busy_seconds += elapsed
+
+    def _submit(self, fn: Callable[..., Any], *args: Any, admit: bool = True) -> Future:
+        with self._lock:
+            if admit and self._pending >= self.max_pending:
+                self.rejected += 1
+                raise PasswordHasherBusy()
+            self._pending += 1
+        return self._executor.submit(self._run, fn, *args)
+
+    # Interactive calls (subject to admission control) ------------------------
+    def hash(self, password: str, *, admit: bool = True) -> str:
+        return self._submit(hash_password, password, admit=admit).result()
+
+    async def hash_async(self, password: str) -> str:
+        return await asyncio.wrap_future(self._submit(hash_password, password))
+
+    async def verify_async(self, password: str, hashed: str) -> bool:
+        if needs_rehash(hashed):
+            return verify_password(password, hashed)  # legacy digests are cheap
+        return await asyncio.wrap_future(self._submit(verify_password, password, hashed))
+
+    # Bulk calls for seeding and start-up (never rejected) --------------------
+    def hash_many(self, passwords: Sequence[str]) -> List[str]:
+        futures = [self._submit(hash_password, password, admit=False) for password in passwords]
+        return [future.result() for future in futures]
+
+    def verify_many(self, pairs: Sequence[Tuple[str, str]]) -> List[bool]:
+        futures = [self._submit(verify_password, password, hashed, admit=False) for password, hashed in pairs]
+        return [future.result() for future in futures]
+
+    def stats(self) -> Dict[str, object]:
+        with self._lock:
+            pending = self._pending
+            completed = self.completed
+            busy = self._busy_seconds
+        return {
+            "workers": self.workers,
+            "max_pending": self.max_pending,
+            "pending": pending,
+            "queued": max(pending - self.workers, 0),
+            "completed": completed,
+            "rejected": self.rejected,
+            "avg_ms": round(busy / completed * 1000, 1) if completed else 0.0,
+        }
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+password_hasher = PasswordHasher(
+    workers=settings.password_hash_workers,
+    max_pending=settings.password_hash_max_pending,
+)
@@ -0,0 +1,142 @@
+"""Thumbnails and first-page previews for image and PDF attachments.
+
+New attachments are picked up from the datastore's change events and rendered
+on a small worker pool, so uploads never wait for image processing. Each
+attachment gets a ``thumbnail`` for listings and a larger ``preview``; both
+are JPEGs cached under ``<upload_dir>/previews``. Derivatives of
+content-addressed attachments are keyed by digest and shared by every
+attachment with the same bytes.
+
+Rendering needs Pillow (and pypdfium2 for PDFs); without them previews are
+simply unavailable.
+"""
+from __future__ import annotations
+
+import logging
+import os
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from threading import Event, Lock
+from typing import Dict, Optional
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:  # pragma: no cover - fallback when package missing
+    Image = ImageOps = None  # type: ignore[assignment]
+
+try:
+    import pypdfium2 as pdfium
+except ImportError:  # pragma: no cover - fallback when package missing
+    pdfium = None  # type: ignore[assignment]
+
+from ..config import settings
+from ..datastore import db
+from ..models import Attachment
+
+logger = logging.getLogger(__name__)
+
+# Longest edge, in pixels, of each derivative.
+VARIANTS: Dict[str, int] = {"thumbnail": 256, "preview": 1024}
+IMAGE_TYPES = {"image/png", "image/jpeg"}
+PDF_TYPE = "application/pdf"
+JPEG_QUALITY = 80
+# How long a request waits for a render already running on another thread.
+RENDER_WAIT_SECONDS = 30.0
+
+
+class PreviewService:
+    def __init__(self, root: Path, workers: int = 1) -> None:
+        self.root = root
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="previews")
+        self._lock = Lock()
+        self._in_flight: Dict[str, Event] = {}
+
+    def supports(self, attachment: Attachment) -> bool:
+        if Image is None:
+            return False
+        if attachment.file_type in IMAGE_TYPES:
+            return True
+        return attachment.file_type == PDF_TYPE and pdfium is not None
+
+    def _key(self, attachment: Attachment) -> str:
+        return attachment.sha256 or f"attachment-{attachment.id}"
+
+    def path_for(self, attachment: Attachment, variant: str) -> Path:
+        key = self._key(attachment)
+        return self.root / key[:2] / f"{key}-{variant}.jpg"
+
+    def get(self, attachment: Attachment, variant: str) -> Optional[Path]:
+        """Return the cached derivative, rendering it now if the worker has not yet."""
+        if variant not in VARIANTS or not self.supports(attachment):
+            return None
+        path = self.path_for(attachment, variant)
+        if not path.is_file():
+            self._render(attachment)
+        return path if path.is_file() else None
+
+    def _open_source(self, attachment: Attachment) -> "Image.Image":
+        if attachment.file_type == PDF_TYPE:
+            document = pdfium.PdfDocument(attachment.file_path)
+            try:
+                page = document[0]
+                scale = max(VARIANTS.values()) / max(page.get_width(), page.get_height(), 1)
+                return page.render(scale=scale).to_pil()
+            finally:
+                document.close()
+        with Image.open(attachment.file_path) as source:
+            image = ImageOps.exif_transpose(source)
+            image.load()
+            return image
+
+    def _render(self, attachment: Attachment) -> None:
+        key = self._key(attachment)
+        with self._lock:
+            running = self._in_flight.get(key)
+            if running is None:
+                done = self._in_flight[key] = Event()
+        if running is not None:
+            # Another thread is already rendering these bytes; wait for it.
+            running.wait(timeout=RENDER_WAIT_SECONDS)
+            return
+        try:
+            image = self._open_source(attachment).convert("RGB")
+            for variant, edge in sorted(VARIANTS.items(), key=lambda item: -item[1]):
+                target = self.path_for(attachment, variant)
+                if target.is_file():
+                    continue
+                image.thumbnail((edge, edge))
+                target.parent.mkdir(parents=True, exist_ok=True)
+                temp_path = target.with_name(f".{uuid.uuid4().hex}.part")
+                image.save(temp_path, format="JPEG", quality=JPEG_QUALITY, optimize=True)
+                os.replace(temp_path, target)
+        except Exception as exc:
+            logger.warning("Could not render preview for attachment %s: %s", attachment.id, exc)
+        finally:
+            with self._lock:
+                del self._in_flight[key]
+            done.set()
+
+    def _remove(self, attachment: Attachment) -> None:
+        for variant in VARIANTS:
+            try:
+                self.path_for(attachment, variant).unlink(missing_ok=True)
+            except OSError as exc:
+                logger.debug("Failed to remove preview for attachment %s: %s", attachment.id, exc)
+
+    def apply(self, previous: Optional[Attachment], current: Optional[Attachment]) -> None:
+        """Datastore listener: render new attachments, drop derivatives nobody uses."""
+        if current is not None and previous is None:
+            if self.supports(current):
+                self._executor.submit(self._render, current)
+        elif current is None and previous is not None:
+            if previous.sha256 and db.attachment_refcount(previous.sha256):
+                return
+            self._executor.submit(self._remove, previous)
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+preview_service = PreviewService(settings.upload_dir / "previews")
+db.add_listener("attachments", preview_service.apply)
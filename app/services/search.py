@@ -0,0 +1,264 @@
+"""Inverted index behind the complaint search box."""
+from __future__ import annotations
+
+import re
+from bisect import bisect_left, insort
+from dataclasses import dataclass
+from threading import RLock
+from typing import Dict, FrozenSet, Iterable, List, NamedTuple, Optional, Set, Tuple
+
+from ..datastore import db
+from ..models import Complaint
+
+# Relative weight of a hit in each searchable field. Identity fields outrank the
+# free text; the low-cardinality labels are still searchable but rank last.
+FIELD_WEIGHTS: Dict[str, float] = {
+    "emp_id": 4.0,
+    "email": 3.0,
+    "phone": 3.0,
+    "complaint_text": 1.0,
+    "category": 0.5,
+    "plant": 0.5,
+    "status": 0.25,
+    "priority": 0.25,
+}
+
+GRAM_SIZE = 3
+SNIPPET_RADIUS = 60
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+
+@dataclass(frozen=True)
+class SearchHit:
+    complaint_id: int
+    score: float
+    field: str
+    snippet: str
+    match_start: int
+    match_end: int
+
+
+def _field_values(complaint: Complaint) -> Dict[str, str]:
+    return {
+        "emp_id": complaint.emp_id,
+        "email": complaint.email,
+        "phone": complaint.phone,
+        "complaint_text": complaint.complaint_text,
+        "category": complaint.category or "",
+        "plant": complaint.plant or "",
+        "status": complaint.status.value,
+        "priority": complaint.priority.value,
+    }
+
+
+def _grams(text: str) -> Set[str]:
+    """Every ``GRAM_SIZE`` window plus the shorter tails of ``text``.
+
+    Keeping the tails means any substring shorter than a gram is the prefix of
+    at least one indexed gram, so short queries stay exact substring matches.
+    """
+    grams = {text[i : i + GRAM_SIZE] for i in range(max(len(text) - GRAM_SIZE + 1, 0))}
+    grams.update(text[-size:] for size in range(1, min(GRAM_SIZE, len(text) + 1)))
+    return grams
+
+
+def _tokens(field: str, text: str) -> Set[str]:
+    tokens = set(_TOKEN_RE.findall(text))
+    if field != "complaint_text" and text:
+        # Identifiers are also indexed whole so "emp-12" style prefixes match.
+        tokens.add(text)
+    return tokens
+
+
+class _IndexedField(NamedTuple):
+    name: str
+    weight: float
+    text: str
+    tokens: FrozenSet[str]
+    # The same tokens sorted, so prefix matches are found by bisecting.
+    sorted_tokens: Tuple[str, ...]
+
+    def has_token_prefix(self, term: str) -> bool:
+        position = bisect_left(self.sorted_tokens, term)
+        return position < len(self.sorted_tokens) and self.sorted_tokens[position].startswith(term)
+
+
+def _index_fields(source: Dict[str, str]) -> Tuple[_IndexedField, ...]:
+    fields = []
+    for field, value in source.items():
+        text = value.lower()
+        tokens = _tokens(field, text)
+        fields.append(_IndexedField(field, FIELD_WEIGHTS[field], text, frozenset(tokens), tuple(sorted(tokens))))
+    return tuple(fields)
+
+
+def _snippet(text: str, start: int, end: int) -> Tuple[str, int, int]:
+    lo = max(0, start - SNIPPET_RADIUS)
+    hi = min(len(text), end + SNIPPET_RADIUS)
+    prefix = "…" if lo > 0 else ""
+    suffix = "…" if hi < len(text) else ""
+    offset = len(prefix) - lo
+    return f"{prefix}{text[lo:hi]}{suffix}", start + offset, end + offset
+
+
+class ComplaintSearchIndex:
+    """Trigram and token postings over the searchable complaint fields.
+
+    Queries keep the historical substring semantics. For ``GRAM_SIZE``
+    characters or more the postings of every gram in the query are intersected
+    and only those candidates are checked against the lowercased field values;
+    shorter queries take the union of the grams they prefix, found by bisecting
+    the sorted gram vocabulary. Hits are ranked by field weight, with whole
+    token and token-prefix matches scoring above plain substrings.
+
+    The lowercased values and their tokens are worked out once per complaint
+    when it is indexed. ``matches`` answers membership without scoring, so
+    callers that do not rank by relevance only score the rows they show.
+    """
+
+    def __init__(self) -> None:
+        self._lock = RLock()
+        self._sources: Dict[int, Dict[str, str]] = {}
+        self._docs: Dict[int, Tuple[_IndexedField, ...]] = {}
+        self._postings: Dict[str, Set[int]] = {}
+        self._vocabulary: List[str] = []
+        self._doc_grams: Dict[int, Set[str]] = {}
+
+    def apply(self, previous: Optional[Complaint], current: Optional[Complaint]) -> None:
+        """Datastore listener: re-index one complaint."""
+        with self._lock:
+            complaint_id = (current or previous).id  # type: ignore[union-attr]
+            self._discard(complaint_id)
+            if current is not None:
+                self._add(current)
+
+    def _add(self, complaint: Complaint) -> None:
+        source = _field_values(complaint)
+        doc = _index_fields(source)
+        grams: Set[str] = set()
+        for field in doc:
+            grams |= _grams(field.text)
+        for gram in grams:
+            postings = self._postings.get(gram)
+            if postings is None:
+                postings = self._postings[gram] = set()
+                insort(self._vocabulary, gram)
+            postings.add(complaint.id)
+        self._sources[complaint.id] = source
+        self._docs[complaint.id] = doc
+        self._doc_grams[complaint.id] = grams
+
+    def _discard(self, complaint_id: int) -> None:
+        self._sources.pop(complaint_id, None)
+        self._docs.pop(complaint_id, None)
+        for gram in self._doc_grams.pop(complaint_id, ()):
+            postings = self._postings.get(gram)
+            if postings is None:
+                continue
+            postings.discard(complaint_id)
+            if not postings:
+                del self._postings[gram]
+                position = bisect_left(self._vocabulary, gram)
+                if position < len(self._vocabulary) and self._vocabulary[position] == gram:
+                    del self._vocabulary[position]
+
+    def _prefix_candidates(self, term: str) -> Set[int]:
+        matched: Set[int] = set()
+        everything = len(self._docs)
+        position = bisect_left(self._vocabulary, term)
+        while position < len(self._vocabulary) and self._vocabulary[position].startswith(term):
+            matched |= self._postings[self._vocabulary[position]]
+            if len(matched) == everything:
+                # One or two common letters soon cover every complaint; the
+                # remaining grams cannot add anything.
+                break
+            position += 1
+        return matched
+
+    def _gram_candidates(self, term: str) -> Set[int]:
+        windows = {term[i : i + GRAM_SIZE] for i in range(len(term) - GRAM_SIZE + 1)}
+        postings = [self._postings.get(gram, set()) for gram in windows]
+        postings.sort(key=len)
+        candidates = set(postings[0])
+        for ids in postings[1:]:
+            candidates &= ids
+            if not candidates:
+                break
+        return candidates
+
+    def _candidates(self, term: str, ids: Optional[Iterable[int]]) -> Set[int]:
+        if len(term) < GRAM_SIZE:
+            candidates = self._prefix_candidates(term)
+        else:
+            candidates = self._gram_candidates(term)
+        if ids is not None:
+            candidates &= set(ids)
+        return candidates
+
+    def _score(self, complaint_id: int, term: str) -> Optional[SearchHit]:
+        doc = self._docs.get(complaint_id)
+        if doc is None:
+            return None
+        score = 0.0
+        best: Optional[Tuple[float, _IndexedField]] = None
+        for field in doc:
+            if term in field.tokens:
+                weight = 3.0
+            elif field.has_token_prefix(term):
+                weight = 2.0
+            elif term in field.text:
+                weight = 1.0
+            else:
+                continue
+            field_score = field.weight * weight
+            if field.name == "complaint_text":
+                field_score *= min(field.text.count(term), 5)
+            score += field_score
+            if best is None or field_score > best[0]:
+                best = (field_score, field)
+        if best is None:
+            return None
+        field = best[1]
+        start = max(field.text.find(term), 0)
+        snippet, match_start, match_end = _snippet(
+            self._sources[complaint_id][field.name], start, start + len(term)
+        )
+        return SearchHit(complaint_id, score, field.name, snippet, match_start, match_end)
+
+    def matches(self, query: str) -> Set[int]:
+        """Ids of the complaints containing ``query``, without scoring them."""
+        term = query.strip().lower()
+        if not term:
+            return set()
+        with self._lock:
+            candidates = self._candidates(term, None)
+            if len(term) < GRAM_SIZE:
+                # Every gram is a substring of its document, so a prefix hit
+                # is already a match.
+                return candidates
+            return {
+                complaint_id
+                for complaint_id in candidates
+                if any(term in field.text for field in self._docs[complaint_id])
+            }
+
+    def search(self, query: str, ids: Optional[Iterable[int]] = None) -> Dict[int, SearchHit]:
+        """Return hits for ``query`` keyed by complaint id.
+
+        ``ids`` optionally restricts scoring to an already filtered set.
+        """
+        term = query.strip().lower()
+        if not term:
+            return {}
+        with self._lock:
+            hits: Dict[int, SearchHit] = {}
+            for complaint_id in self._candidates(term, ids):
+                hit = self._score(complaint_id, term)
+                if hit is not None:
+                    hits[complaint_id] = hit
+            return hits
+
+
+complaint_search = ComplaintSearchIndex()
+db.add_listener("complaints", complaint_search.apply, replay=True)
@@ -0,0 +1,211 @@
+"""Local nearest-neighbour index over resolved complaints.
+
+Complaint text is turned into hashed TF-IDF vectors: unigrams, adjacent word
+pairs and the category are hashed into ``settings.similarity_dimensions``
+columns with sublinear term frequency. Raw term-frequency rows live in a NumPy
+matrix that grows as complaints are resolved; document frequencies are kept
+alongside so IDF weights are applied at query time and never go stale. A
+query is one weighted matrix-vector product over the whole corpus.
+
+When NumPy is not installed the same scores are computed over sparse rows in
+pure Python, which is slower but keeps the feature working.
+"""
+from __future__ import annotations
+
+import math
+import re
+import zlib
+from dataclasses import dataclass
+from threading import RLock
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - fallback when package missing
+    np = None  # type: ignore[assignment]
+
+from ..config import settings
+from ..datastore import db
+from ..models import Complaint, ComplaintStatus
+
+_WORD_RE = re.compile(r"[a-z0-9]+")
+
+_STOPWORDS = frozenset(
+    """
+    a an and are as at be been but by for from has have i in is it its me my no not of on or
+    our so that the their there they this to was we were will with you your am can could did do
+    does had he her his if into just more than them then these those us what when which who why
+    would also very please still again
+    """.split()
+)
+
+_INITIAL_CAPACITY = 64
+
+
+@dataclass(frozen=True)
+class Neighbour:
+    complaint_id: int
+    score: float
+    matched_keywords: List[str]
+
+
+def _words(text: str) -> List[str]:
+    return [word for word in _WORD_RE.findall(text.lower()) if len(word) > 1 and word not in _STOPWORDS]
+
+
+def _features(complaint: Complaint) -> Tuple[Dict[str, int], Set[str]]:
+    """Term counts for ``complaint`` and the unigram keywords among them."""
+    words = _words(complaint.complaint_text)
+    counts: Dict[str, int] = {}
+    for term in words:
+        counts[term] = counts.get(term, 0) + 1
+    for first, second in zip(words, words[1:]):
+        pair = f"{first} {second}"
+        counts[pair] = counts.get(pair, 0) + 1
+    if complaint.category:
+        counts[f"category:{complaint.category.lower()}"] = 1
+    return counts, set(words)
+
+
+class ComplaintSimilarityIndex:
+    """Cosine similarity between a complaint and every resolved complaint.
+
+    Rows are kept dense (``_size`` live rows at the top of the matrix); removing
+    a complaint moves the last row into the freed slot so a query never scans
+    dead rows. Hashing lets unrelated terms share a column, so a neighbour is
+    only returned when it shares at least one actual term with the query.
+    """
+
+    def __init__(self, dimensions: int) -> None:
+        self.dimensions = dimensions
+        self._lock = RLock()
+        self._row_of: Dict[int, int] = {}
+        self._ids: List[int] = []
+        self._terms: Dict[int, Set[str]] = {}
+        self._sparse: Dict[int, Dict[int, float]] = {}
+        self._size = 0
+        if np is not None:
+            self._matrix = np.zeros((_INITIAL_CAPACITY, dimensions), dtype=np.float32)
+            self._df = np.zeros(dimensions, dtype=np.float64)
+        else:
+            self._matrix = None
+            self._df = [0.0] * dimensions
+
+    def __len__(self) -> int:
+        return self._size
+
+    def _column(self, term: str) -> int:
+        return zlib.crc32(term.encode("utf-8")) % self.dimensions
+
+    def vectorize(self, counts: Dict[str, int]) -> Dict[int, float]:
+        """Sublinear term frequencies folded into hashed columns."""
+        row: Dict[int, float] = {}
+        for term, count in counts.items():
+            column = self._column(term)
+            row[column] = row.get(column, 0.0) + 1.0 + math.log(count)
+        return row
+
+    def apply(self, previous: Optional[Complaint], current: Optional[Complaint]) -> None:
+        """Datastore listener: index resolved complaints, drop everything else."""
+        with self._lock:
+            complaint_id = (current or previous).id  # type: ignore[union-attr]
+            self._discard(complaint_id)
+            if current is not None and current.status == ComplaintStatus.resolved:
+                self._add(current)
+
+    def _add(self, complaint: Complaint) -> None:
+        counts, _ = _features(complaint)
+        row = self.vectorize(counts)
+        position = self._size
+        if self._matrix is not None:
+            if position == self._matrix.shape[0]:
+                grown = np.zeros((position * 2, self.dimensions), dtype=np.float32)
+                grown[:position] = self._matrix
+                self._matrix = grown
+            for column, value in row.items():
+                self._matrix[position, column] = value
+        for column in row:
+            self._df[column] += 1
+        self._ids.append(complaint.id)
+        self._row_of[complaint.id] = position
+        self._sparse[complaint.id] = row
+        self._terms[complaint.id] = set(counts)
+        self._size += 1
+
+    def _discard(self, complaint_id: int) -> None:
+        position = self._row_of.pop(complaint_id, None)
+        if position is None:
+            return
+        for column in self._sparse.pop(complaint_id):
+            self._df[column] -= 1
+        self._terms.pop(complaint_id, None)
+        last = self._size - 1
+        if position != last:
+            moved = self._ids[last]
+            self._ids[position] = moved
+            self._row_of[moved] = position
+            if self._matrix is not None:
+                self._matrix[position] = self._matrix[last]
+        if self._matrix is not None:
+            self._matrix[last] = 0.0
+        self._ids.pop()
+        self._size = last
+
+    def _idf(self, column: int) -> float:
+        return math.log((1 + self._size) / (1 + self._df[column])) + 1.0
+
+    def _ranked(self, query: Dict[int, float]) -> Iterator[Tuple[float, int]]:
+        """Yield ``(cosine, complaint_id)`` for every row sharing a column with ``query``, best first."""
+        if self._matrix is not None:
+            rows = self._matrix[: self._size]
+            idf_squared = (np.log((1 + self._size) / (1 + self._df)) + 1.0) ** 2
+            weighted = np.zeros(self.dimensions, dtype=np.float64)
+            for column, value in query.items():
+                weighted[column] = value * idf_squared[column]
+            dots = rows @ weighted
+            norms = np.sqrt(np.einsum("ij,ij,j->i", rows, rows, idf_squared))
+            query_norm = math.sqrt(float(sum(value * weighted[column] for column, value in query.items())))
+            with np.errstate(divide="ignore", invalid="ignore"):
+                cosine = np.where(norms > 0, dots / (norms * query_norm), 0.0)
+            positive = np.flatnonzero(cosine > 0)
+            for position in positive[np.argsort(-cosine[positive], kind="stable")]:
+                yield float(cosine[position]), self._ids[position]
+            return
+        idf_squared = {column: self._idf(column) ** 2 for column in query}
+        query_norm = math.sqrt(sum(value * value * idf_squared[column] for column, value in query.items()))
+        scores: List[Tuple[float, int]] = []
+        for complaint_id, row in self._sparse.items():
+            dot = sum(value * row[column] * idf_squared[column] for column, value in query.items() if column in row)
+            if dot <= 0:
+                continue
+            norm = math.sqrt(sum(value * value * self._idf(column) ** 2 for column, value in row.items()))
+            scores.append((dot / (norm * query_norm), complaint_id))
+        scores.sort(key=lambda entry: (-entry[0], entry[1]))
+        yield from scores
+
+    def nearest(self, complaint: Complaint, k: int = 5) -> List[Neighbour]:
+        """Return up to ``k`` resolved complaints most similar to ``complaint``."""
+        counts, keywords = _features(complaint)
+        query = self.vectorize(counts)
+        if not query or k <= 0:
+            return []
+        terms = set(counts)
+        with self._lock:
+            if not self._size:
+                return []
+            neighbours: List[Neighbour] = []
+            for score, complaint_id in self._ranked(query):
+                if complaint_id == complaint.id:
+                    continue
+                shared = terms & self._terms[complaint_id]
+                if not shared:
+                    continue
+                matched = sorted(shared & keywords, key=lambda term: (-self._idf(self._column(term)), term))
+                neighbours.append(Neighbour(complaint_id, round(min(score, 1.0), 4), matched[:5]))
+                if len(neighbours) == k:
+                    break
+            return neighbours
+
+
+complaint_similarity = ComplaintSimilarityIndex(settings.similarity_dimensions)
+db.add_listener("complaints", complaint_similarity.apply, replay=True)
@@ -0,0 +1,117 @@
+"""Reusable, authenticated SMTP sessions.
+
+Opening an SMTP session costs a TCP connect, EHLO, usually a STARTTLS
+handshake and a login. The pool keeps up to ``size`` sessions open and hands
+them out one caller at a time; a session that has sat idle is probed with
+``NOOP`` before reuse, and one that fails mid-send is discarded so the next
+caller reconnects.
+"""
+from __future__ import annotations
+
+import logging
+import smtplib
+import ssl
+import time
+from contextlib import contextmanager
+from threading import BoundedSemaphore, Lock
+from typing import Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Sessions idle for longer than this are checked with NOOP before reuse.
+IDLE_CHECK_SECONDS = 30.0
+# Servers commonly drop sessions after a few minutes; don't even try past this.
+MAX_IDLE_SECONDS = 240.0
+
+
+class SMTPConnectionPool:
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        *,
+        user: Optional[str] = None,
+        password: Optional[str] = None,
+        size: int = 2,
+        timeout: float = 30.0,
+        starttls: bool = True,
+    ) -> None:
+        self.host = host
+        self.port = port
+        self._user = user
+        self._password = password
+        self._timeout = timeout
+        self._starttls = starttls
+        self._slots = BoundedSemaphore(size)
+        self._lock = Lock()
+        self._idle: List[Tuple[smtplib.SMTP, float]] = []
+        self.connects = 0
+
+    def _connect(self) -> smtplib.SMTP:
+        context = ssl.create_default_context()
+        server: smtplib.SMTP
+        if self.port == 465:
+            server = smtplib.SMTP_SSL(self.host, self.port, timeout=self._timeout, context=context)
+        else:
+            server = smtplib.SMTP(self.host, self.port, timeout=self._timeout)
+            server.ehlo()
+            if self._starttls and server.has_extn("starttls"):
+                server.starttls(context=context)
+                server.ehlo()
+            elif self._starttls:
+                logger.debug("SMTP server does not support STARTTLS; continuing without TLS.")
+        if self._user and self._password:
+            server.login(self._user, self._password)
+        self.connects += 1
+        return server
+
+    @staticmethod
+    def _close(server: smtplib.SMTP) -> None:
+        try:
+            server.quit()
+        except Exception:
+            try:
+                server.close()
+            except Exception:
+                pass
+
+    def _checkout(self) -> smtplib.SMTP:
+        now = time.monotonic()
+        while True:
+            with self._lock:
+                if not self._idle:
+                    break
+                server, idle_since = self._idle.pop()
+            idle = now - idle_since
+            if idle > MAX_IDLE_SECONDS:
+                self._close(server)
+                continue
+            if idle > IDLE_CHECK_SECONDS:
+                try:
+                    if server.noop()[0] != 250:
+                        raise smtplib.SMTPServerDisconnected("NOOP rejected")
+                except (smtplib.SMTPException, OSError):
+                    self._close(server)
+                    continue
+            return server
+        return self._connect()
+
+    @contextmanager
+    def session(self) -> Iterator[smtplib.SMTP]:
+        """Borrow a connected session; it is returned to the pool unless the block raised."""
+        with self._slots:
+            server = self._checkout()
+            try:
+                yield server
+            except BaseException:
+                self._close(server)
+                raise
+            if server.sock is not None:
+                with self._lock:
+                    self._idle.append((server, time.monotonic()))
+
+    def close(self) -> None:
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for server, _ in idle:
+            self._close(server)
@@ -0,0 +1,290 @@
+"""Issued access and refresh tokens.
+
+Two interchangeable stores are available, chosen with ``AUTH_TOKEN_MODE``:
+
+``TokenStore`` (``opaque``, the default) keeps random tokens in this
+process's memory. Tokens are indexed three ways: by value for verification,
+by user for bulk revocation, and in a min-heap ordered by expiry so expired
+tokens are swept as new ones are issued instead of lingering until someone
+presents them. The store never grows past ``max_entries``; when full, the
+tokens closest to expiry are evicted first.
+
+``SignedTokenStore`` (``jwt``) issues HS256-signed access tokens that any
+worker can verify with ``JWT_SECRET`` alone. Refresh tokens and revocations
+live in a SQLite file next to the datastore, which every worker process on
+the host shares. That makes authentication independent of the worker only;
+each worker still loads its own copy of the datastore, so the service as a
+whole still runs as a single worker. ``JWT_SECRET`` must be set explicitly.
+"""
+from __future__ import annotations
+
+import hashlib
+import heapq
+import sqlite3
+import time
+import uuid
+from dataclasses import dataclass
+from pathlib import Path
+from secrets import token_urlsafe
+from threading import Lock
+from typing import Dict, List, Optional, Set, Tuple, Union
+
+from ..config import settings
+from ..security import decode_jwt, encode_jwt
+
+# Fallback from config.py, fine for opaque tokens but never for signing.
+DEFAULT_JWT_SECRET = "dev-secret-key"
+
+# How often the signed store purges expired refresh tokens and revocations.
+SIGNED_SWEEP_INTERVAL_SECONDS = 300.0
+
+
+@dataclass
+class TokenRecord:
+    user_id: int
+    type: str
+    expires_at: float
+
+
+class TokenStore:
+    def __init__(self, max_entries: int = 50000) -> None:
+        self.max_entries = max_entries
+        self._lock = Lock()
+        self._tokens: Dict[str, TokenRecord] = {}
+        self._by_user: Dict[int, Set[str]] = {}
+        self._expiry: List[Tuple[float, str]] = []
+        self.expired = 0
+        self.evicted = 0
+
+    def issue(self, user_id: int, token_type: str, minutes: int) -> str:
+        token = token_urlsafe(32)
+        now = time.time()
+        record = TokenRecord(user_id=user_id, type=token_type, expires_at=now + minutes * 60)
+        with self._lock:
+            self._sweep(now)
+            while len(self._tokens) >= self.max_entries and self._evict_soonest():
+                pass
+            self._tokens[token] = record
+            self._by_user.setdefault(user_id, set()).add(token)
+            heapq.heappush(self._expiry, (record.expires_at, token))
+        return token
+
+    def verify(self, token: str, expected_type: str = "access") -> Optional[int]:
+        record = self._tokens.get(token)
+        if record is None or record.type != expected_type:
+            return None
+        if record.expires_at < time.time():
+            with self._lock:
+                self._discard(token)
+            return None
+        return record.user_id
+
+    def revoke(self, token: str) -> None:
+        with self._lock:
+            self._discard(token)
+
+    def revoke_user(self, user_id: int) -> int:
+        """Revoke every token issued to ``user_id``; returns how many were dropped."""
+        with self._lock:
+            tokens = self._by_user.pop(user_id, set())
+            for token in tokens:
+                self._tokens.pop(token, None)
+        return len(tokens)
+
+    def sweep(self) -> int:
+        """Drop expired tokens now; ``issue`` also does this as it goes."""
+        with self._lock:
+            return self._sweep(time.time())
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "entries": len(self._tokens),
+            "users": len(self._by_user),
+            "max_entries": self.max_entries,
+            "expired": self.expired,
+            "evicted": self.evicted,
+        }
+
+    def __len__(self) -> int:
+        return len(self._tokens)
+
+    # Internals (callers hold ``_lock``) ------------------------------------
+    def _discard(self, token: str) -> None:
+        record = self._tokens.pop(token, None)
+        if record is None:
+            return
+        user_tokens = self._by_user.get(record.user_id)
+        if user_tokens is not None:
+            user_tokens.discard(token)
+            if not user_tokens:
+                del self._by_user[record.user_id]
+
+    def _sweep(self, now: float) -> int:
+        removed = 0
+        while self._expiry and self._expiry[0][0] <= now:
+            _, token = heapq.heappop(self._expiry)
+            if token in self._tokens:
+                self._discard(token)
+                removed += 1
+        # Revoked tokens leave their heap entries behind; rebuild once those
+        # outnumber the live tokens so the heap stays proportional.
+        if len(self._expiry) > 2 * len(self._tokens) + 64:
+            self._expiry = [(record.expires_at, token) for token, record in self._tokens.items()]
+            heapq.heapify(self._expiry)
+        self.expired += removed
+        return removed
+
+    def _evict_soonest(self) -> bool:
+        while self._expiry:
+            _, token = heapq.heappop(self._expiry)
+            if token in self._tokens:
+                self._discard(token)
+                self.evicted += 1
+                return True
+        return False
+
+
+class SignedTokenStore:
+    def __init__(self, path: Path, secret: str) -> None:
+        self.path = path
+        self._secret = secret
+        self._lock = Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._next_sweep = 0.0
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(self.path), check_same_thread=False, isolation_level=None, timeout=10.0)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS refresh_tokens ("
+                "token_hash TEXT PRIMARY KEY, user_id INTEGER NOT NULL, expires_at REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS refresh_tokens_user ON refresh_tokens (user_id)")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS revoked_tokens (jti TEXT PRIMARY KEY, expires_at REAL NOT NULL)"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS revoked_users (user_id INTEGER PRIMARY KEY, not_before REAL NOT NULL)"
+            )
+            self._conn = conn
+        return self._conn
+
+    @staticmethod
+    def _hash(token: str) -> str:
+        # Only digests are stored, so a copy of the file does not leak usable refresh tokens.
+        return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+    def issue(self, user_id: int, token_type: str, minutes: int) -> str:
+        now = time.time()
+        expires_at = now + minutes * 60
+        if token_type == "refresh":
+            token = token_urlsafe(32)
+            with self._lock:
+                self._maybe_sweep(now)
+                self._connection().execute(
+                    "INSERT INTO refresh_tokens (token_hash, user_id, expires_at) VALUES (?, ?, ?)",
+                    (self._hash(token), user_id, expires_at),
+                )
+            return token
+        claims = {
+            "sub": str(user_id),
+            "typ": token_type,
+            "iat": round(now, 3),
+            "exp": int(expires_at),
+            "jti": uuid.uuid4().hex,
+        }
+        return encode_jwt(claims, self._secret)
+
+    def verify(self, token: str, expected_type: str = "access") -> Optional[int]:
+        if expected_type == "refresh":
+            with self._lock:
+                row = self._connection().execute(
+                    "SELECT user_id, expires_at FROM refresh_tokens WHERE token_hash = ?", (self._hash(token),)
+                ).fetchone()
+            if row is None or row[1] < time.time():
+                return None
+            return row[0]
+        claims = decode_jwt(token, self._secret)
+        if claims is None or claims.get("typ") != expected_type:
+            return None
+        try:
+            user_id = int(claims["sub"])
+        except (KeyError, TypeError, ValueError):
+            return None
+        with self._lock:
+            revoked = self._connection().execute(
+                "SELECT 1 FROM revoked_tokens WHERE jti = ? "
+                "UNION ALL SELECT 1 FROM revoked_users WHERE user_id = ? AND not_before > ?",
+                (claims.get("jti"), user_id, claims.get("iat", 0)),
+            ).fetchone()
+        return None if revoked else user_id
+
+    def revoke(self, token: str) -> None:
+        claims = decode_jwt(token, self._secret, verify_exp=False)
+        with self._lock:
+            conn = self._connection()
+            if claims is None:
+                conn.execute("DELETE FROM refresh_tokens WHERE token_hash = ?", (self._hash(token),))
+            elif claims.get("jti") and claims.get("exp", 0) > time.time():
+                conn.execute(
+                    "INSERT OR IGNORE INTO revoked_tokens (jti, expires_at) VALUES (?, ?)",
+                    (claims["jti"], claims["exp"]),
+                )
+
+    def revoke_user(self, user_id: int) -> int:
+        """Reject every token issued to ``user_id`` until now; returns refresh tokens dropped."""
+        with self._lock:
+            conn = self._connection()
+            conn.execute(
+                "INSERT OR REPLACE INTO revoked_users (user_id, not_before) VALUES (?, ?)",
+                (user_id, time.time()),
+            )
+            cursor = conn.execute("DELETE FROM refresh_tokens WHERE user_id = ?", (user_id,))
+            return cursor.rowcount
+
+    def sweep(self) -> int:
+        with self._lock:
+            return self._sweep(time.time())
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            conn = self._connection()
+            refresh = conn.execute("SELECT COUNT(*) FROM refresh_tokens").fetchone()[0]
+            revoked = conn.execute("SELECT COUNT(*) FROM revoked_tokens").fetchone()[0]
+        return {"refresh_tokens": refresh, "revoked_tokens": revoked}
+
+    def _maybe_sweep(self, now: float) -> None:
+        if now >= self._next_sweep:
+            self._sweep(now)
+
+    def _sweep(self, now: float) -> int:
+        conn = self._connection()
+        removed = conn.execute("DELETE FROM refresh_tokens WHERE expires_at < ?", (now,)).rowcount
+        removed += conn.execute("DELETE FROM revoked_tokens WHERE expires_at < ?", (now,)).rowcount
+        # A user-wide revocation only matters while tokens issued before it can still be valid.
+        horizon = now - max(settings.token_exp_minutes, settings.refresh_token_exp_minutes) * 60
+        conn.execute("DELETE FROM revoked_users WHERE not_before < ?", (horizon,))
+        self._next_sweep = now + SIGNED_SWEEP_INTERVAL_SECONDS
+        return removed
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+def _create_token_store() -> Union[TokenStore, SignedTokenStore]:
+    if settings.auth_token_mode == "jwt":
+        # Signed tokens are only as secret as the key; with the public default
+        # anyone could mint a super_admin token.
+        if not settings.jwt_secret.strip() or settings.jwt_secret == DEFAULT_JWT_SECRET:
+            raise RuntimeError("AUTH_TOKEN_MODE=jwt requires JWT_SECRET to be set to a strong, non-default value.")
+        path = settings.data_store_path
+        return SignedTokenStore(path.with_name(f"{path.stem}.auth.sqlite3"), settings.jwt_secret)
+    return TokenStore(max_entries=settings.auth_max_tokens)
+
+
+token_store = _create_token_store()
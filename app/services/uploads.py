@@ -0,0 +1,104 @@
+"""Streaming intake for uploaded attachments.
+
+Uploads are read in fixed-size chunks instead of being buffered whole: the
+first chunk is sniffed for an allowed content type, every chunk is hashed and
+counted so an oversized upload is rejected as soon as it crosses the limit,
+and the bytes go to a temporary file in the upload directory through a worker
+thread. ``db.create_attachment`` then moves the finished file into the blob
+store with an atomic rename.
+"""
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import os
+import uuid
+from dataclasses import dataclass
+from pathlib import Path
+from typing import BinaryIO
+
+from fastapi import HTTPException, UploadFile, status
+
+from ..config import settings
+from .file_validation import has_dangerous_double_extension, sniff_mime
+
+CHUNK_SIZE = 1024 * 1024
+# Enough bytes for every signature ``sniff_mime`` knows about.
+SNIFF_BYTES = 16
+
+
+@dataclass
+class StagedUpload:
+    """A validated upload sitting in a temporary file until it is committed."""
+
+    temp_path: Path
+    file_name: str
+    content_type: str
+    size: int
+    sha256: str
+
+    async def discard(self) -> None:
+        """Remove the temporary file if it was never stored."""
+        await asyncio.to_thread(self.temp_path.unlink, missing_ok=True)
+
+
+def _reject(detail: str) -> HTTPException:
+    return HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=detail)
+
+
+def _finish(handle: BinaryIO) -> None:
+    handle.flush()
+    os.fsync(handle.fileno())
+    handle.close()
+
+
+async def _read_head(upload: UploadFile) -> bytes:
+    head = b""
+    while len(head) < SNIFF_BYTES:
+        chunk = await upload.read(CHUNK_SIZE)
+        if not chunk:
+            break
+        head += chunk
+    return head
+
+
+async def stage_upload(upload: UploadFile) -> StagedUpload:
+    """Validate and spool ``upload`` to disk without holding it in memory.
+
+    Raises ``HTTPException(400)`` with the same messages the upload endpoints
+    have always used; on any failure the partial temporary file is removed.
+    """
+    file_name = upload.filename or "attachment"
+    if has_dangerous_double_extension(file_name):
+        raise _reject("Dangerous file name detected")
+
+    chunk = await _read_head(upload)
+    sniffed = sniff_mime(chunk)
+    if sniffed not in settings.allowed_file_types:
+        raise _reject("Unsupported or invalid file content")
+
+    upload_dir = Path(settings.upload_dir)
+    temp_path = upload_dir / f".upload-{uuid.uuid4().hex}.part"
+    digest = hashlib.sha256()
+    size = 0
+    handle: BinaryIO = await asyncio.to_thread(open, temp_path, "wb")
+    try:
+        while chunk:
+            size += len(chunk)
+            if size > settings.max_file_size:
+                raise _reject("File exceeds size limit")
+            digest.update(chunk)
+            await asyncio.to_thread(handle.write, chunk)
+            chunk = await upload.read(CHUNK_SIZE)
+        await asyncio.to_thread(_finish, handle)
+    except BaseException:
+        await asyncio.to_thread(handle.close)
+        await asyncio.to_thread(temp_path.unlink, missing_ok=True)
+        raise
+    return StagedUpload(
+        temp_path=temp_path,
+        file_name=file_name,
+        content_type=sniffed,
+        size=size,
+        sha256=digest.hexdigest(),
+    )
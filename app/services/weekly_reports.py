@@ -11,7 +11,7 @@ from ..datastore import db
 from ..models import Complaint, ComplaintStatus, ReportPeriod
 from .advanced_analytics import advanced_analytics_service
 from .email import EmailPayload, email_service
-from .email_templates import render_email
+from .email_templates import EmailContent, render_email
 
 logger = logging.getLogger(__name__)
 
@@ -95,21 +95,25 @@ class WeeklyReportService:
                 recipients.update(override_key)
         return sorted(recipients)
 
-    def _send_email(self, recipients: Sequence[str], subject: str, html_body: str, text_body: str) -> bool:
+    def _send_email(self, recipients: Sequence[str], email_doc: EmailContent) -> bool:
         if not recipients:
             logger.info("Skipping weekly report email; no recipients configured.")
             return False
 
-        payload = EmailPayload(
-            to=recipients,
-            subject=subject,
-            html=html_body,
-            text=text_body,
-        )
-        success = email_service.send(payload)
-        if not success:
-            email_service.enqueue_retry(payload, error="Weekly report initial send failed")
-        return success
+        # One message per recipient over a single SMTP session; failures are
+        # queued for retry by the email service.
+        payloads = [
+            EmailPayload(to=[recipient], subject=email_doc.subject, html=email_doc.html, text=email_doc.text)
+            for recipient in recipients
+        ]
+        outcomes = email_service.send_many(payloads)
+        failed = [outcome.recipient for outcome in outcomes if not outcome.sent]
+        if failed:
+            logger.warning(
+                "Weekly report not delivered to every recipient",
+                extra={"failed_recipients": failed, "recipient_count": len(recipients)},
+            )
+        return not failed
 
     def generate_and_send_weekly_reports(self, reference: datetime | None = None) -> None:
         hour, minute = self._parse_report_time()
@@ -144,7 +148,7 @@ class WeeklyReportService:
             },
         )
         recipients = self._collect_recipients(context.metrics)
-        sent = self._send_email(recipients, email_doc.subject, email_doc.html, email_doc.text)
+        sent = self._send_email(recipients, email_doc)
         report = db.create_report(
             period=ReportPeriod.weekly,
             from_date=start,
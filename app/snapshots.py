@@ -0,0 +1,129 @@
+"""Binary datastore snapshots.
+
+``db.json`` is pretty-printed and every record read from it goes through full
+pydantic validation, nested models included; at 100k complaints that costs
+tens of seconds per restart. With ``DATA_STORE_SNAPSHOT_FORMAT=binary`` the
+datastore checkpoints to a versioned pickle (protocol 5) of plain field dicts
+instead. Those dicts were dumped from models this service already validated,
+so they are rebuilt with ``model_construct`` and skip validation entirely.
+When a dict holds exactly the fields the model declares (the usual case,
+since the snapshot was dumped by the same code) the instance state is set
+directly, as unpickling a model does, which avoids ``model_construct``'s
+per-field Python loop.
+
+The file lives in the data directory and is only ever written by the service
+itself; like the rest of that directory it must not be writable by anyone
+else, since unpickling runs whatever the file describes.
+"""
+from __future__ import annotations
+
+import os
+import pickle
+import types
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, FrozenSet, List, NamedTuple, Tuple, Type, TypeVar, Union, get_args, get_origin
+
+from pydantic import BaseModel
+
+SNAPSHOT_FORMAT = "feedback-datastore"
+SNAPSHOT_VERSION = 1
+
+ModelT = TypeVar("ModelT", bound=BaseModel)
+
+
+class SnapshotError(Exception):
+    """Raised when a binary snapshot is unreadable or from an unsupported version."""
+
+
+def write_snapshot(path: Path, generation: int, counters: Dict[str, int], buckets: Dict[str, List[dict]]) -> None:
+    state = {
+        "format": SNAPSHOT_FORMAT,
+        "version": SNAPSHOT_VERSION,
+        "generation": generation,
+        "counters": counters,
+        "buckets": buckets,
+    }
+    tmp_path = path.with_name(path.name + ".tmp")
+    with tmp_path.open("wb") as handle:
+        pickle.dump(state, handle, protocol=5)
+    os.replace(tmp_path, path)
+
+
+def read_snapshot(path: Path) -> Tuple[int, Dict[str, int], Dict[str, List[dict]]]:
+    """Return ``(generation, counters, buckets)`` from a binary snapshot."""
+    try:
+        with path.open("rb") as handle:
+            state = pickle.load(handle)
+    except (OSError, EOFError, pickle.UnpicklingError, AttributeError, ImportError, ValueError) as exc:
+        raise SnapshotError(f"Cannot read snapshot {path}: {exc}") from exc
+    if not isinstance(state, dict) or state.get("format") != SNAPSHOT_FORMAT:
+        raise SnapshotError(f"{path} is not a datastore snapshot")
+    if state.get("version") != SNAPSHOT_VERSION:
+        raise SnapshotError(f"{path} has unsupported snapshot version {state.get('version')!r}")
+    return state.get("generation", 0), state["counters"], state["buckets"]
+
+
+def _unwrap_optional(annotation: Any) -> Any:
+    if get_origin(annotation) in (Union, types.UnionType):
+        args = [arg for arg in get_args(annotation) if arg is not type(None)]
+        if len(args) == 1:
+            return args[0]
+    return annotation
+
+
+class _ConstructPlan(NamedTuple):
+    fields: FrozenSet[str]
+    # ``(field, model, is_list)`` for each field that holds models.
+    nested: Tuple[Tuple[str, Type[BaseModel], bool], ...]
+    # Whether complete field dicts can become the instance state as they are.
+    direct: bool
+
+
+@lru_cache(maxsize=None)
+def _plan(model: Type[BaseModel]) -> _ConstructPlan:
+    nested = []
+    for name, field in model.model_fields.items():
+        annotation = _unwrap_optional(field.annotation)
+        is_list = get_origin(annotation) is list
+        if is_list:
+            annotation = _unwrap_optional(get_args(annotation)[0])
+        if isinstance(annotation, type) and issubclass(annotation, BaseModel):
+            nested.append((name, annotation, is_list))
+    direct = (
+        model.model_config.get("extra") != "allow"
+        and not model.__pydantic_post_init__
+        and not model.__private_attributes__
+        and all(f.alias is None and f.validation_alias is None for f in model.model_fields.values())
+    )
+    return _ConstructPlan(frozenset(model.model_fields), tuple(nested), direct)
+
+
+def construct_model(model: Type[ModelT], data: Dict[str, Any]) -> ModelT:
+    """Rebuild ``model`` from trusted ``model_dump()`` output without validating it.
+
+    ``model_construct`` leaves nested values as dicts, so fields annotated with
+    a model (optionally inside ``Optional``/``List``) are constructed first.
+    ``data`` is modified in place and may become the instance's ``__dict__``.
+    """
+    plan = _plan(model)
+    for name, nested_model, is_list in plan.nested:
+        value = data.get(name)
+        if value is None:
+            continue
+        if is_list:
+            data[name] = [construct_model(nested_model, item) for item in value]
+        else:
+            data[name] = construct_model(nested_model, value)
+    if plan.direct and data.keys() == plan.fields:
+        instance = model.__new__(model)
+        instance.__setstate__(
+            {
+                "__dict__": data,
+                "__pydantic_fields_set__": set(plan.fields),
+                "__pydantic_extra__": None,
+                "__pydantic_private__": None,
+            }
+        )
+        return instance
+    return model.model_construct(**data)
@@ -0,0 +1,108 @@
+"""Start-up work that runs after the server is already listening.
+
+Uvicorn accepts connections only once the application's start-up handlers
+return. Loading the datastore, checking seeded password hashes and starting
+the background services used to happen there, so a restart stayed
+unreachable for as long as those took and health checks timed out on large
+data sets. ``StartupPipeline`` runs the same steps as named phases on a
+worker thread and logs how long each one took. ``/health`` answers 503 until
+every phase has finished; other requests wait for the pipeline instead.
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from threading import Event, Lock, Thread
+from typing import Callable, Dict, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+Phase = Tuple[str, Callable[[], None]]
+
+PENDING = "pending"
+STARTING = "starting"
+READY = "ok"
+FAILED = "failed"
+
+
+class StartupPipeline:
+    def __init__(self) -> None:
+        self._lock = Lock()
+        self._done = Event()
+        self._cancelled = Event()
+        self._thread: Optional[Thread] = None
+        self._started_at = 0.0
+        self.state = PENDING
+        self.phase: Optional[str] = None
+        self.timings_ms: Dict[str, float] = {}
+
+    @property
+    def ready(self) -> bool:
+        return self.state == READY
+
+    def record(self, name: str, seconds: float) -> None:
+        """Log a phase that was timed elsewhere (such as the application imports)."""
+        self.timings_ms[name] = round(seconds * 1000, 1)
+        logger.info(
+            "Start-up phase %s finished in %.1f ms",
+            name,
+            self.timings_ms[name],
+            extra={"phase": name, "duration_ms": self.timings_ms[name]},
+        )
+
+    def start(self, phases: Sequence[Phase]) -> bool:
+        """Run ``phases`` in order on a background thread; only the first call has any effect."""
+        with self._lock:
+            if self._thread is not None:
+                return False
+            self.state = STARTING
+            self._started_at = time.perf_counter()
+            self._thread = Thread(target=self._run, args=(list(phases),), name="startup", daemon=True)
+            self._thread.start()
+        return True
+
+    def _run(self, phases: Sequence[Phase]) -> None:
+        try:
+            for name, step in phases:
+                if self._cancelled.is_set():
+                    return
+                self.phase = name
+                started = time.perf_counter()
+                try:
+                    step()
+                except Exception:
+                    logger.exception("Start-up phase %s failed", name, extra={"phase": name})
+                    self.state = FAILED
+                    return
+                self.record(name, time.perf_counter() - started)
+            self.phase = None
+            self.state = READY
+            total_ms = round((time.perf_counter() - self._started_at) * 1000, 1)
+            logger.info("Start-up complete in %.1f ms", total_ms, extra={"duration_ms": total_ms})
+        finally:
+            self._done.set()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        self._done.wait(timeout)
+        return self.ready
+
+    async def wait_async(self, timeout: float) -> bool:
+        # Polls rather than parking a thread per waiting request.
+        deadline = time.monotonic() + timeout
+        while not self._done.is_set() and time.monotonic() < deadline:
+            await asyncio.sleep(0.05)
+        return self.ready
+
+    def stop(self, timeout: float = 30.0) -> None:
+        """Skip any phases not yet begun and wait for the current one to finish."""
+        self._cancelled.set()
+        thread = self._thread
+        if thread is not None:
+            thread.join(timeout)
+
+    def status(self) -> Dict[str, object]:
+        return {"phase": self.phase, "timings_ms": dict(self.timings_ms)}
+
+
+startup = StartupPipeline()
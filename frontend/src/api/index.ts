@@ -230,6 +230,17 @@ export const downloadAttachment = async (attachmentId: number) => {
   return response.data;
 };
 
+export const downloadAttachmentPreview = async (
+  attachmentId: number,
+  variant: "thumbnail" | "preview" = "thumbnail"
+) => {
+  const response = await apiClient.get<Blob>(`/api/files/${attachmentId}/preview`, {
+    params: { variant },
+    responseType: "blob"
+  });
+  return response.data;
+};
+
 export const deleteAttachment = async (attachmentId: number) => {
   await apiClient.delete(`/api/files/${attachmentId}`);
 };
@@ -445,10 +456,20 @@ export const getAppLogs = async () => {
   return data.content;
 };
 
-export const getEmailQueueStats = async (): Promise<{ pending: number; next_retry_eta: string | null }> => {
-  const { data } = await apiClient.get<{ pending: number; next_retry_eta: string | null }>(
-    "/api/logs/email-queue"
-  );
+export interface EmailQueueStats {
+  pending: number;
+  in_flight: number;
+  failed: number;
+  oldest_age_seconds: number | null;
+  next_retry_eta: string | null;
+  sent: number;
+  retried: number;
+  abandoned: number;
+  send_latency_ms: { buckets: Record<string, number>; count: number; avg: number };
+}
+
+export const getEmailQueueStats = async (): Promise<EmailQueueStats> => {
+  const { data } = await apiClient.get<EmailQueueStats>("/api/logs/email-queue");
   return data;
 };
 
@@ -469,10 +490,29 @@ export const regenerateResolutionTemplate = async (id: number) => {
   return data.template;
 };
 
-export const analyzeAllComplaints = async () => {
-  const { data } = await apiClient.post<{ analyzed: number; skipped: number; failed: number[] }>(
-    "/api/complaints/analyze-all"
-  );
+export interface AnalysisJob {
+  job_id: string;
+  status: "queued" | "running" | "completed" | "failed";
+  total: number;
+  processed: number;
+  remaining: number;
+  analyzed: number;
+  skipped: number;
+  failed: number[];
+  error?: string | null;
+}
+
+export const getAnalysisJob = async (jobId: string) => {
+  const { data } = await apiClient.get<AnalysisJob>(`/api/complaints/analyze-all/${jobId}`);
+  return data;
+};
+
+export const analyzeAllComplaints = async (pollIntervalMs = 2000) => {
+  let { data } = await apiClient.post<AnalysisJob>("/api/complaints/analyze-all");
+  while (data.status === "queued" || data.status === "running") {
+    await new Promise((resolve) => setTimeout(resolve, pollIntervalMs));
+    data = await getAnalysisJob(data.job_id);
+  }
   return data;
 };
 
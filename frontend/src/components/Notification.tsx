@@ -53,6 +53,9 @@ const NotificationBell = () => {
               tag: `notif-${data.data.id}`,
             });
           }
+        } else if (data.type === "resync") {
+          // Too many missed to replay one by one; reload the list instead.
+          refetch();
         }
       } catch (error) {
         console.error("Failed to parse SSE message:", error);
@@ -15,6 +15,7 @@ import {
   listComplaints,
   listReplies,
   downloadAttachment,
+  downloadAttachmentPreview,
   regenerateResolutionTemplate,
   updateComplaint
 } from "../api";
@@ -233,13 +234,29 @@ const DashboardPage = () => {
         return;
       }
 
+      const fetchThumbnail = async (attachmentId: number) => {
+        try {
+          return await downloadAttachmentPreview(attachmentId);
+        } catch (error) {
+          // 404 means the server cannot render previews (Pillow or pypdfium2
+          // not installed), so show the original as before.
+          if (error && typeof error === 'object' && 'response' in error) {
+            const axiosError = error as { response?: { status?: number } };
+            if (axiosError.response?.status === 404) {
+              return downloadAttachment(attachmentId);
+            }
+          }
+          throw error;
+        }
+      };
+
       const next: Record<number, string> = {};
       for (const attachment of attachments) {
         if (!attachment.file_type.startsWith("image/")) {
           continue;
         }
         try {
-          const blob = await downloadAttachment(attachment.id);
+          const blob = await fetchThumbnail(attachment.id);
           if (!active) {
             return;
           }
@@ -275,7 +292,7 @@ const DashboardPage = () => {
       revokeAll(attachmentPreviewRef.current);
       attachmentPreviewRef.current = {};
     };
-  }, [attachments, downloadAttachment]);
+  }, [attachments]);
 
   useEffect(() => {
     if (selected) {
@@ -292,10 +309,8 @@ const DashboardPage = () => {
 
   const handleViewAttachment = async (attachment: Attachment) => {
     try {
+      // List previews are thumbnails, so always fetch the original here.
       const getUrl = async () => {
-        if (attachmentPreviews[attachment.id]) {
-          return attachmentPreviews[attachment.id];
-        }
         const blob = await downloadAttachment(attachment.id);
         const url = URL.createObjectURL(blob);
         setTimeout(() => URL.revokeObjectURL(url), 60000);
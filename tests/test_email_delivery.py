@@ -0,0 +1,155 @@
+"""Outbox delivery over pooled SMTP sessions, against a local stub server."""
+from __future__ import annotations
+
+import socket
+import socketserver
+import threading
+import time
+from typing import List
+
+import pytest
+
+from app.config import settings
+from app.services.email import EmailPayload, EmailService
+
+
+class _StubSMTPHandler(socketserver.StreamRequestHandler):
+    """Just enough ESMTP for smtplib: AUTH PLAIN, no STARTTLS.
+
+    Recipients containing ``reject`` are refused with a 550.
+    """
+
+    def reply(self, line: str) -> None:
+        self.wfile.write(f"{line}\r\n".encode())
+
+    def handle(self) -> None:
+        server: _StubSMTPServer = self.server  # type: ignore[assignment]
+        with server.lock:
+            server.sessions.append(self.connection)
+        self.reply("220 stub ESMTP")
+        accepted: List[str] = []
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            command = line.decode().strip()
+            verb = command.split(" ", 1)[0].upper()
+            if verb in ("EHLO", "HELO"):
+                self.reply("250-stub")
+                self.reply("250 AUTH PLAIN")
+            elif verb == "AUTH":
+                self.reply("235 Authentication successful")
+            elif verb == "MAIL":
+                accepted = []
+                self.reply("250 OK")
+            elif verb == "RCPT":
+                if "reject" in command:
+                    self.reply("550 Mailbox unavailable")
+                else:
+                    accepted.append(command.split(":", 1)[1].strip("<> "))
+                    self.reply("250 OK")
+            elif verb == "DATA":
+                self.reply("354 End data with <CR><LF>.<CR><LF>")
+                while True:
+                    data = self.rfile.readline()
+                    if not data or data == b".\r\n":
+                        break
+                with server.lock:
+                    server.delivered.extend(accepted)
+                self.reply("250 Queued")
+            elif verb in ("NOOP", "RSET"):
+                self.reply("250 OK")
+            elif verb == "QUIT":
+                self.reply("221 Bye")
+                return
+            else:
+                self.reply("502 Command not implemented")
+
+
+class _StubSMTPServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self) -> None:
+        super().__init__(("127.0.0.1", 0), _StubSMTPHandler)
+        self.lock = threading.Lock()
+        self.sessions: List[socket.socket] = []
+        self.delivered: List[str] = []
+
+    def drop_sessions(self) -> None:
+        """Hang up on every open session, as a server timing out idle clients would."""
+        with self.lock:
+            sessions, self.sessions = self.sessions, []
+        for session in sessions:
+            try:
+                session.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+
+
+@pytest.fixture
+def smtp_server():
+    server = _StubSMTPServer()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def email_service(smtp_server, tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "smtp_host", "127.0.0.1")
+    monkeypatch.setattr(settings, "smtp_port", smtp_server.server_address[1])
+    monkeypatch.setattr(settings, "smtp_user", "mailer")
+    monkeypatch.setattr(settings, "smtp_pass", "secret")
+    monkeypatch.setattr(settings, "data_store_path", tmp_path / "db.json")
+    service = EmailService()
+    yield service
+    service.stop()
+
+
+def _message(to: str) -> EmailPayload:
+    return EmailPayload(to=[to], subject="Complaint update", text="Your complaint was updated.")
+
+
+def test_queued_messages_share_one_session(email_service, smtp_server):
+    email_service.queue(_message("a@example.com"))
+    email_service.queue(_message("b@example.com"))
+
+    assert email_service.process_queue() == 2
+    assert smtp_server.delivered == ["a@example.com", "b@example.com"]
+    assert email_service._pool.connects == 1
+    assert email_service.queue_stats()["pending"] == 0
+
+
+def test_dropped_session_is_replaced_without_a_retry(email_service, smtp_server):
+    email_service.queue(_message("a@example.com"))
+    email_service.process_queue()
+    smtp_server.drop_sessions()
+
+    email_service.queue(_message("b@example.com"))
+    assert email_service.process_queue() == 1
+
+    assert smtp_server.delivered == ["a@example.com", "b@example.com"]
+    assert email_service._pool.connects == 2
+    assert email_service.metrics.retried == 0
+
+
+def test_rejected_message_is_rescheduled_and_the_batch_continues(email_service, smtp_server):
+    email_service.queue(_message("reject@example.com"))
+    email_service.queue(_message("b@example.com"))
+    started = time.time()
+
+    assert email_service.process_queue() == 2
+
+    assert smtp_server.delivered == ["b@example.com"]
+    assert email_service._pool.connects == 1
+    assert email_service.metrics.retried == 1
+    # Not due yet, so a second pass leaves it alone.
+    assert email_service.process_queue() == 0
+    stats = email_service.queue_stats()
+    assert stats["pending"] == 1
+    assert stats["failed"] == 0
+    next_due = email_service._outbox.next_due_at()
+    assert next_due is not None and next_due > started